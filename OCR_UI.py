@@ -1,16 +1,236 @@
 # 성분표 분석 페이지 
 #UI
 #이미지 업로드와 카메라 촬영
-from PIL import Image
+import time
 import streamlit as st
-from ocr_utils import ocr_image_with_opencv   
+from image_ingest import load_gray
+from engine_router import iter_route_lines, record_route, route_image
+from quality_gate import check_quality
+from orientation import correct_orientation
+from ocr_cache import cache_key, get_cached_ocr, put_cached_ocr
+from near_duplicate import dhash, find_near_duplicate, remember_image_hash, thumbnail
+from metrics import increment_metric
+from label_parse import build_label_parse
+from ocr_jobs import submit_job
+from ingredient_stream import iter_ingredient_hits
+from deadline import Deadline
 
+OCR_LANG = 'kor+eng'
+OCR_ENGINE = 'router'
+
+# 분석 하나의 처리 시간 예산 (초) - 넘으면 남은 단계를 건너뛰고 부분 결과 표시
+OCR_BUDGET_SECONDS = 20
+
+
+def run_ocr(image, stats=None, on_hit=None):
+    """
+    같은 이미지(디코딩된 픽셀 기준)나 거의 같은 이미지(다시 찍은 사진)의 OCR 결과가 있으면 재사용하고
+    없을 때만 이미지 품질에 맞게 고른 OCR 경로로 OCR 수행
+    stats: 이미 계산한 이미지 통계 (품질 검사 결과 재사용)
+    on_hit: OCR 줄이 나오는 대로 찾은 알레르기 유발 성분을 하나씩 받는 함수 (전체 OCR이 끝나기 전에 표시하는 용도)
+    반환값: (OCR 텍스트, 재사용 종류 - 'exact' / 'near_duplicate' / None, 처리 시간 예산을 넘어 멈춘 단계 또는 None)
+    """
+    deadline = Deadline(OCR_BUDGET_SECONDS)
+    pixels, stats, route, _ = route_image(image, stats=stats)
+    key = cache_key(pixels, engine=OCR_ENGINE, mode=route, lang=OCR_LANG)
+    cached = get_cached_ocr(key)
+    if cached is not None:
+        print("⚡ OCR 캐시 적중")
+        return cached[0], 'exact', None
+
+    settings = f"{OCR_ENGINE}|{route}|{OCR_LANG}"
+    image_hash = dhash(pixels)
+    image_thumbnail = thumbnail(pixels)
+    match = find_near_duplicate(image_hash, settings, image_thumbnail)
+    if match is not None:
+        cached = get_cached_ocr(match[0])
+        if cached is not None:
+            print(f"📷 근사 중복 이미지 적중 (해밍 거리 {match[1]})")
+            increment_metric('ocr_cache.near_duplicate_hits')
+            return cached[0], 'near_duplicate', None
+
+    # 방향/기울기 보정은 실제로 OCR할 때만 (소요 시간은 OCR 시간과 따로 출력)
+    corrected, orientation = correct_orientation(pixels)
+    start_time = time.time()
+    ocr_lines = []
+
+    def lines():
+        for line in iter_route_lines(corrected, route, stats, lang=OCR_LANG, deadline=deadline):
+            ocr_lines.append(line)
+            yield line
+
+    for hit in iter_ingredient_hits(lines()):
+        if on_hit is not None:
+            on_hit(hit)
+    ocr_text = "".join(ocr_lines).strip()
+    ocr_seconds = time.time() - start_time
+    print(f"⏱️ 방향 보정 {orientation['seconds']}초, OCR {ocr_seconds:.2f}초")
+    record_route(stats, route, ocr_seconds, ocr_text)
+    if deadline.timed_out_at:
+        # 부분 결과는 캐시하지 않음 (다음에 같은 이미지를 다시 분석하면 처음부터 OCR)
+        increment_metric('ocr.timed_out')
+        return ocr_text, None, deadline.timed_out_at
+    put_cached_ocr(key, ocr_text, build_label_parse(ocr_text))
+    remember_image_hash(image_hash, settings, key, image_thumbnail)
+    return ocr_text, None, None
+
+
+def show_timeout_notice(timed_out):
+    if timed_out:
+        st.warning(f"⏰ 처리 시간 예산({OCR_BUDGET_SECONDS}초)을 넘어 '{timed_out}' 단계에서 중단했습니다. "
+                   "일부 텍스트만 인식되었을 수 있으니 탐지 결과를 그대로 믿지 말고 성분표를 직접 확인하거나 다시 촬영해 주세요.")
+
+
+def show_cache_notice(cache_hit):
+    if cache_hit == 'exact':
+        st.info("⚡ 이전에 분석한 이미지와 같아 저장된 인식 결과를 사용했습니다.")
+    elif cache_hit == 'near_duplicate':
+        st.info("📷 이전에 분석한 이미지와 거의 같아(같은 제품을 다시 촬영한 것으로 판단) 저장된 인식 결과를 사용했습니다. "
+                "다른 제품이라면 각도나 거리를 바꿔 다시 촬영해 주세요.")
+
+
+# 세션에 남겨 둘 최대 작업 수와 진행 중인 작업을 다시 확인하는 간격 (초)
+MAX_KEPT_JOBS = 10
+POLL_SECONDS = 1.0
+
+_STATUS_ICONS = {'queued': "🕒", 'running': "⏳", 'done': "✅", 'error': "❌"}
+
+
+def session_jobs():
+    """
+    현재 세션의 OCR 작업 목록 (마지막이 가장 최근에 제출한 작업)
+    """
+    if 'ocr_jobs' not in st.session_state:
+        st.session_state.ocr_jobs = []
+    return st.session_state.ocr_jobs
+
+
+def _retake_hints():
+    if 'retake_hints' not in st.session_state:
+        st.session_state.retake_hints = {}
+    return st.session_state.retake_hints
+
+
+def start_analysis(image, image_name, text_height, capture_id, override=False):
+    """
+    촬영 품질 검사 후 OCR을 백그라운드 작업으로 제출
+    (품질 검사에서 거부되면 OCR 없이 재촬영 안내만 남김)
+    capture_id: 업로드/촬영 파일 식별자 (상태 갱신으로 화면을 다시 그려도 해당 파일의 안내를 계속 표시)
+    override: 재촬영 안내를 본 사용자가 그래도 분석을 요청한 경우 (품질 검사 거부 무시)
+    """
+    quality = check_quality(image, override=override)
+    if not quality['ok']:
+        _retake_hints()[capture_id] = quality['hint']
+        return
+    _retake_hints().pop(capture_id, None)
+
+    jobs = session_jobs()
+    # 작업 스레드가 찾은 성분을 바로 쌓아 두는 목록 (진행 중 화면에 표시)
+    hits = []
+    jobs.append(submit_job(image_name, run_ocr, image, quality['stats'], hits.append, text_height=text_height, hits=hits))
+    # 너무 많이 쌓이면 오래된 완료 작업부터 정리
+    while len(jobs) > MAX_KEPT_JOBS:
+        finished = next((job for job in jobs if not job.pending), None)
+        if finished is None:
+            break
+        jobs.remove(finished)
+
+
+def show_retake_hint(capture_id, key):
+    """
+    재촬영 안내 표시, 사용자가 그래도 분석하기를 누르면 True
+    """
+    hint = _retake_hints().get(capture_id)
+    if hint:
+        st.warning(f"📸 {hint}")
+        return st.button("그래도 분석하기", key=key)
+    return False
+
+
+def show_early_hits(hits):
+    """
+    OCR이 끝나기 전까지 인식된 줄에서 찾은 알레르기 유발 성분 표시 (등록한 알레르기와의 대조는 분석 완료 후)
+    """
+    if hits:
+        found = ", ".join(hit['allergen'] for hit in list(hits))
+        st.warning(f"⚠️ 지금까지 인식된 알레르기 유발 성분: {found} (분석이 끝나면 등록한 알레르기와 대조한 결과를 표시합니다)")
+
+
+def show_job(job, detect_allergens, calculate_risk_level, display_risk_level, save_analysis_result):
+    """
+    작업 상태/결과 표시
+    (완료된 작업은 처음 표시할 때 한 번만 알레르겐 탐지와 저장을 하고 결과를 작업에 보관해 재실행 시 재사용)
+    """
+    if job.pending:
+        if job.status == 'running':
+            st.info(f"⏳ 이미지를 분석 중입니다... ({job.elapsed}초)")
+            show_early_hits(job.info['hits'])
+        else:
+            st.info("🕒 앞선 분석이 끝나기를 기다리는 중입니다...")
+        return
+    if job.status == 'error':
+        st.error(f"❌ 분석 중 오류가 발생했습니다: {job.error}")
+        return
+
+    if job.analysis is None:
+        ocr_text, cache_hit, timed_out = job.result
+        detected_allergens = detect_allergens(ocr_text)
+        risk_level = calculate_risk_level(detected_allergens)
+        # 결과 저장 (시간 예산을 넘긴 부분 결과는 '안전'으로 남을 수 있어 이력에 저장하지 않음)
+        if not timed_out:
+            save_analysis_result(job.name, ocr_text, detected_allergens, risk_level)
+        job.analysis = (ocr_text, cache_hit, timed_out, detected_allergens, risk_level)
+    ocr_text, cache_hit, timed_out, detected_allergens, risk_level = job.analysis
+
+    # 결과 표시
+    st.success(f"분석이 완료되었습니다! ({job.elapsed}초)")
+    show_cache_notice(cache_hit)
+    show_timeout_notice(timed_out)
+    st.subheader("📝 인식된 텍스트")
+    st.text_area("", value=ocr_text, height=job.info['text_height'], disabled=True, key=f"ocr_text_{job.id}")
+    st.subheader("🚦 위험도 분석")
+    display_risk_level(risk_level)
+    if detected_allergens:
+        st.subheader("⚠️ 탐지된 알레르겐")
+        for allergen in detected_allergens:
+            st.warning(f"• {allergen}")
+    elif timed_out:
+        st.warning("⚠️ 인식된 일부 텍스트에서는 등록된 알레르겐이 탐지되지 않았지만, 안전하다는 뜻은 아닙니다. "
+                   "이 결과는 분석 이력에 저장하지 않았습니다.")
+    else:
+        st.success("✅ 등록된 알레르겐이 탐지되지 않았습니다.")
+
+
+def show_jobs(detect_allergens, calculate_risk_level, display_risk_level, save_analysis_result):
+    """
+    세션의 분석 작업들을 최근 것부터 표시
+    (진행 중인 작업이 있으면 작업 패널만 fragment로 POLL_SECONDS마다 다시 그려 상태 갱신, 페이지 전체는 다시 실행하지 않음)
+    """
+    jobs = session_jobs()
+    if not jobs:
+        return
+    polling = any(job.pending for job in jobs)
+
+    def job_panel():
+        st.subheader("📋 분석 결과")
+        for job in reversed(jobs):
+            with st.expander(f"{_STATUS_ICONS[job.status]} {job.name}", expanded=job is jobs[-1] or job.pending):
+                show_job(job, detect_allergens, calculate_risk_level, display_risk_level, save_analysis_result)
+
+        if any(not job.pending for job in jobs) and st.button("🗑️ 완료된 결과 지우기", key="clear_jobs"):
+            jobs[:] = [job for job in jobs if job.pending]
+            st.rerun()
+
+        # 진행 중이던 작업이 모두 끝나면 페이지 전체를 한 번 다시 그려 주기적 갱신 종료
+        if polling and not any(job.pending for job in jobs):
+            st.rerun()
+
+    st.fragment(job_panel, run_every=POLL_SECONDS if polling else None)()
 
 
 def analysis_page(detect_allergens, calculate_risk_level, display_risk_level, save_analysis_result):
     st.markdown('<div class="sub-header">🔍 성분표 분석</div>', unsafe_allow_html=True)
     tab1, tab2 = st.tabs(["이미지 업로드", "카메라 촬영"])
-    image = None
 
     # ---------------------------
     # 업로드 탭
@@ -22,31 +242,12 @@ def analysis_page(detect_allergens, calculate_risk_level, display_risk_level, sa
             help="식품 성분표가 명확하게 보이는 이미지를 업로드해주세요."
         )
         if uploaded_file is not None:
-            image = Image.open(uploaded_file)
-            st.image(image, caption="성분표 이미지", use_column_width=True)
+            st.image(uploaded_file, caption="성분표 이미지", use_column_width=True)
             analyze_btn = st.button("🔍 성분 분석 시작", key="analyze_upload")
             if analyze_btn:
-                with st.spinner("이미지를 분석 중입니다..."):
-                    ocr_text = ocr_image_with_opencv(image, lang='kor+eng')
-                    detected_allergens = detect_allergens(ocr_text)
-                    risk_level = calculate_risk_level(detected_allergens)
-                    
-                    # 결과 표시
-                    st.success("분석이 완료되었습니다!")
-                    st.subheader("📝 인식된 텍스트")
-                    st.text_area("", value=ocr_text, height=250, disabled=True)
-                    st.subheader("🚦 위험도 분석")
-                    display_risk_level(risk_level)
-                    if detected_allergens:
-                        st.subheader("⚠️ 탐지된 알레르겐")
-                        for allergen in detected_allergens:
-                            st.warning(f"• {allergen}")
-                    else:
-                        st.success("✅ 등록된 알레르겐이 탐지되지 않았습니다.")
-
-                    # 결과 저장
-                    image_name = uploaded_file.name
-                    save_analysis_result(image_name, ocr_text, detected_allergens, risk_level)
+                start_analysis(load_gray(uploaded_file), uploaded_file.name, 250, uploaded_file.file_id)
+            if show_retake_hint(uploaded_file.file_id, key="override_upload"):
+                start_analysis(load_gray(uploaded_file), uploaded_file.name, 250, uploaded_file.file_id, override=True)
 
     # ---------------------------
     # 카메라 탭
@@ -54,28 +255,14 @@ def analysis_page(detect_allergens, calculate_risk_level, display_risk_level, sa
     with tab2:
         camera_image = st.camera_input("카메라로 촬영하기")
         if camera_image is not None:
-            image = Image.open(camera_image)
-            st.image(image, caption="성분표 이미지", use_column_width=True)
+            st.image(camera_image, caption="성분표 이미지", use_column_width=True)
             analyze_btn = st.button("🔍 성분 분석 시작", key="analyze_camera")
             if analyze_btn:
-                with st.spinner("이미지를 분석 중입니다..."):
-                    ocr_text = ocr_image_with_opencv(image, lang='kor+eng')
-                    detected_allergens = detect_allergens(ocr_text)
-                    risk_level = calculate_risk_level(detected_allergens)
-                    
-                    # 결과 표시
-                    st.success("분석이 완료되었습니다!")
-                    st.subheader("📝 인식된 텍스트")
-                    st.text_area("", value=ocr_text, height=150, disabled=True)
-                    st.subheader("🚦 위험도 분석")
-                    display_risk_level(risk_level)
-                    if detected_allergens:
-                        st.subheader("⚠️ 탐지된 알레르겐")
-                        for allergen in detected_allergens:
-                            st.warning(f"• {allergen}")
-                    else:
-                        st.success("✅ 등록된 알레르겐이 탐지되지 않았습니다.")
-
-                    # 결과 저장
-                    image_name = "촬영이미지"
-                    save_analysis_result(image_name, ocr_text, detected_allergens, risk_level)
+                start_analysis(load_gray(camera_image), "촬영이미지", 150, camera_image.file_id)
+            if show_retake_hint(camera_image.file_id, key="override_camera"):
+                start_analysis(load_gray(camera_image), "촬영이미지", 150, camera_image.file_id, override=True)
+
+    # ---------------------------
+    # 분석 결과 (백그라운드 작업)
+    # ---------------------------
+    show_jobs(detect_allergens, calculate_risk_level, display_risk_level, save_analysis_result)
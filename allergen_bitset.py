@@ -0,0 +1,144 @@
+#알레르겐 비트셋 모듈
+#알레르겐마다 비트 번호를 부여해 프로필/성분표 스캔 결과를 비트마스크로 표현
+#여러 성분표 × 여러 프로필 매칭을 AND/popcount 한 번으로 처리
+
+import numpy as np
+
+from allergen_lexicon import ALLERGY_DATABASE
+from allergen_matcher import find_allergen_hits
+from fuzzy_index import find_fuzzy_allergens
+
+# 알레르겐 → 비트 번호 (ALLERGY_DATABASE 등록 순서)
+ALLERGEN_BITS = {name: index for index, name in enumerate(ALLERGY_DATABASE)}
+ALLERGEN_NAMES = tuple(ALLERGEN_BITS)
+
+if len(ALLERGEN_BITS) > 64:
+    raise ValueError("알레르겐 종류가 64개를 넘어 uint64 비트마스크로 표현할 수 없습니다.")
+
+# 바이트 단위 popcount 조회표
+_POPCOUNT_TABLE = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def allergen_mask(allergen_names):
+    """
+    알레르겐 이름 목록을 정수 비트마스크로 변환 (사전에 없는 이름은 무시)
+    """
+    mask = 0
+    for name in allergen_names:
+        bit = ALLERGEN_BITS.get(name)
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def mask_to_allergens(mask):
+    """
+    비트마스크를 알레르겐 이름 목록으로 변환 (비트 번호 순)
+    """
+    mask = int(mask)
+    return [name for name, bit in ALLERGEN_BITS.items() if mask >> bit & 1]
+
+
+def profile_mask(user_allergies):
+    """
+    user_allergies 테이블 행 목록(allergen_name이 두 번째 열)을 비트마스크로 변환
+    """
+    return allergen_mask(row[1] for row in user_allergies)
+
+
+def text_mask(text, fuzzy=False, spans=None):
+    """
+    성분표 텍스트를 한 번 스캔해 탐지된 알레르겐 비트마스크를 반환
+    fuzzy: OCR 오류를 허용하는 퍼지 색인 매칭 포함 여부
+           (성분표에 없는 알레르겐을 보고할 수 있어 - 양고기→닭고기 - 명시적으로 켤 때만 사용)
+    spans: 탐지할 (시작, 끝) 구간 목록 (None이면 전체 텍스트)
+    """
+    mask = allergen_mask(hit[3] for hit in find_allergen_hits(text, ALLERGY_DATABASE, spans))
+    if fuzzy and text:
+        mask |= allergen_mask(find_fuzzy_allergens(text, spans))
+    return mask
+
+
+def _as_mask(value):
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return allergen_mask(value)
+
+
+def to_mask_array(masks_or_names):
+    """
+    비트마스크(정수) 또는 알레르겐 이름 목록들을 uint64 배열로 변환
+    """
+    return np.array([_as_mask(value) for value in masks_or_names], dtype=np.uint64)
+
+
+def text_masks(texts, fuzzy=False):
+    """
+    여러 성분표 텍스트의 비트마스크 배열
+    """
+    return np.array([text_mask(text, fuzzy) for text in texts], dtype=np.uint64)
+
+
+def popcount(masks):
+    """
+    uint64 배열 원소별 켜진 비트 수
+    """
+    masks = np.ascontiguousarray(masks, dtype=np.uint64)
+    as_bytes = masks.view(np.uint8).reshape(masks.shape + (8,))
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+def risk_level_from_count(count):
+    """
+    탐지된 알레르겐 개수로 위험도 계산
+    """
+    if count >= 3:
+        return "high"
+    elif count >= 2:
+        return "medium"
+    elif count >= 1:
+        return "low"
+    return "safe"
+
+
+def risk_levels_from_counts(counts):
+    """
+    개수 배열 전체에 위험도 계산을 한 번에 적용
+    """
+    counts = np.asarray(counts)
+    return np.select(
+        [counts >= 3, counts >= 2, counts >= 1],
+        ["high", "medium", "low"],
+        default="safe"
+    )
+
+
+def match_masks(label_masks, profile_masks):
+    """
+    성분표 비트마스크 배열 × 프로필 비트마스크 배열 매칭
+    반환값: hits(성분표 × 프로필 공통 비트), counts(공통 알레르겐 수)
+    """
+    label_masks = np.asarray(label_masks, dtype=np.uint64)
+    profile_masks = np.asarray(profile_masks, dtype=np.uint64)
+    hits = label_masks[:, None] & profile_masks[None, :]
+    return hits, popcount(hits)
+
+
+def match_batch(texts, profiles):
+    """
+    여러 성분표 텍스트를 여러 프로필과 한 번에 매칭하는 함수
+    texts: 성분표 텍스트 목록
+    profiles: 프로필 비트마스크(정수) 또는 알레르겐 이름 목록들의 목록
+    """
+    label_masks = text_masks(texts)
+    profile_masks = to_mask_array(profiles)
+    hits, counts = match_masks(label_masks, profile_masks)
+
+    return {
+        'text_masks': label_masks,
+        'profile_masks': profile_masks,
+        'hits': hits,
+        'counts': counts,
+        'affected': counts > 0,
+        'risk_levels': risk_levels_from_counts(counts)
+    }
@@ -0,0 +1,281 @@
+#알레르겐 사전 모듈
+#app.py와 ocr_test.py 추출 파이프라인이 함께 쓰는 단일 알레르겐 사전
+#모듈 로드 시 한 번만 조회 구조(용어→대표명 사전, 트라이, 컴파일된 매처)를 만듦
+
+from allergen_matcher import AhoCorasick, Trie, get_synonym_matcher
+
+# 알레르기 데이터베이스 (알레르겐 → 동의어, 성분표 용어는 아래 INGREDIENT_CANONICAL에서 파생해 추가)
+ALLERGY_DATABASE = {
+    "난류": ["계란", "egg", "eggs", "albumen", "ovalbumin", "lecithin"],
+    "우유": ["milk", "lactose", "casein", "whey", "butter", "cheese", "크림"],
+    "메밀": ["buckwheat", "soba"],
+    "땅콩": ["peanut", "peanuts", "arachis"],
+    "대두": ["soy", "soybean", "tofu", "soy sauce", "대두단백", "게맛살"],
+    "밀": ["wheat", "gluten", "flour", "bread", "pasta"],
+    "고등어": ["mackerel", "고등어"],
+    "게": ["crab", "게살"],
+    "새우": ["shrimp", "prawn", "새우"],
+    "돼지고기": ["pork", "pig", "돼지"],
+    "복숭아": ["peach", "복숭아"],
+    "토마토": ["tomato", "토마토"],
+    "호두": ["walnut", "walnuts", "호두"],
+    "닭고기": ["chicken", "닭", "치킨"],
+    "쇠고기": ["beef", "소고기", "소"],
+    "오징어": ["squid", "오징어"],
+    "조개류": ["shellfish", "clam", "cockle", "조개"],
+    "잣": ["pine nut", "잣"],
+    "아황산류": ["sulfite", "sulfur dioxide", "아황산"],
+    "복합조미료": ["MSG", "monosodium glutamate", "조미료"],
+    "카라멜색소": ["caramel color", "카라멜"],
+    "아질산나트륨": ["sodium nitrite", "아질산"]
+}
+
+# 성분표 용어 → 대표 성분명 (식약처 지정 23종 + 관련 재료, 추출 결과에 표시되는 이름)
+# 나열 순서가 find_known_ingredients 결과 순서 (같은 묶음 안에서는 '밀가루'가 '밀'보다 먼저)
+INGREDIENT_CANONICAL = {
+    # 밀 관련 - 밀가루로 통일
+    '밀가루': '밀가루',
+    '밀': '밀가루',
+    '밀글루텐': '밀가루',
+    '밀전분': '밀가루',
+    '밀효소': '밀가루',
+    '밀단백질': '밀가루',
+    
+    # 난류 관련 - 달걀로 통일
+    '달걀': '달걀',
+    '계란': '달걀',
+    '전란액': '달걀',
+    '난황액': '달걀',
+    '난백분': '달걀',
+    '난황분말': '달걀',
+    '난백분말': '달걀',
+    
+    # 우유 관련 - 우유로 통일
+    '우유': '우유',
+    '전지분유': '우유',
+    '탈지분유': '우유',
+    '유크림': '우유',
+    '가공유크림': '우유',
+    '유당': '우유',
+    '유청단백분말': '우유',
+    '혼합분유': '우유',
+    '연유': '우유',
+    '버터': '우유',
+    '마가린': '우유',
+    '치즈': '우유',
+    '요거트': '우유',
+    
+    # 대두 관련 - 대두로 통일
+    '대두': '대두',
+    '콩': '대두',
+    '두부': '대두',
+    '된장': '대두',
+    '간장': '대두',
+    '고추장': '대두',
+    '콩기름': '대두',
+    '대두단백질': '대두',
+    '대두분말': '대두',
+    '대두유': '대두',
+    '식물성단백가수분해물': '대두',
+    
+    # 땅콩 관련 - 땅콩으로 통일
+    '땅콩': '땅콩',
+    '피넛': '땅콩',
+    '땅콩버터': '땅콩',
+    '땅콩오일': '땅콩',
+    '땅콩분말': '땅콩',
+    
+    # 견과류 - 각각 유지
+    '호두': '호두',
+    '잣': '잣',
+    '아몬드': '아몬드',
+    '캐슈넛': '캐슈넛',
+    '피스타치오': '피스타치오',
+    '마카다미아': '마카다미아',
+    
+    # 메밀 관련 - 메밀로 통일
+    '메밀': '메밀',
+    '메밀가루': '메밀',
+    '메밀면': '메밀',
+    
+    # 갑각류 - 각각 유지
+    '새우': '새우',
+    '게': '게',
+    '랍스터': '랍스터',
+    '가재': '가재',
+    '새우분말': '새우',
+    '게분말': '게',
+    
+    # 조개류 - 조개로 통일
+    '조개': '조개',
+    '굴': '조개',
+    '전복': '조개',
+    '홍합': '조개',
+    '바지락': '조개',
+    '관자': '조개',
+    '조개류': '조개',
+    
+    # 어류 - 어류로 통일
+    '고등어': '어류',
+    '연어': '어류',
+    '참치': '어류',
+    '멸치': '어류',
+    '오징어': '어류',
+    '문어': '어류',
+    '어류': '어류',
+    
+    # 육류 - 각각 유지
+    '쇠고기': '쇠고기',
+    '돼지고기': '돼지고기',
+    '닭고기': '닭고기',
+    '양고기': '양고기',
+    '소고기': '쇠고기',
+    '돼지': '돼지고기',
+    
+    # 복숭아 관련 - 복숭아로 통일
+    '복숭아': '복숭아',
+    '복숭아즙': '복숭아',
+    '복숭아향료': '복숭아',
+    
+    # 토마토 관련 - 토마토로 통일
+    '토마토': '토마토',
+    '토마토페이스트': '토마토',
+    '토마토소스': '토마토',
+    '토마토추출물': '토마토',
+    
+    # 아황산류 관련 - 아황산류로 통일
+    '아황산나트륨': '아황산류',
+    '아황산칼륨': '아황산류',
+    '아황산수소나트륨': '아황산류',
+    '아황산류': '아황산류',
+    
+    # 기타 - 각각 유지
+    '카라멜색소': '카라멜색소',
+    '아질산나트륨': '아질산나트륨',
+    '복합조미료': '복합조미료',
+    'MSG': 'MSG',
+    '조미료': '조미료'
+}
+
+# 대표 성분명 중 ALLERGY_DATABASE 알레르겐 이름과 다른 것
+_CANONICAL_ALLERGENS = {
+    '밀가루': '밀',
+    '달걀': '난류',
+    '조개': '조개류',
+    'MSG': '복합조미료',
+    '조미료': '복합조미료'
+}
+
+
+def _ingredient_allergen(term, canonical):
+    # 용어 자체가 알레르겐 이름이면 그대로 ('고등어', '오징어'는 어류로 묶여도 각자의 알레르겐)
+    if term in ALLERGY_DATABASE:
+        return term
+    if canonical in ALLERGY_DATABASE:
+        return canonical
+    return _CANONICAL_ALLERGENS.get(canonical)
+
+
+# 성분표 용어 → ALLERGY_DATABASE 알레르겐 (연어, 아몬드처럼 사전에 없는 재료는 제외)
+INGREDIENT_ALLERGENS = {
+    term: _ingredient_allergen(term, canonical)
+    for term, canonical in INGREDIENT_CANONICAL.items()
+    if _ingredient_allergen(term, canonical)
+}
+
+
+def _with_label_terms(database, allergens):
+    # 알레르겐 이름 자체와 성분표 용어를 동의어로 추가
+    # (앱 탐지와 OCR 추출이 같은 용어를 같은 알레르겐으로 보도록 한 표에서 파생)
+    merged = {name: list(synonyms) for name, synonyms in database.items()}
+    for name, synonyms in merged.items():
+        if name not in synonyms:
+            synonyms.append(name)
+    for term, name in allergens.items():
+        if term not in merged[name]:
+            merged[name].append(term)
+    return merged
+
+
+ALLERGY_DATABASE = _with_label_terms(ALLERGY_DATABASE, INGREDIENT_ALLERGENS)
+
+# 성분표에서 찾는 알레르기 관련 용어 목록 (INGREDIENT_CANONICAL에서 파생)
+KNOWN_INGREDIENTS = tuple(INGREDIENT_CANONICAL)
+KNOWN_INGREDIENT_SET = frozenset(KNOWN_INGREDIENTS)
+
+# 용어별 등록 순서 (탐지 결과 정렬용)
+INGREDIENT_RANK = {term: rank for rank, term in enumerate(KNOWN_INGREDIENTS)}
+
+
+def _build_synonym_index(database):
+    index = {}
+    for allergen_name, synonyms in database.items():
+        for synonym in synonyms:
+            allergens = index.setdefault(synonym.lower(), [])
+            if allergen_name not in allergens:
+                allergens.append(allergen_name)
+    return index
+
+
+# 동의어(소문자) → 알레르겐 목록
+SYNONYM_TO_ALLERGENS = _build_synonym_index(ALLERGY_DATABASE)
+
+# 성분표 용어 트라이 (값: 대표 성분명)
+INGREDIENT_TRIE = Trie(INGREDIENT_CANONICAL.items())
+
+# 성분표 용어 오토마톤 (값: 매칭된 용어) - 텍스트 한 번 스캔으로 모든 용어 탐지
+INGREDIENT_MATCHER = AhoCorasick((term, term) for term in KNOWN_INGREDIENTS)
+
+
+def synonym_matcher():
+    """
+    ALLERGY_DATABASE 동의어 오토마톤 반환 (사전이 바뀐 경우에만 재컴파일)
+    """
+    return get_synonym_matcher(ALLERGY_DATABASE)
+
+
+def find_known_ingredients(text):
+    """
+    텍스트에 출현한 성분표 용어들을 등록 순서대로 반환
+    """
+    if not text:
+        return []
+    return sorted(INGREDIENT_MATCHER.values_in(text), key=INGREDIENT_RANK.__getitem__)
+
+
+def contains_known_ingredient(text):
+    """
+    텍스트에 성분표 용어가 하나라도 포함되어 있는지 확인
+    """
+    return bool(text) and INGREDIENT_MATCHER.contains_any(text)
+
+
+def canonical_ingredient(text):
+    """
+    텍스트에 포함된 용어 중 가장 긴 용어의 대표 성분명 반환 (없으면 None)
+    예: '콩기름' → '콩'이 아닌 '콩기름' 기준, '밀가루' → '밀'이 아닌 '밀가루' 기준
+    """
+    if not text:
+        return None
+    match = INGREDIENT_TRIE.longest_match(text)
+    if match is None:
+        return None
+    return match[2]
+
+
+def iter_ingredient_terms(text, start=0, end=None):
+    """
+    텍스트를 왼쪽부터 한 번 훑으며 겹치지 않는 가장 긴 용어들을 (시작, 끝, 용어, 대표 성분명)으로 생성
+    예: '메밀면' → '밀'이 아닌 '메밀면' 하나만 생성
+    """
+    if end is None:
+        end = len(text)
+    index = start
+    while index < end:
+        match = INGREDIENT_TRIE.longest_prefix(text, index, end)
+        if match is None:
+            index += 1
+            continue
+        length, canonical = match
+        yield index, index + length, text[index:index + length], canonical
+        index += length
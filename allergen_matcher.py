@@ -0,0 +1,267 @@
+#알레르겐 매칭 모듈
+#동의어 사전을 다중 패턴 오토마톤(Aho-Corasick)으로 컴파일해 한 번의 스캔으로 탐지
+
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    다중 패턴 문자열 매칭 오토마톤
+    patterns: (패턴 문자열, 값) 튜플들의 iterable
+    텍스트를 한 번만 훑으면서 등록된 모든 패턴의 출현 위치와 값을 돌려줌
+    (대소문자 정규화는 호출하는 쪽에서 패턴과 텍스트에 동일하게 적용)
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self.pattern_count = 0
+
+        for pattern, value in patterns:
+            if pattern:
+                self._add(pattern, value)
+        self._build()
+
+    def _add(self, pattern, value):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((len(pattern), pattern, value))
+        self.pattern_count += 1
+
+    def _build(self):
+        # BFS로 실패 링크 계산 후, 실패 링크 쪽 출력까지 미리 합쳐 둠
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def iter_matches(self, text, start=0, end=None):
+        """
+        text[start:end] 구간을 복사 없이 한 번 스캔하며 (시작, 끝, 패턴, 값)을 생성
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        if end is None:
+            end = len(text)
+
+        node = 0
+        for index in range(start, end):
+            char = text[index]
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, pattern, value in output[node]:
+                yield index + 1 - length, index + 1, pattern, value
+
+    def find_all(self, text, start=0, end=None):
+        """
+        모든 매칭 결과를 리스트로 반환
+        """
+        return list(self.iter_matches(text, start, end))
+
+    def values_in(self, text, start=0, end=None):
+        """
+        텍스트에 출현한 패턴들의 값 집합을 반환
+        """
+        return {value for _, _, _, value in self.iter_matches(text, start, end)}
+
+    def contains_any(self, text):
+        """
+        등록된 패턴이 하나라도 출현하는지 확인 (첫 매칭에서 바로 종료)
+        """
+        for _ in self.iter_matches(text):
+            return True
+        return False
+
+
+def normalize_text(text):
+    """
+    매칭용 텍스트 정규화 (기존 detect_allergens의 text.lower()와 동일)
+    """
+    return text.lower()
+
+
+def build_synonym_matcher(database):
+    """
+    {알레르겐: [동의어, ...]} 사전을 동의어 → 알레르겐 오토마톤으로 컴파일
+    """
+    return AhoCorasick(
+        (normalize_text(synonym), allergen_name)
+        for allergen_name, synonyms in database.items()
+        for synonym in synonyms
+    )
+
+
+# 사전 내용이 바뀔 때만 다시 컴파일하도록 마지막 결과를 보관
+_matcher_cache = {'signature': None, 'matcher': None}
+
+
+def _database_signature(database):
+    return tuple((name, tuple(synonyms)) for name, synonyms in database.items())
+
+
+def get_synonym_matcher(database):
+    """
+    컴파일된 동의어 오토마톤 반환 (사전이 변경된 경우에만 재컴파일)
+    """
+    signature = _database_signature(database)
+    if _matcher_cache['signature'] != signature:
+        _matcher_cache['matcher'] = build_synonym_matcher(database)
+        _matcher_cache['signature'] = signature
+    return _matcher_cache['matcher']
+
+
+# 이 길이 이하의 동의어('소', '닭', '게', '콩')는 구분자 사이의 단어 전체일 때만 매칭 ('소금', '게맛살' 제외)
+WHOLE_TOKEN_MAX_LENGTH = 1
+
+
+# 영문 동의어 뒤에 붙어도 같은 단어로 보는 복수형 어미 ('tomatoes', 'clams')
+_PLURAL_SUFFIXES = ('es', 's')
+
+
+def is_whole_token(text, start, end):
+    """
+    text[start:end] 앞뒤가 글자/숫자가 아닌지 (쉼표, 괄호, 공백, 텍스트 끝 등) 확인
+    """
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+def _is_latin_letter(char):
+    return char.isascii() and char.isalpha()
+
+
+def is_whole_word(text, start, end):
+    """
+    영문 동의어가 다른 영단어의 일부가 아닌지 확인 ('pig'는 'pigment', 'butter'는 'butterfly' 안에서 제외)
+    한글이 바로 붙은 경우('MSG함유')와 복수형 어미는 허용
+    """
+    if start > 0 and _is_latin_letter(text[start - 1]):
+        return False
+    for suffix in _PLURAL_SUFFIXES:
+        if text.startswith(suffix, end):
+            end += len(suffix)
+            break
+    return end == len(text) or not _is_latin_letter(text[end])
+
+
+def _accept_match(text, match):
+    start, end, pattern, _ = match
+    if pattern.isascii():
+        return is_whole_word(text, start, end)
+    return len(pattern) > WHOLE_TOKEN_MAX_LENGTH or is_whole_token(text, start, end)
+
+
+def longest_matches(matches):
+    """
+    겹치는 매칭 중 왼쪽부터 가장 긴 것만 남김 ('땅콩' 안의 '콩', '땅콩버터' 안의 '버터'는 제외)
+    matches: (시작, 끝, 패턴, 값) 목록
+    """
+    selected = []
+    last_end = 0
+    for match in sorted(matches, key=lambda match: (match[0], match[0] - match[1])):
+        if match[0] >= last_end:
+            selected.append(match)
+            last_end = match[1]
+    return selected
+
+
+def find_allergen_hits(text, database, spans=None):
+    """
+    OCR 텍스트를 한 번 스캔해 동의어 출현과 해당 알레르겐을 반환
+    (겹치면 가장 긴 동의어만, 한 글자 동의어와 영문 동의어는 단어 전체일 때만)
+    spans: 스캔할 (시작, 끝) 구간 목록 (None이면 전체 텍스트)
+    반환값: [(시작, 끝, 동의어, 알레르겐), ...] (정규화된 텍스트 기준 위치)
+    """
+    if not text:
+        return []
+    matcher = get_synonym_matcher(database)
+    normalized = normalize_text(text)
+    if spans is None:
+        spans = [(0, len(normalized))]
+
+    hits = []
+    for start, end in spans:
+        matches = [match for match in matcher.iter_matches(normalized, start, end) if _accept_match(normalized, match)]
+        hits.extend(longest_matches(matches))
+    return hits
+
+
+class Trie:
+    """
+    문자 단위 트라이
+    items: (용어, 값) 튜플들의 iterable
+    """
+
+    _END = object()
+
+    def __init__(self, items=()):
+        self._root = {}
+        self.size = 0
+        for term, value in items:
+            self.insert(term, value)
+
+    def insert(self, term, value):
+        node = self._root
+        for char in term:
+            node = node.setdefault(char, {})
+        if self._END not in node:
+            self.size += 1
+        node[self._END] = value
+
+    def get(self, term, default=None):
+        node = self._root
+        for char in term:
+            node = node.get(char)
+            if node is None:
+                return default
+        return node.get(self._END, default)
+
+    def __contains__(self, term):
+        return self.get(term, self._END) is not self._END
+
+    def longest_prefix(self, text, start=0, end=None):
+        """
+        text[start:end]의 접두사 중 가장 긴 등록 용어를 찾아 (길이, 값) 반환 (없으면 None)
+        """
+        if end is None:
+            end = len(text)
+        node = self._root
+        best = None
+        for index in range(start, end):
+            node = node.get(text[index])
+            if node is None:
+                break
+            if self._END in node:
+                best = (index + 1 - start, node[self._END])
+        return best
+
+    def longest_match(self, text):
+        """
+        텍스트를 왼쪽부터 훑어 포함된 등록 용어 중 가장 긴 것을 찾아 (시작, 길이, 값) 반환
+        길이가 같으면 먼저 나온 용어 우선, 없으면 None
+        """
+        best = None
+        for start in range(len(text)):
+            if best is not None and len(text) - start <= best[1]:
+                break
+            match = self.longest_prefix(text, start)
+            if match is not None and (best is None or match[0] > best[1]):
+                best = (start, match[0], match[1])
+        return best
@@ -11,6 +11,12 @@ import re
 import pytesseract
 import re
 from OCR_UI import analysis_page
+from allergen_lexicon import ALLERGY_DATABASE, synonym_matcher
+from allergen_bitset import ALLERGEN_BITS, match_masks, profile_mask, risk_level_from_count, risk_levels_from_counts
+from label_parse import build_label_parse, dumps_label_parse, label_parse_mask, loads_label_parse
+from ocr_cache import init_ocr_cache
+from tesseract_pool import start_tesseract_pool
+from easyocr_pool import easyocr_available, warm_up_reader_pool
 
 
 # 페이지 설정
@@ -147,38 +153,31 @@ def init_db():
             detected_allergens TEXT,
             risk_level TEXT,
             analysis_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            label_parse TEXT,
             FOREIGN KEY (session_id) REFERENCES users (session_id)
         )
     ''')
     
+    # 기존 DB에 구조화 파싱 결과 컬럼 추가
+    cursor.execute('PRAGMA table_info(analysis_history)')
+    if 'label_parse' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE analysis_history ADD COLUMN label_parse TEXT')
+    
+    # OCR 결과 캐시 테이블
+    init_ocr_cache(cursor)
+    
     conn.commit()
     conn.close()
 
-# 알레르기 데이터베이스
-ALLERGY_DATABASE = {
-    "난류": ["계란", "egg", "eggs", "albumen", "ovalbumin", "lecithin"],
-    "우유": ["milk", "lactose", "casein", "whey", "butter", "cheese", "크림"],
-    "메밀": ["buckwheat", "soba"],
-    "땅콩": ["peanut", "peanuts", "arachis"],
-    "대두": ["soy", "soybean", "tofu", "soy sauce", "대두단백", "게맛살"],
-    "밀": ["wheat", "gluten", "flour", "bread", "pasta"],
-    "고등어": ["mackerel", "고등어"],
-    "게": ["crab", "게살"],
-    "새우": ["shrimp", "prawn", "새우"],
-    "돼지고기": ["pork", "pig", "돼지"],
-    "복숭아": ["peach", "복숭아"],
-    "토마토": ["tomato", "토마토"],
-    "호두": ["walnut", "walnuts", "호두"],
-    "닭고기": ["chicken", "닭", "치킨"],
-    "쇠고기": ["beef", "소고기", "소"],
-    "오징어": ["squid", "오징어"],
-    "조개류": ["shellfish", "clam", "cockle", "조개"],
-    "잣": ["pine nut", "잣"],
-    "아황산류": ["sulfite", "sulfur dioxide", "아황산"],
-    "복합조미료": ["MSG", "monosodium glutamate", "조미료"],
-    "카라멜색소": ["caramel color", "카라멜"],
-    "아질산나트륨": ["sodium nitrite", "아질산"]
-}
+# 시작 시 동의어 오토마톤 미리 컴파일 (사전이 바뀌면 자동 재컴파일)
+synonym_matcher()
+
+# 시작 시 Tesseract 워커 풀 준비 (tesserocr가 없으면 경고만 출력)
+start_tesseract_pool()
+
+# 시작 시 EasyOCR Reader 풀을 백그라운드에서 예열 (첫 분석이 모델 로딩을 기다리지 않도록, 설치된 경우만)
+if easyocr_available():
+    warm_up_reader_pool(background=True)
 
 # 세션 ID 관리
 def get_session_id():
@@ -265,30 +264,30 @@ def detect_allergens(text):
     
     # 사용자 알레르기 정보 가져오기
     user_allergies = get_user_allergies(session_id)
+    if not user_allergies or not text:
+        return detected
+    
+    # 성분표 파싱 결과의 비트마스크와 프로필 비트마스크의 교집합
+    matched_mask = label_parse_mask(build_label_parse(text)) & profile_mask(user_allergies)
     
+    return allergens_in_profile_order(matched_mask, user_allergies)
+
+# 비트마스크를 프로필 등록 순서의 알레르겐 목록으로 변환
+def allergens_in_profile_order(mask, user_allergies):
+    detected = []
     for user_allergen in user_allergies:
         allergen_name = user_allergen[1]
-        if allergen_name in ALLERGY_DATABASE:
-            synonyms = ALLERGY_DATABASE[allergen_name]
-            for synonym in synonyms:
-                if synonym.lower() in text.lower():
-                    detected.append(allergen_name)
-                    break
-    
-    return list(set(detected))
+        bit = ALLERGEN_BITS.get(allergen_name)
+        if bit is not None and int(mask) >> bit & 1 and allergen_name not in detected:
+            detected.append(allergen_name)
+    return detected
 
 # 위험도 계산
 def calculate_risk_level(detected_allergens):
     if not detected_allergens:
         return "safe"
     
-    count = len(detected_allergens)
-    if count >= 3:
-        return "high"
-    elif count >= 2:
-        return "medium"
-    else:
-        return "low"
+    return risk_level_from_count(len(detected_allergens))
 
 # 위험도 표시
 def display_risk_level(risk_level):
@@ -308,19 +307,59 @@ def save_analysis_result(image_name, ocr_text, detected_allergens, risk_level):
     
     cursor.execute('''
         INSERT INTO analysis_history 
-        (session_id, image_name, ocr_text, detected_allergens, risk_level)
-        VALUES (?, ?, ?, ?, ?)
+        (session_id, image_name, ocr_text, detected_allergens, risk_level, label_parse)
+        VALUES (?, ?, ?, ?, ?, ?)
     ''', (
         get_session_id(),
         image_name,
         ocr_text,
         json.dumps(detected_allergens, ensure_ascii=False),
-        risk_level
+        risk_level,
+        dumps_label_parse(build_label_parse(ocr_text))
     ))
     
     conn.commit()
     conn.close()
 
+# 분석 이력 일괄 재채점 (프로필 변경 시 저장된 파싱 결과로 OCR 없이 다시 계산)
+def rescore_analysis_history(session_id):
+    user_allergies = get_user_allergies(session_id)
+    
+    conn = sqlite3.connect('allergy_detector.db')
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, ocr_text, label_parse FROM analysis_history WHERE session_id = ?',
+                   (session_id,))
+    rows = cursor.fetchall()
+    if not rows:
+        conn.close()
+        return 0
+    
+    # 파싱 결과가 없는 예전 이력은 저장된 OCR 텍스트로 파싱을 채워 넣음
+    parses = [loads_label_parse(row[2], row[1]) for row in rows]
+    hits, counts = match_masks(
+        [label_parse_mask(parse) for parse in parses],
+        [profile_mask(user_allergies)]
+    )
+    risk_levels = risk_levels_from_counts(counts[:, 0])
+    
+    cursor.executemany('''
+        UPDATE analysis_history
+        SET detected_allergens = ?, risk_level = ?, label_parse = ?
+        WHERE id = ?
+    ''', [
+        (
+            json.dumps(allergens_in_profile_order(hits[index, 0], user_allergies), ensure_ascii=False),
+            str(risk_levels[index]),
+            dumps_label_parse(parses[index]),
+            row[0]
+        )
+        for index, row in enumerate(rows)
+    ])
+    
+    conn.commit()
+    conn.close()
+    return len(rows)
+
 # 내 프로필 페이지
 def profile_page():
     st.markdown('<div class="sub-header">👤 내 알레르기 프로필</div>', unsafe_allow_html=True)
@@ -342,6 +381,7 @@ def profile_page():
             with col3:
                 if st.button(f"삭제", key=f"delete_{allergy[0]}"):
                     delete_user_allergy(allergy[0])
+                    rescore_analysis_history(session_id)
                     st.rerun()
     else:
         st.info("등록된 알레르기 정보가 없습니다.")
@@ -366,6 +406,7 @@ def profile_page():
     
     if st.button("추가", type="primary"):
         add_user_allergy(session_id, selected_allergen, severity)
+        rescore_analysis_history(session_id)
         st.success(f"{selected_allergen} 알레르기가 추가되었습니다.")
         st.rerun()
 
@@ -373,7 +414,9 @@ def profile_page():
 def get_user_allergies(session_id):
     conn = sqlite3.connect('allergy_detector.db')
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM user_allergies WHERE session_id = ?', (session_id,))
+    # 호출하는 쪽에서 (id, 알레르겐명, 심각도) 순서로 사용
+    cursor.execute('SELECT id, allergen_name, severity FROM user_allergies WHERE session_id = ? ORDER BY id',
+                   (session_id,))
     result = cursor.fetchall()
     conn.close()
     return result
@@ -0,0 +1,59 @@
+#처리 시간 예산(마감) 모듈
+#OCR 시간에는 상한이 없어 이상한 이미지 하나가 워커를 수십 초씩 붙잡으므로
+#분석마다 마감 시각을 정하고, 단계/변형/띠는 시작 전에 남은 시간을 확인해 일찍 멈추며
+#진행 중인 Tesseract 호출에는 남은 시간을 타임아웃으로 넘겨 마감이 지나면 끊음
+
+import time
+
+# 남은 시간이 이보다 적으면 새 OCR 호출을 시작하지 않음 (초)
+MIN_CALL_SECONDS = 0.05
+
+
+class Deadline:
+    """
+    분석 하나의 마감 시각 (seconds가 None이면 마감 없음)
+    마감 때문에 멈춘 첫 단계를 timed_out_at에 기록해, 호출한 쪽이 부분 결과임을 알 수 있게 함
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        self.timed_out_at = None
+
+    def remaining(self):
+        """
+        남은 시간(초), 마감이 없으면 None (Tesseract 호출의 timeout으로 그대로 넘길 수 있음)
+        """
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.expires_at is not None and self.remaining() < MIN_CALL_SECONDS
+
+    def mark(self, stage):
+        """
+        마감 때문에 stage를 건너뛰거나 중단했음을 기록 (처음 멈춘 단계만 남김)
+        """
+        if self.timed_out_at is None:
+            self.timed_out_at = stage
+            print(f"⏰ 처리 시간 예산({self.seconds}초) 초과: '{stage}' 단계에서 중단")
+
+    def timeout(self, stage, error):
+        """
+        stage의 OCR 호출이 TimeoutError로 끝났을 때 호출
+        마감이 지나서 끊긴 것이면 stage를 기록하고, 예산과 무관한 시간 초과(워커 응답 없음 등)면 오류만 출력
+        """
+        if self.expired():
+            self.mark(stage)
+        else:
+            print(f"⚠️ '{stage}' 단계 OCR 시간 초과 (처리 시간 예산과 무관): {error}")
+
+    def skip(self, stage):
+        """
+        마감이 지났으면 stage를 기록하고 True (새 작업을 시작하지 말라는 뜻)
+        """
+        if self.expired():
+            self.mark(stage)
+            return True
+        return False
@@ -0,0 +1,165 @@
+#EasyOCR Reader 풀 모듈
+#Reader(검출/인식 모델)를 프로세스당 한 번만 불러와 더미 이미지로 예열해 두고
+#동시에 들어오는 요청에 하나씩 빌려줌 (요청마다 모델을 다시 불러오는 비용 제거)
+
+import importlib.util
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+# 기본 인식 언어
+DEFAULT_LANGS = ('ko', 'en')
+
+# CPU 모드에서 Reader 하나가 쓰는 코어 수 (풀 크기 계산용) 및 최대 풀 크기
+CORES_PER_READER = 4
+MAX_POOL_SIZE = 4
+
+# Reader를 빌릴 때 기본 대기 시간 (초)
+ACQUIRE_TIMEOUT = 60
+
+
+def easyocr_available():
+    """
+    EasyOCR(와 torch) 설치 여부
+    """
+    return bool(importlib.util.find_spec('easyocr') and importlib.util.find_spec('torch'))
+
+
+def gpu_available():
+    """
+    EasyOCR에서 사용할 수 있는 GPU(MPS/CUDA)가 있는지 확인
+    """
+    try:
+        import torch
+    except ImportError:
+        return False
+    return torch.backends.mps.is_available() or torch.cuda.is_available()
+
+
+def default_pool_size(gpu=None):
+    """
+    사용 가능한 코어 수에 맞춘 기본 풀 크기 (GPU는 장치 메모리를 고려해 1개)
+    """
+    if gpu is None:
+        gpu = gpu_available()
+    if gpu:
+        return 1
+    cores = os.cpu_count() or 1
+    return max(1, min(MAX_POOL_SIZE, cores // CORES_PER_READER))
+
+
+def _warm_up_image():
+    # 검출기와 인식기를 모두 한 번씩 거치도록 글자가 들어간 작은 흰 이미지
+    image = np.full((64, 256, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "milk 100", (8, 44), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    return image
+
+
+class ReaderPool:
+    """
+    EasyOCR Reader 풀
+    langs: 인식 언어 목록
+    size: Reader 개수 (None이면 코어 수에 맞춤)
+    gpu: GPU 사용 여부 (None이면 자동 감지)
+    """
+
+    def __init__(self, langs=DEFAULT_LANGS, size=None, gpu=None):
+        self.langs = list(langs)
+        self.gpu = gpu_available() if gpu is None else gpu
+        self.size = size or default_pool_size(self.gpu)
+        self.ready_seconds = None
+        self._readers = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._warm_up_thread = None
+
+    def _create_reader(self):
+        import easyocr
+        return easyocr.Reader(self.langs, gpu=self.gpu)
+
+    def start(self, warm_up=True):
+        """
+        Reader를 모두 생성하고 예열 (이미 시작했으면 아무것도 하지 않음)
+        반환값: 준비에 걸린 시간(초)
+        """
+        with self._lock:
+            if self._started:
+                return self.ready_seconds
+
+            start_time = time.time()
+            print(f"{'🚀 GPU' if self.gpu else '💻 CPU'} 모드로 EasyOCR Reader {self.size}개 준비 중...")
+            dummy = _warm_up_image() if warm_up else None
+            for _ in range(self.size):
+                reader = self._create_reader()
+                if dummy is not None:
+                    reader.readtext(dummy)
+                self._readers.put(reader)
+
+            self.ready_seconds = round(time.time() - start_time, 2)
+            self._started = True
+            print(f"✅ EasyOCR Reader 준비 완료 ({self.ready_seconds}초)")
+            return self.ready_seconds
+
+    @property
+    def started(self):
+        return self._started
+
+    @contextmanager
+    def reader(self, timeout=ACQUIRE_TIMEOUT):
+        """
+        Reader 하나를 빌려 쓰고 반납하는 컨텍스트 매니저
+        (풀이 시작되지 않았으면 먼저 시작, 모든 Reader가 사용 중이면 반납될 때까지 대기)
+        """
+        if not self._started:
+            self.start()
+        try:
+            reader = self._readers.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"{timeout}초 안에 사용 가능한 EasyOCR Reader가 없습니다.")
+        try:
+            yield reader
+        finally:
+            self._readers.put(reader)
+
+    def readtext(self, image, **kwargs):
+        """
+        풀에서 Reader를 빌려 readtext 수행
+        """
+        with self.reader() as reader:
+            return reader.readtext(image, **kwargs)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_reader_pool(langs=DEFAULT_LANGS):
+    """
+    언어 조합별 프로세스 공용 Reader 풀 (최초 호출 시 한 번만 생성, 시작은 하지 않음)
+    """
+    key = tuple(langs)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ReaderPool(key)
+        return _pools[key]
+
+
+def warm_up_reader_pool(langs=DEFAULT_LANGS, background=False):
+    """
+    시작 시 Reader 풀을 미리 불러와 예열
+    background: True면 별도 스레드에서 준비하고 스레드를 반환 (첫 요청은 준비가 끝날 때까지 대기)
+    Streamlit은 화면을 다시 그릴 때마다 앱 스크립트를 다시 실행하므로, 이미 준비 중이면 그 스레드를 그대로 반환
+    """
+    pool = get_reader_pool(langs)
+    if not background:
+        return pool.start()
+    with _pools_lock:
+        if pool._warm_up_thread is None:
+            pool._warm_up_thread = threading.Thread(target=pool.start, name="easyocr-warm-up", daemon=True)
+            pool._warm_up_thread.start()
+        return pool._warm_up_thread
@@ -0,0 +1,248 @@
+#이미지 품질 기반 OCR 엔진/모드 선택 모듈
+#축소 이미지에서 몇 ms 안에 흐림(라플라시안 분산), 대비, 글자 픽셀 밀도, 해상도를 재고
+#성공할 가능성이 높은 것 중 가장 저렴한 OCR 경로를 고름
+#(선택 근거와 결과는 route_log 테이블에 남겨 임계값 조정에 사용)
+
+import sqlite3
+import time
+
+import cv2
+import numpy as np
+
+from easyocr_pool import easyocr_available
+from image_ingest import load_gray
+from metrics import DB_PATH, increment_metric
+
+# 비용이 낮은 순서의 OCR 경로
+#  basic: 고정 임계값 대신 이미지별 Otsu 임계값으로 이진화 후 Tesseract (ocr_utils)
+#  fast: 히스토그램 균등화 + Otsu 이진화 후 Tesseract
+#  cascade: CLAHE/적응형 이진화 등 정밀 전처리를 포함한 Tesseract 신뢰도 캐스케이드 (ocr_test)
+#  easyocr: EasyOCR 신뢰도 캐스케이드 (ocr_test)
+ROUTES = ('basic', 'fast', 'cascade', 'easyocr')
+
+# 통계를 계산할 축소 이미지의 긴 변 길이 (임계값도 이 크기 기준)
+STATS_MAX_SIDE = 640
+
+# 라플라시안 분산이 BLUR_MIN 미만이면 심하게 흐림, BLUR_SHARP 이상이면 선명
+BLUR_MIN = 150.0
+BLUR_SHARP = 600.0
+
+# 밝기 표준편차가 이 값 미만이면 대비가 낮음
+CONTRAST_MIN = 40.0
+
+# 이진화했을 때 글자(어두운) 픽셀 비율이 이 범위를 벗어나면 배경이 고르지 않거나 반전된 것으로 봄
+DENSITY_RANGE = (0.02, 0.45)
+
+# 긴 변이 이보다 작으면 글자가 작아 Tesseract가 잘 읽지 못함
+SMALL_SIDE = 700
+
+# 이 밝기 이상이면 포화(하얗게 날아간) 픽셀
+SATURATED_LEVEL = 250
+
+# 글자 높이를 추정하려면 필요한 최소 글자 덩어리 수
+MIN_TEXT_COMPONENTS = 20
+
+# 글자 기준 흐림은 글자 높이가 이 픽셀 수가 되도록 크기를 맞춘 뒤 측정
+# (해상도/글자 크기와 관계없이 글자 높이 대비 번진 정도만 비교되도록)
+TEXT_BLUR_HEIGHT = 16
+
+# 빛 반사로 볼 포화 영역: 경계 상자를 이 비율 이상 채운 뭉친 덩어리이고, 상자 가운데 절반에 글자 픽셀이 이 비율 미만
+# (글자가 인쇄된 흰 판은 가운데에 글자가 있어 제외됨)
+GLARE_MIN_FILL = 0.5
+GLARE_MAX_INK = 0.01
+
+
+def image_stats(image):
+    """
+    OCR 경로 선택용 이미지 통계
+    반환값: {'blur', 'contrast', 'brightness', 'density', 'threshold'(Otsu 임계값), 'long_side',
+            'saturated'(포화 픽셀 비율), 'glare'(글자 영역 안 가장 큰 반사 덩어리 비율),
+            'text_height'(원본 기준 글자 높이 중앙값, 추정 불가면 None),
+            'text_blur'(글자 높이를 맞춘 뒤 잰 흐림, 추정 불가면 None), 'ms'(계산 시간)}
+    """
+    start_time = time.perf_counter()
+    gray = load_gray(image)
+    height, width = gray.shape[:2]
+    scale = min(1.0, STATS_MAX_SIDE / max(height, width))
+    small = gray
+    if scale < 1.0:
+        small = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+    # 대비가 낮으면 라플라시안 분산도 같이 작아지므로 밝기 범위를 0~255로 늘린 뒤 흐림 측정
+    # (센서 노이즈가 선명한 것처럼 보이지 않도록 3x3 중앙값 필터를 먼저 적용)
+    stretched = cv2.normalize(cv2.medianBlur(small, 3), None, 0, 255, cv2.NORM_MINMAX)
+    blur = cv2.Laplacian(stretched, cv2.CV_64F).var()
+    mean, stddev = cv2.meanStdDev(small)
+    threshold, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    density = cv2.countNonZero(binary) / binary.size
+
+    # 글자 높이: 글자 크기쯤 되는 어두운 덩어리들의 높이 중앙값을 원본 크기로 환산
+    text_height = None
+    text_blur = None
+    _, _, components, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    components = components[1:]
+    is_text = ((components[:, cv2.CC_STAT_HEIGHT] >= 2) & (components[:, cv2.CC_STAT_HEIGHT] < small.shape[0] * 0.2)
+               & (components[:, cv2.CC_STAT_AREA] >= 3))
+    text_components = components[is_text]
+    if len(text_components) >= MIN_TEXT_COMPONENTS:
+        text_height = round(float(np.median(text_components[:, cv2.CC_STAT_HEIGHT])) / scale, 1)
+        text_blur = _text_blur(gray, text_height)
+
+    # 빛 반사: 포화 픽셀이 글자 영역 안에서 글자를 지운 채 뭉친 덩어리의 크기
+    _, saturated = cv2.threshold(small, SATURATED_LEVEL - 1, 255, cv2.THRESH_BINARY)
+    saturated_fraction = cv2.countNonZero(saturated) / saturated.size
+    glare = 0.0
+    if saturated_fraction and len(text_components):
+        glare = _glare_fraction(saturated, binary, text_components)
+
+    return {
+        'blur': round(float(blur), 1),
+        'contrast': round(float(stddev[0][0]), 1),
+        'brightness': round(float(mean[0][0]), 1),
+        'density': round(density, 3),
+        'threshold': int(threshold),
+        'long_side': max(height, width),
+        'saturated': round(saturated_fraction, 3),
+        'glare': round(float(glare), 3),
+        'text_height': text_height,
+        'text_blur': text_blur,
+        'ms': round((time.perf_counter() - start_time) * 1000, 1)
+    }
+
+
+def _text_blur(gray, text_height):
+    # 글자 높이가 TEXT_BLUR_HEIGHT가 되도록 크기를 맞춘 뒤 라플라시안 분산 (확대는 2배까지만)
+    scale = min(2.0, TEXT_BLUR_HEIGHT / text_height)
+    resized = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR)
+    stretched = cv2.normalize(cv2.medianBlur(resized, 3), None, 0, 255, cv2.NORM_MINMAX)
+    return round(float(cv2.Laplacian(stretched, cv2.CV_64F).var()), 1)
+
+
+def _glare_fraction(saturated, binary, text_components):
+    # 뭉쳐 있고 가운데에 글자 픽셀이 없는 포화 덩어리 중, 글자 덩어리들이 차지한 범위 안에 든 부분이 가장 큰 것의 비율
+    # (글자가 인쇄된 흰 판이나 글자 영역 밖의 흰 여백은 반사로 보지 않음)
+    left = text_components[:, cv2.CC_STAT_LEFT].min()
+    top = text_components[:, cv2.CC_STAT_TOP].min()
+    right = (text_components[:, cv2.CC_STAT_LEFT] + text_components[:, cv2.CC_STAT_WIDTH]).max()
+    bottom = (text_components[:, cv2.CC_STAT_TOP] + text_components[:, cv2.CC_STAT_HEIGHT]).max()
+
+    glare = 0
+    _, labels, blobs, _ = cv2.connectedComponentsWithStats(saturated, connectivity=8)
+    text_labels = labels[top:bottom, left:right]
+    for label, (x, y, w, h, area) in enumerate(blobs[1:], 1):
+        if area <= glare or area < GLARE_MIN_FILL * w * h:
+            continue
+        center = binary[y + h // 4:y + h - h // 4, x + w // 4:x + w - w // 4]
+        if not center.size or cv2.countNonZero(center) >= GLARE_MAX_INK * center.size:
+            continue
+        glare = max(glare, int(np.count_nonzero(text_labels == label)))
+    return glare / saturated.size
+
+
+def available_routes():
+    """
+    이 환경에서 쓸 수 있는 OCR 경로 (ocr_test는 EasyOCR/torch가 설치돼 있어야 불러올 수 있음)
+    """
+    if easyocr_available():
+        return ROUTES
+    return ('basic', 'fast')
+
+
+def choose_route(stats, allowed=None):
+    """
+    통계로 필요한 최소 경로를 정하고, 허용된 경로 중 그 이상에서 가장 저렴한 것을 선택
+    반환값: (경로, 선택 이유)
+    """
+    allowed = allowed or available_routes()
+    if stats['blur'] < BLUR_MIN or stats['long_side'] < SMALL_SIDE:
+        needed, reason = 'easyocr', "흐리거나 해상도가 낮음"
+    elif stats['blur'] < BLUR_SHARP or not DENSITY_RANGE[0] <= stats['density'] <= DENSITY_RANGE[1]:
+        needed, reason = 'cascade', "약간 흐리거나 배경이 고르지 않음"
+    elif stats['contrast'] < CONTRAST_MIN:
+        needed, reason = 'fast', "대비가 낮음"
+    else:
+        needed, reason = 'basic', "선명하고 대비가 충분함"
+
+    candidates = [route for route in ROUTES[ROUTES.index(needed):] if route in allowed]
+    if candidates:
+        return candidates[0], reason
+    # 필요한 경로를 쓸 수 없으면 허용된 것 중 가장 강한 경로
+    route = max(allowed, key=ROUTES.index)
+    return route, f"{reason} ({needed} 사용 불가)"
+
+
+def route_image(image, allowed=None, stats=None):
+    """
+    이미지를 그레이스케일로 읽어 통계를 재고 OCR 경로를 선택 (선택 결과는 출력하고 지표에 누적)
+    stats: 이미 계산한 image_stats 결과 (품질 검사에서 잰 것을 다시 계산하지 않도록)
+    반환값: (그레이스케일 이미지, 통계, 경로, 선택 이유)
+    """
+    gray = load_gray(image)
+    if stats is None:
+        stats = image_stats(gray)
+    route, reason = choose_route(stats, allowed)
+    print(f"🧭 OCR 경로 '{route}' 선택 - {reason} (흐림 {stats['blur']}, 대비 {stats['contrast']}, "
+          f"글자 밀도 {stats['density']}, 긴 변 {stats['long_side']}px, {stats['ms']}ms)")
+    increment_metric(f'router.{route}')
+    return gray, stats, route, reason
+
+
+def iter_route_lines(gray, route, stats, lang="kor+eng", deadline=None):
+    """
+    선택한 경로로 OCR하며 텍스트를 줄 단위(끝에 줄바꿈 포함)로 생성
+    basic/fast 경로의 타일 OCR은 띠가 끝날 때마다 줄이 나오고, 캐스케이드 경로는 끝난 뒤 한 번에 나옴
+    deadline: 처리 시간 예산 (마감이 지나면 부분 텍스트까지만, 멈춘 단계는 deadline.timed_out_at)
+    """
+    if route == 'basic':
+        from ocr_utils import iter_ocr_lines
+        yield from iter_ocr_lines(gray, lang=lang, threshold=stats['threshold'], deadline=deadline)
+        return
+    if route == 'fast':
+        from ocr_utils import iter_ocr_lines
+        yield from iter_ocr_lines(gray, lang=lang, threshold=None, equalize=True, deadline=deadline)
+        return
+
+    from ocr_test import ocr_with_cascade
+    yield from ocr_with_cascade(gray, use_easyocr=(route == 'easyocr'), deadline=deadline)['text'].splitlines(True)
+
+
+def run_route(gray, route, stats, lang="kor+eng", deadline=None):
+    """
+    선택한 경로로 OCR 수행 후 텍스트 반환
+    """
+    return "".join(iter_route_lines(gray, route, stats, lang, deadline)).strip()
+
+
+def init_route_log(cursor):
+    """
+    경로 선택 기록 테이블 생성
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS route_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            route TEXT NOT NULL,
+            blur REAL,
+            contrast REAL,
+            density REAL,
+            long_side INTEGER,
+            ocr_seconds REAL,
+            text_length INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def record_route(stats, route, ocr_seconds, text, db_path=DB_PATH):
+    """
+    선택한 경로와 통계, OCR 소요 시간, 인식된 글자 수를 기록 (벤치마크 이미지와 비교해 임계값 조정용)
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    init_route_log(cursor)
+    cursor.execute('''
+        INSERT INTO route_log (route, blur, contrast, density, long_side, ocr_seconds, text_length)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (route, stats['blur'], stats['contrast'], stats['density'], stats['long_side'],
+          round(ocr_seconds, 3), len(text or "")))
+    conn.commit()
+    conn.close()
@@ -0,0 +1,244 @@
+#OCR 오류 허용 퍼지 동의어 색인
+#SymSpell 방식(삭제 변형 사전)으로 편집 거리 이내 후보를 무차별 비교 없이 조회
+
+import re
+
+from allergen_lexicon import ALLERGY_DATABASE, KNOWN_INGREDIENTS
+from hangul_jamo import JamoIndex
+
+# 문자 체계별 허용 편집 거리: (최소 용어 길이, 허용 거리) 단계
+# 용어 길이가 첫 단계보다 짧으면 정확히 일치할 때만 매칭
+# (영문은 짧은 용어일수록 거리 1 안에 일반 단어가 많아 - reach→peach, paste→pasta, broad→bread - 7자 이상부터 허용)
+FUZZY_THRESHOLDS = {
+    'hangul': ((3, 1),),
+    'latin': ((7, 1), (10, 2)),
+}
+
+# 한 번에 이어 붙여 볼 최대 단어 수 ("밀 가루", "peanu t" 같은 띄어쓰기 오류 대응)
+MAX_WINDOW_WORDS = 3
+
+# 조회 비용 상한을 위한 최대 질의 길이
+MAX_QUERY_LENGTH = 24
+
+_HANGUL_RE = re.compile(r'[가-힣ㄱ-ㅎㅏ-ㅣ]')
+_WORD_RE = re.compile(r'[0-9A-Za-z가-힣]+')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def script_of(text):
+    """
+    텍스트의 문자 체계 판별 ('hangul' 또는 'latin')
+    """
+    return 'hangul' if _HANGUL_RE.search(text) else 'latin'
+
+
+def normalize_token(text):
+    """
+    퍼지 매칭용 정규화 (소문자 + 공백 제거)
+    """
+    return _SPACE_RE.sub('', text.lower())
+
+
+def max_distance_for(term, thresholds=FUZZY_THRESHOLDS):
+    """
+    용어 길이와 문자 체계에 따른 허용 편집 거리
+    """
+    distance = 0
+    for min_length, allowed in thresholds[script_of(term)]:
+        if len(term) >= min_length:
+            distance = allowed
+    return distance
+
+
+def _deletes(word, max_distance):
+    # 최대 max_distance개 문자를 지운 모든 변형 (원본 포함)
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for candidate in frontier:
+            for index in range(len(candidate)):
+                next_frontier.add(candidate[:index] + candidate[index + 1:])
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+def edit_distance(a, b, max_distance):
+    """
+    인접 문자 교환을 포함한 편집 거리 (max_distance 초과 시 max_distance + 1 반환)
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        # 교환 연산이 두 행 전 값을 참조하므로 두 행 모두 상한을 넘을 때만 조기 종료
+        if min(current) > max_distance and min(previous) >= max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+class FuzzySynonymIndex:
+    """
+    삭제 변형 기반 퍼지 색인
+    items: (용어, 값) 튜플들의 iterable
+    thresholds: 문자 체계별 허용 편집 거리 설정
+    """
+
+    def __init__(self, items, thresholds=FUZZY_THRESHOLDS):
+        self.thresholds = thresholds
+        self._terms = {}
+        self._deletes = {}
+
+        for term, value in items:
+            key = normalize_token(term)
+            if not key:
+                continue
+            self._terms.setdefault(key, [])
+            if value not in self._terms[key]:
+                self._terms[key].append(value)
+
+        self._max_distance = {}
+        for key in self._terms:
+            distance = max_distance_for(key, thresholds)
+            self._max_distance[key] = distance
+            for variant in _deletes(key, distance):
+                self._deletes.setdefault(variant, set()).add(key)
+
+        # 한글 용어는 자모 단위 색인으로 한 번 더 색인 (자모 하나 차이의 OCR 오류 대응)
+        self._jamo = JamoIndex((key, value) for key, values in self._terms.items()
+                               if script_of(key) == 'hangul' for value in values)
+
+        self._script_distance = {
+            script: max((allowed for _, allowed in steps), default=0)
+            for script, steps in thresholds.items()
+        }
+
+    def __len__(self):
+        return len(self._terms)
+
+    def lookup(self, token):
+        """
+        토큰과 허용 편집 거리 이내인 용어 중 가장 가까운 것들을 [(용어, 값, 거리), ...]로 반환
+        (정확히 일치하는 용어가 있으면 그 용어만, 한글은 자모 혼동 비용 매칭을 우선)
+        """
+        query = normalize_token(token)
+        if not query or len(query) > MAX_QUERY_LENGTH:
+            return []
+
+        exact = self._terms.get(query)
+        if exact is not None:
+            return [(query, value, 0) for value in exact]
+
+        script = script_of(query)
+        if script == 'hangul':
+            jamo_results = self._jamo.lookup(query)
+            if jamo_results:
+                return jamo_results
+
+        query_distance = self._script_distance.get(script, 0)
+
+        candidates = set()
+        for variant in _deletes(query, query_distance):
+            candidates |= self._deletes.get(variant, set())
+
+        results = []
+        best = query_distance + 1
+        for key in candidates:
+            allowed = min(self._max_distance[key], query_distance, best)
+            if allowed == 0:
+                continue
+            distance = edit_distance(query, key, allowed)
+            if distance > allowed:
+                continue
+            if distance < best:
+                best = distance
+                results = []
+            results.extend((key, value, distance) for value in self._terms[key])
+        return results
+
+    def find_in_text(self, text, max_window_words=MAX_WINDOW_WORDS, start=0, end=None):
+        """
+        텍스트의 단어와 이어 붙인 단어 묶음을 조회해 [(시작, 끝, 용어, 값, 거리), ...] 반환
+        start, end: 조회할 구간 (단어 묶음은 구간을 넘어가지 않음)
+        """
+        if not text:
+            return []
+        if end is None:
+            end = len(text)
+
+        words = [(match.start(), match.end(), match.group()) for match in _WORD_RE.finditer(text, start, end)]
+        hits = []
+        for index in range(len(words)):
+            joined = ''
+            for offset in range(max_window_words):
+                if index + offset >= len(words):
+                    break
+                joined += words[index + offset][2]
+                if len(joined) > MAX_QUERY_LENGTH:
+                    break
+                for term, value, distance in self.lookup(joined):
+                    hits.append((words[index][0], words[index + offset][1], term, value, distance))
+        return hits
+
+
+_indexes = {}
+
+
+def synonym_index():
+    """
+    ALLERGY_DATABASE 동의어 퍼지 색인 (값: 알레르겐, 최초 사용 시 한 번만 생성)
+    """
+    if 'synonyms' not in _indexes:
+        _indexes['synonyms'] = FuzzySynonymIndex(
+            (synonym, allergen_name)
+            for allergen_name, synonyms in ALLERGY_DATABASE.items()
+            for synonym in synonyms
+        )
+    return _indexes['synonyms']
+
+
+def ingredient_index():
+    """
+    성분표 용어 퍼지 색인 (값: 사전에 등록된 용어, 최초 사용 시 한 번만 생성)
+    """
+    if 'ingredients' not in _indexes:
+        _indexes['ingredients'] = FuzzySynonymIndex((term, term) for term in KNOWN_INGREDIENTS)
+    return _indexes['ingredients']
+
+
+def find_fuzzy_allergens(text, spans=None):
+    """
+    OCR 오류를 허용해 텍스트에서 알레르겐 목록을 찾는 함수
+    spans: 조회할 (시작, 끝) 구간 목록 (None이면 전체 텍스트)
+    """
+    if spans is None:
+        spans = [(0, len(text or ""))]
+
+    index = synonym_index()
+    found = []
+    for start, end in spans:
+        for _, _, _, allergen_name, _ in index.find_in_text(text, start=start, end=end):
+            if allergen_name not in found:
+                found.append(allergen_name)
+    return found
+
+
+def find_fuzzy_ingredients(text):
+    """
+    OCR 오류를 허용해 텍스트에서 성분표 용어 목록을 찾는 함수
+    """
+    found = []
+    for _, _, _, term, _ in ingredient_index().find_in_text(text):
+        if term not in found:
+            found.append(term)
+    return found
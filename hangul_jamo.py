@@ -0,0 +1,124 @@
+#한글 자모 분해 매칭 모듈
+#OCR이 음절 전체가 아니라 자모 하나를 잘못 읽는 경우(고코아매스↔코코아매스, 팡에스테르화유↔팜에스테르화유)를
+#자모 단위 색인과 혼동 비용표로 보정
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = ("", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ",
+             "ㄿ", "ㅀ", "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ")
+
+# OCR에서 자주 혼동되는 자모 쌍과 대체 비용 (기본 대체/삽입/삭제 비용은 1)
+JAMO_CONFUSIONS = {
+    ("ㄱ", "ㅋ"): 0.3, ("ㄷ", "ㅌ"): 0.3, ("ㅂ", "ㅍ"): 0.4, ("ㅈ", "ㅊ"): 0.3,
+    ("ㅁ", "ㅇ"): 0.4, ("ㅇ", "ㅎ"): 0.4, ("ㄴ", "ㄷ"): 0.5, ("ㄹ", "ㄷ"): 0.5,
+    ("ㄱ", "ㄲ"): 0.4, ("ㄷ", "ㄸ"): 0.4, ("ㅂ", "ㅃ"): 0.4, ("ㅅ", "ㅆ"): 0.4, ("ㅈ", "ㅉ"): 0.4,
+    ("ㅏ", "ㅑ"): 0.3, ("ㅓ", "ㅕ"): 0.3, ("ㅗ", "ㅛ"): 0.3, ("ㅜ", "ㅠ"): 0.3,
+    ("ㅐ", "ㅔ"): 0.3, ("ㅒ", "ㅖ"): 0.3, ("ㅐ", "ㅒ"): 0.4, ("ㅔ", "ㅖ"): 0.4,
+    ("ㅏ", "ㅐ"): 0.5, ("ㅓ", "ㅔ"): 0.5, ("ㅡ", "ㅜ"): 0.5, ("ㅡ", "ㅗ"): 0.5,
+}
+
+# 양방향 조회용으로 미리 펼친 혼동 비용표
+CONFUSION_COST = dict(JAMO_CONFUSIONS)
+CONFUSION_COST.update({(right, left): cost for (left, right), cost in JAMO_CONFUSIONS.items()})
+
+# 허용 비용 (혼동 자모 하나 정도만 허용) 및 자모 매칭 최소 음절 수
+# (2음절 용어는 자모 하나 차이의 일반 단어가 많아 - 그림↔크림 - 정확히 일치할 때만 매칭)
+JAMO_MAX_COST = 0.5
+JAMO_MIN_SYLLABLES = 3
+
+# 음절 → 자모 문자열 변환표 (str.translate 한 번으로 분해)
+_DECOMPOSE_TABLE = {
+    0xAC00 + index: CHOSEONG[index // 588] + JUNGSEONG[index % 588 // 28] + JONGSEONG[index % 28]
+    for index in range(11172)
+}
+
+
+def decompose(text):
+    """
+    한글 음절을 자모 문자열로 분해 (한글 외 문자는 그대로 유지)
+    """
+    return text.translate(_DECOMPOSE_TABLE)
+
+
+def syllable_count(text):
+    """
+    완성형 한글 음절 수
+    """
+    return sum(1 for char in text if 0xAC00 <= ord(char) <= 0xD7A3)
+
+
+def jamo_distance(a, b, max_cost=JAMO_MAX_COST):
+    """
+    혼동 비용표를 반영한 자모 단위 편집 거리 (max_cost 초과 시 조기 종료하고 inf 반환)
+    """
+    if abs(len(a) - len(b)) > max_cost:
+        return float('inf')
+
+    previous = [float(j) for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [float(i)] + [0.0] * len(b)
+        char_a = a[i - 1]
+        for j in range(1, len(b) + 1):
+            char_b = b[j - 1]
+            if char_a == char_b:
+                substitution = 0.0
+            else:
+                substitution = CONFUSION_COST.get((char_a, char_b), 1.0)
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + substitution)
+        if min(current) > max_cost:
+            return float('inf')
+        previous = current
+    return previous[-1] if previous[-1] <= max_cost else float('inf')
+
+
+def _single_deletes(word):
+    return {word} | {word[:index] + word[index + 1:] for index in range(len(word))}
+
+
+class JamoIndex:
+    """
+    자모 단위 색인 (자모 하나 삭제 변형 사전 + 혼동 비용 검증)
+    items: (용어, 값) 튜플들의 iterable
+    """
+
+    def __init__(self, items, max_cost=JAMO_MAX_COST, min_syllables=JAMO_MIN_SYLLABLES):
+        self.max_cost = max_cost
+        self._terms = {}
+        self._deletes = {}
+
+        for term, value in items:
+            if syllable_count(term) < min_syllables:
+                continue
+            jamo = decompose(term)
+            entry = self._terms.setdefault(jamo, (term, []))
+            if value not in entry[1]:
+                entry[1].append(value)
+
+        for jamo in self._terms:
+            for variant in _single_deletes(jamo):
+                self._deletes.setdefault(variant, set()).add(jamo)
+
+    def __len__(self):
+        return len(self._terms)
+
+    def lookup(self, token):
+        """
+        자모 혼동 비용 이내의 가장 가까운 용어들을 [(용어, 값, 비용), ...]로 반환
+        """
+        query = decompose(token)
+        candidates = set()
+        for variant in _single_deletes(query):
+            candidates |= self._deletes.get(variant, set())
+
+        results = []
+        best = self.max_cost
+        for jamo in candidates:
+            cost = jamo_distance(query, jamo, best)
+            if cost > best:
+                continue
+            if cost < best:
+                best = cost
+                results = [item for item in results if item[2] <= cost]
+            term, values = self._terms[jamo]
+            results.extend((term, value, cost) for value in values)
+        return results
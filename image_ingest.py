@@ -0,0 +1,101 @@
+#이미지 입력 모듈
+#업로드된 파일을 PIL로 열고 RGB 배열 → BGR → 그레이스케일로 변환하면 전체 크기 복사가 세 번 일어나므로
+#업로드 바이트를 cv2.imdecode로 바로 그레이스케일 배열로 디코딩
+#(아주 큰 사진은 디코더가 1/2, 1/4, 1/8 크기로 바로 줄여서 디코딩)
+
+import io
+import os
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# 축소 디코딩 후에도 긴 변이 이 값 이상 남을 때만 줄여서 디코딩 (작은 글씨가 뭉개지지 않도록)
+DECODE_MIN_SIDE = 2400
+
+# 축소 배율별 디코딩 플래그 (큰 배율부터)
+_REDUCED_GRAYSCALE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+)
+
+
+def _image_size(data):
+    # 헤더만 읽어 (너비, 높이) 확인 (픽셀은 디코딩하지 않음), 알 수 없으면 None
+    try:
+        with Image.open(io.BytesIO(data)) as header:
+            return header.size
+    except Exception:
+        return None
+
+
+def _decode_flag(size, min_side):
+    if size is None or not min_side:
+        return cv2.IMREAD_GRAYSCALE
+    long_side = max(size)
+    for factor, flag in _REDUCED_GRAYSCALE_FLAGS:
+        if long_side / factor >= min_side:
+            print(f"📉 큰 이미지({size[0]}x{size[1]})를 1/{factor} 크기로 디코딩")
+            return flag
+    return cv2.IMREAD_GRAYSCALE
+
+
+def decode_gray(data, min_side=DECODE_MIN_SIDE):
+    """
+    인코딩된 이미지 바이트(JPEG/PNG 등)를 그레이스케일 uint8 배열로 디코딩
+    min_side: 축소 디코딩 후에도 긴 변이 이 값 이상이면 줄여서 디코딩 (None이면 항상 원본 크기)
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    gray = cv2.imdecode(buffer, _decode_flag(_image_size(data), min_side))
+    if gray is None:
+        raise ValueError("이미지를 디코딩할 수 없습니다")
+    return gray
+
+
+def _read_bytes(image):
+    # 파일 경로, 바이트, 업로드 파일(Streamlit UploadedFile 등 파일 객체)에서 인코딩된 바이트를 꺼냄
+    if isinstance(image, (str, os.PathLike)):
+        # cv2.imread는 한글 경로를 못 여는 환경이 있어 바이트로 읽어 디코딩
+        return np.fromfile(image, dtype=np.uint8)
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return image
+    if hasattr(image, 'getvalue'):
+        return image.getvalue()
+    if hasattr(image, 'read'):
+        return image.read()
+    return None
+
+
+def load_gray(image, min_side=DECODE_MIN_SIDE):
+    """
+    그레이스케일/BGR 배열, PIL.Image, 파일 경로, 이미지 바이트 또는 업로드 파일을 그레이스케일 배열로 변환
+    (그레이스케일 배열은 복사 없이 그대로 반환)
+    """
+    if isinstance(image, np.ndarray):
+        if image.ndim == 2:
+            return image
+        if image.shape[2] == 4:
+            return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if isinstance(image, Image.Image):
+        # RGBA, 팔레트(P) 이미지도 convert('L')로 한 번에 그레이스케일 변환
+        return np.asarray(image.convert('L'))
+
+    data = _read_bytes(image)
+    if data is None:
+        raise TypeError(f"지원하지 않는 이미지 형식입니다: {type(image).__name__}")
+    return decode_gray(data, min_side)
+
+
+def load_image(image, min_side=DECODE_MIN_SIDE):
+    """
+    OCR 입력 배열로 변환 (배열은 그대로, PIL.Image는 BGR, 파일 경로/바이트/업로드 파일은 그레이스케일로 바로 디코딩)
+    """
+    if isinstance(image, np.ndarray):
+        return image
+    if isinstance(image, Image.Image):
+        if image.mode == 'L':
+            return np.asarray(image)
+        return cv2.cvtColor(np.asarray(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+    return load_gray(image, min_side)
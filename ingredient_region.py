@@ -0,0 +1,151 @@
+#성분표 원재료명 영역 찾기 모듈
+#포장 그림/영양정보 표/바코드까지 전부 고해상도 OCR을 돌리지 않도록
+#축소 이미지를 한 번 가볍게 OCR해 '원재료명'/'Ingredients' 머리말 위치를 찾고 그 블록만 잘라냄
+#(머리말을 찾지 못하면 전체 이미지를 그대로 사용)
+
+import re
+
+import cv2
+
+import tesseract_pool
+from allergen_lexicon import contains_known_ingredient
+
+# 위치 탐색용 축소 이미지의 긴 변 길이
+LOCATE_MAX_SIDE = 960
+
+# 원재료명 블록 시작/끝을 알리는 머리말
+# (끝 머리말은 단어 앞부분에서만 찾음 - '영양강화밀가루' 같은 원재료 이름 안의 '영양'으로 블록이 끊기지 않도록)
+ANCHOR_RE = re.compile(r'원재료|(?<!영양)성분|ingredient', re.IGNORECASE)
+STOP_RE = re.compile(r'영양|열량|제조원|판매원|내용량|보관|소비기한|유통기한|nutrition', re.IGNORECASE)
+
+# 끝 머리말 뒤에 붙는 짧은 말과 콜론 ('보관방법:', '영양정보 :' 등)
+_STOP_COLON_RE = re.compile(r'[가-힣A-Za-z]{0,4}\s*[:：]')
+
+# 잘라낸 영역이 전체의 이 비율보다 작으면 잘못 찾은 것으로 보고 전체 이미지 사용
+MIN_REGION_FRACTION = 0.02
+
+
+def _to_gray(image):
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def _easyocr_words(image):
+    from easyocr_pool import get_reader_pool
+
+    words = []
+    for bbox, text, confidence in get_reader_pool(['ko', 'en']).readtext(image):
+        xs = [point[0] for point in bbox]
+        ys = [point[1] for point in bbox]
+        words.append((text, confidence * 100, (int(min(xs)), int(min(ys)), int(max(xs) - min(xs)), int(max(ys) - min(ys)))))
+    return words
+
+
+def _tesseract_words(image, timeout=None):
+    # 축소 이미지에서 흩어진 글자를 찾는 모드(--psm 11)로 한 번만 OCR
+    _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return tesseract_pool.image_to_words(binary, lang="kor+eng", config="--psm 11 --oem 3", timeout=timeout)
+
+
+def _is_stop_header(word, words, anchor):
+    """
+    단어가 다음 항목의 머리말인지 판단
+    끝 머리말로 시작하면서 바로 뒤에 콜론이 있거나,
+    원재료명 머리말과 같은 왼쪽 머리말 열에서 줄을 시작하고 알려진 원재료를 포함하지 않을 때만 머리말로 봄
+    """
+    text, _, (x, y, w, h) = word
+    match = STOP_RE.match(text)
+    if match is None:
+        return False
+    if _STOP_COLON_RE.match(text, match.end()):
+        return True
+
+    anchor_x, _, _, anchor_h = anchor[2]
+    if abs(x - anchor_x) > anchor_h or contains_known_ingredient(text):
+        return False
+    # 같은 줄에서 이 단어보다 왼쪽에 다른 단어가 있으면 줄 중간의 단어
+    return not any(other is not word and abs(other[2][1] - y) <= h // 2 and other[2][0] < x for other in words)
+
+
+def find_region_in_words(words, width, height):
+    """
+    단어 위치 목록에서 원재료명 블록 영역을 추정
+    words: [(단어, 신뢰도, (x, y, 너비, 높이)), ...]
+    반환값: (x, y, 너비, 높이) 또는 None (머리말이 없거나 블록 끝을 확실히 알 수 없음)
+    """
+    words = sorted(words, key=lambda word: (word[2][1], word[2][0]))
+    anchor = next((word for word in words if ANCHOR_RE.search(word[0])), None)
+    if anchor is None:
+        return None
+
+    anchor_x, anchor_y, _, anchor_h = anchor[2]
+    line_slack = anchor_h // 2
+
+    # 머리말 아래에서 처음 나오는 다른 항목(영양정보, 제조원 등) 머리말 직전까지를 블록으로 봄
+    # 끝 머리말을 찾지 못하면 원재료를 잘라낼 수 있으므로 영역을 정하지 않음 (전체 이미지 사용)
+    bottom = None
+    for word in words:
+        if word[2][1] > anchor_y + line_slack and _is_stop_header(word, words, anchor):
+            bottom = word[2][1]
+            break
+    if bottom is None:
+        return None
+
+    # 머리말 줄부터 블록 끝까지, 머리말보다 오른쪽에서 시작하는 단어들의 범위
+    right = anchor_x
+    last = anchor_y + anchor_h
+    for text, _, (x, y, w, h) in words:
+        if anchor_y - line_slack <= y < bottom and x + w > anchor_x - anchor_h:
+            right = max(right, x + w)
+            last = max(last, y + h)
+
+    padding = anchor_h
+    left = max(0, anchor_x - padding)
+    top = max(0, anchor_y - padding)
+    right = min(width, right + padding)
+    bottom = min(height, min(bottom, last + padding))
+    if right <= left or bottom <= top:
+        return None
+    return left, top, right - left, bottom - top
+
+
+def locate_ingredient_region(image, use_easyocr=False, timeout=None):
+    """
+    원본 해상도 기준 원재료명 블록 영역 (x, y, 너비, 높이), 찾지 못하면 None
+    timeout: Tesseract 탐색 OCR 제한 시간(초) - 넘으면 찾지 못한 것으로 처리
+    """
+    height, width = image.shape[:2]
+    scale = min(1.0, LOCATE_MAX_SIDE / max(height, width))
+    small = _to_gray(image)
+    if scale < 1.0:
+        small = cv2.resize(small, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+    try:
+        words = _easyocr_words(small) if use_easyocr else _tesseract_words(small, timeout)
+    except Exception as e:
+        print(f"원재료명 영역 탐색 오류: {e}")
+        return None
+
+    region = find_region_in_words(words, small.shape[1], small.shape[0])
+    if region is None:
+        return None
+
+    x, y, w, h = (int(round(value / scale)) for value in region)
+    if w * h < MIN_REGION_FRACTION * width * height:
+        return None
+    return x, y, min(w, width - x), min(h, height - y)
+
+
+def crop_ingredient_region(image, use_easyocr=False, timeout=None):
+    """
+    원재료명 블록만 잘라낸 이미지와 영역을 반환 (찾지 못하면 전체 이미지와 None)
+    """
+    region = locate_ingredient_region(image, use_easyocr, timeout)
+    if region is None:
+        print("📐 원재료명 영역을 찾지 못해 전체 이미지 사용")
+        return image, None
+
+    x, y, w, h = region
+    print(f"📐 원재료명 영역: {region} (전체의 {w * h / (image.shape[0] * image.shape[1]):.0%})")
+    return image[y:y + h, x:x + w], region
@@ -0,0 +1,93 @@
+#스트리밍 원재료명 추출 모듈
+#OCR 줄이 나오는 대로(타일 OCR은 띠 하나가 끝날 때마다) 알레르기 유발 성분을 찾아
+#전체 OCR이 끝나기 전에 첫 성분을 보여줄 수 있게 함
+
+import re
+
+from allergen_lexicon import iter_ingredient_terms
+from label_segmenter import INGREDIENT_HEADER_RE
+
+# 원재료명 섹션 시작은 label_segmenter와 같은 머리말 규칙 ("영양성분:"은 제외), 끝은 새 항목 머리말
+_STREAM_SECTION_END_RE = re.compile(r'[가-힣]+:')
+
+
+class IngredientStream:
+    """
+    OCR 결과를 줄/단어 단위로 받아 알레르기 유발 성분을 점진적으로 찾는 추출기
+    전체 텍스트를 기다리지 않고, 줄이 완성될 때마다 새로 발견된 성분을 돌려줌
+    """
+
+    def __init__(self):
+        self.in_section = False
+        self.section_seen = False
+        self.line_number = 0
+        self.found = []
+        self._buffer = ""
+
+    def feed(self, chunk):
+        """
+        OCR 텍스트 조각(줄 또는 단어)을 추가하고 완성된 줄에서 새 성분 목록 반환
+        """
+        self._buffer += chunk
+        hits = []
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            hits.extend(self._process_line(line))
+        return hits
+
+    def close(self):
+        """
+        남은 텍스트를 처리하고 새 성분 목록 반환
+        """
+        line, self._buffer = self._buffer, ""
+        return self._process_line(line) if line else []
+
+    def _process_line(self, line):
+        self.line_number += 1
+        stripped = line.strip()
+        
+        # 빈 줄 또는 새 항목("제조원:" 등)이 나오면 원재료명 섹션 종료
+        if not stripped:
+            self.in_section = False
+            return []
+        
+        body_start = 0
+        header = INGREDIENT_HEADER_RE.search(line)
+        if header:
+            self.in_section = True
+            self.section_seen = True
+            body_start = header.end()
+        elif self.in_section and _STREAM_SECTION_END_RE.match(stripped):
+            self.in_section = False
+        
+        hits = []
+        for _, _, term, allergen in iter_ingredient_terms(line, body_start):
+            if allergen in self.found:
+                continue
+            self.found.append(allergen)
+            hits.append({
+                'allergen': allergen,
+                'term': term,
+                'line': self.line_number,
+                'in_section': self.in_section
+            })
+        return hits
+
+
+def iter_ingredient_hits(chunks):
+    """
+    OCR 줄/단어 스트림에서 알레르기 유발 성분을 발견 즉시 하나씩 생성하는 제너레이터
+    chunks: OCR 텍스트 조각들의 iterable (줄 단위라면 끝에 줄바꿈 포함)
+    """
+    stream = IngredientStream()
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.close()
+
+
+def iter_text_lines(text):
+    """
+    완성된 OCR 텍스트를 줄 단위 스트림으로 변환 (iter_ingredient_hits 입력용)
+    """
+    for line in text.splitlines(True):
+        yield line
@@ -0,0 +1,98 @@
+#성분표 구조화 파싱 모듈
+#OCR 텍스트를 원재료명 섹션, 토큰, 알레르겐 탐지 결과, 함유/혼입 가능 표시로 정리해
+#분석 이력과 함께 저장하고, 프로필이 바뀌면 OCR 없이 재채점하는 데 사용
+
+import json
+import re
+
+from allergen_bitset import allergen_mask, mask_to_allergens, text_mask
+from allergen_lexicon import ALLERGY_DATABASE
+from allergen_matcher import find_allergen_hits
+from label_segmenter import detection_spans, ingredient_section_span, segment_label
+
+# 저장 형식 버전 (형식이 바뀌면 올려서 이전 파싱을 다시 생성)
+LABEL_PARSE_VERSION = 3
+
+_TOKEN_SPLIT_RE = re.compile(r'[,，()\[\]{}\n]')
+_SENTENCE_SPLIT_RE = re.compile(r'[.。\n]')
+_CONTAINS_RE = re.compile(r'함유')
+_MAY_CONTAIN_RE = re.compile(r'혼입\s*가능|같은\s*제조\s*시설|동일\s*(?:제조\s*)?시설')
+
+
+def _declared_allergens(sentence):
+    # 알레르겐 이름 자체('우유 함유')도 동의어로 등록되어 있어 탐지와 같은 매처 사용
+    found = {hit[3] for hit in find_allergen_hits(sentence, ALLERGY_DATABASE)}
+    return [name for name in ALLERGY_DATABASE if name in found]
+
+
+def parse_declarations(text):
+    """
+    '○○ 함유', '○○을 사용한 제품과 같은 제조시설에서 제조(혼입 가능)' 문구를 찾아 알레르겐별로 정리
+    """
+    contains = []
+    may_contain = []
+    for sentence in _SENTENCE_SPLIT_RE.split(text):
+        if _MAY_CONTAIN_RE.search(sentence):
+            target = may_contain
+        elif _CONTAINS_RE.search(sentence):
+            target = contains
+        else:
+            continue
+        for name in _declared_allergens(sentence):
+            if name not in target:
+                target.append(name)
+    return {'contains': contains, 'may_contain': may_contain}
+
+
+def build_label_parse(ocr_text, fuzzy=False):
+    """
+    OCR 텍스트로부터 저장용 구조화 파싱 결과 생성
+    fuzzy: OCR 오류를 허용하는 퍼지 매칭으로도 알레르겐 탐지 (기본은 정확히 일치하는 동의어만)
+    """
+    ocr_text = ocr_text or ""
+
+    # 구역을 한 번만 나눠 원재료명 본문과 탐지 구간에 함께 사용 (영양정보/제조원 구역은 탐지 제외)
+    sections = segment_label(ocr_text)
+    span = ingredient_section_span(ocr_text, sections)
+    section = ocr_text[span[0]:span[1]].strip() if span else ""
+
+    tokens = [token.strip() for token in _TOKEN_SPLIT_RE.split(section or ocr_text)]
+    tokens = [token for token in tokens if token]
+
+    return {
+        'version': LABEL_PARSE_VERSION,
+        'section': section,
+        'tokens': tokens,
+        'allergens': mask_to_allergens(text_mask(ocr_text, fuzzy, detection_spans(ocr_text, sections))),
+        'declarations': parse_declarations(ocr_text),
+        'sections': [[kind, start, end] for kind, start, end in sections]
+    }
+
+
+def label_parse_mask(parse):
+    """
+    파싱 결과에서 위험도 계산에 쓰는 알레르겐 비트마스크 (탐지 결과 + '함유' 표시)
+    """
+    declarations = parse.get('declarations', {})
+    return allergen_mask(parse.get('allergens', [])) | allergen_mask(declarations.get('contains', []))
+
+
+def dumps_label_parse(parse):
+    """
+    파싱 결과를 DB 저장용 JSON 문자열로 변환
+    """
+    return json.dumps(parse, ensure_ascii=False, separators=(',', ':'))
+
+
+def loads_label_parse(data, ocr_text=None):
+    """
+    저장된 파싱 결과를 읽되, 없거나 버전이 다르면 저장된 OCR 텍스트로 다시 생성
+    """
+    if data:
+        try:
+            parse = json.loads(data)
+        except ValueError:
+            parse = None
+        if isinstance(parse, dict) and parse.get('version') == LABEL_PARSE_VERSION:
+            return parse
+    return build_label_parse(ocr_text)
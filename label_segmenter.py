@@ -0,0 +1,119 @@
+#성분표 구역 분할 모듈
+#find_ingredient_section의 머리말 규칙을 바탕으로 성분표를 한 번 훑어 구역별로 나누고
+#원문 위치(offset)만 돌려줘 탐지/표시가 텍스트 복사 없이 구간을 다루도록 함
+
+import re
+from collections import namedtuple
+
+# 구역 종류
+INGREDIENTS = 'ingredients'
+ALLERGEN_DECLARATION = 'allergen_declaration'
+CROSS_CONTAMINATION = 'cross_contamination'
+NUTRITION = 'nutrition'
+MANUFACTURER = 'manufacturer'
+OTHER = 'other'
+
+# 알레르겐 탐지 대상 구역
+DETECTION_KINDS = (INGREDIENTS, ALLERGEN_DECLARATION, CROSS_CONTAMINATION)
+
+Section = namedtuple('Section', ['kind', 'start', 'end'])
+
+# 원재료명 머리말 ("원재료명:", "원재료:", "성분:", "Ingredients:" - "영양성분:"은 제외)
+INGREDIENT_HEADER_RE = re.compile(r'(?:원재료명?|(?<!영양)성분명?|ingredients?)\s*[:：]', re.IGNORECASE)
+
+# 줄 분류 규칙 (위에서부터 우선 적용)
+_LINE_RULES = [
+    (CROSS_CONTAMINATION, re.compile(r'같은\s*제조\s*시설|동일\s*(?:제조\s*)?시설|혼입\s*(?:될\s*)?가능')),
+    (INGREDIENTS, INGREDIENT_HEADER_RE),
+    (ALLERGEN_DECLARATION, re.compile(r'함유|알레르기\s*유발|allergen', re.IGNORECASE)),
+    (NUTRITION, re.compile(r'영양\s*(?:정보|성분)|nutrition|열량|kcal|탄수화물|콜레스테롤|포화지방|트랜스지방|1일\s*영양', re.IGNORECASE)),
+    (MANUFACTURER, re.compile(r'제조원|판매원|제조사|수입원|유통전문|업소명|소재지|반품|교환|고객\s*(?:센터|상담)|부정\s*불량|1399|소비자\s*기본법')),
+]
+
+# 원재료명 섹션을 끝내는 새 항목 머리말 (예: "제조원:", "내용량:")
+_FIELD_HEADER_RE = re.compile(r'\s*[가-힣]+\s*[:：]')
+_NON_SPACE_RE = re.compile(r'\S')
+
+
+def _classify_line(text, start, end):
+    for kind, pattern in _LINE_RULES:
+        if pattern.search(text, start, end):
+            return kind
+    return None
+
+
+def segment_label(text):
+    """
+    성분표 텍스트를 한 번 훑어 [Section(종류, 시작, 끝), ...]으로 분할
+    같은 종류의 연속된 줄은 하나의 구역으로 합침
+    """
+    sections = []
+    if not text:
+        return sections
+
+    current = OTHER
+    position = 0
+    length = len(text)
+    while position < length:
+        line_end = text.find('\n', position)
+        if line_end == -1:
+            line_end = length
+        next_position = line_end + 1
+
+        if not _NON_SPACE_RE.search(text, position, line_end):
+            # 빈 줄은 진행 중인 구역을 끝냄
+            current = OTHER
+            position = next_position
+            continue
+
+        kind = _classify_line(text, position, line_end)
+        if kind is None:
+            if current == INGREDIENTS and _FIELD_HEADER_RE.match(text, position, line_end):
+                kind = OTHER
+            else:
+                # 머리말 없는 줄은 이전 구역에 이어 붙임 (여러 줄에 걸친 원재료명 등)
+                kind = current
+        current = kind
+
+        if sections and sections[-1].kind == kind and sections[-1].end >= position - 1:
+            sections[-1] = Section(kind, sections[-1].start, line_end)
+        else:
+            sections.append(Section(kind, position, line_end))
+        position = next_position
+
+    return sections
+
+
+def sections_of(sections, kinds):
+    """
+    지정한 종류의 구역만 골라냄
+    """
+    return [section for section in sections if section.kind in kinds]
+
+
+def detection_spans(text, sections=None):
+    """
+    알레르겐 탐지를 수행할 (시작, 끝) 구간 목록
+    원재료명 구역을 찾지 못하면 전체 텍스트를 대상으로 함
+    """
+    if sections is None:
+        sections = segment_label(text)
+    if not any(section.kind == INGREDIENTS for section in sections):
+        return [(0, len(text))]
+    return [(section.start, section.end) for section in sections_of(sections, DETECTION_KINDS)]
+
+
+def ingredient_section_span(text, sections=None):
+    """
+    첫 원재료명 구역의 본문 구간 (머리말 제외), 없으면 None
+    """
+    if sections is None:
+        sections = segment_label(text)
+    for section in sections:
+        if section.kind == INGREDIENTS:
+            header = INGREDIENT_HEADER_RE.search(text, section.start, section.end)
+            start = header.end() if header else section.start
+            while start < section.end and text[start].isspace():
+                start += 1
+            return start, section.end
+    return None
@@ -0,0 +1,53 @@
+#처리 지표 카운터 모듈
+#OCR 캐시 적중/미스 등 여러 Streamlit 세션과 프로세스가 함께 쓰는 카운터를 SQLite에 누적
+
+import sqlite3
+
+DB_PATH = 'allergy_detector.db'
+
+
+def init_metrics(cursor):
+    """
+    지표 테이블 생성
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS metrics (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+
+def increment(cursor, name, amount=1):
+    """
+    이미 열린 연결의 커서로 카운터 증가 (호출한 쪽에서 commit)
+    """
+    cursor.execute('''
+        INSERT INTO metrics (name, value) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+    ''', (name, amount))
+
+
+def increment_metric(name, amount=1, db_path=DB_PATH):
+    """
+    카운터 하나를 증가시키고 바로 저장
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    init_metrics(cursor)
+    increment(cursor, name, amount)
+    conn.commit()
+    conn.close()
+
+
+def get_metrics(prefix="", db_path=DB_PATH):
+    """
+    prefix로 시작하는 카운터들을 {이름: 값}으로 반환
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    init_metrics(cursor)
+    cursor.execute('SELECT name, value FROM metrics WHERE name LIKE ? ORDER BY name', (prefix + '%',))
+    result = dict(cursor.fetchall())
+    conn.close()
+    return result
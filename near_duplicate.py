@@ -0,0 +1,192 @@
+#근사 중복 이미지 조회 모듈
+#카메라로 같은 제품을 다시 찍으면 바이트 단위로는 절대 같지 않아 정확 일치 캐시가 놓치므로
+#분석한 이미지마다 dHash(차이 해시)를 저장하고 BK-트리로 해밍 거리 임계값 이내의 이미지를 찾은 뒤,
+#축소 이미지를 픽셀 단위로 한 번 더 비교해 글자가 다르지 않을 때만 결과를 재사용
+#(해시 테이블은 모든 사용자가 공유하므로, 배치가 비슷한 다른 제품의 결과를 재사용하면 알레르겐을 놓침)
+
+import sqlite3
+import threading
+
+import cv2
+import numpy as np
+
+from metrics import DB_PATH
+
+# dHash 크기 (HASH_SIZE x HASH_SIZE 비트) 및 후보로 볼 최대 해밍 거리
+HASH_SIZE = 16
+NEAR_DUPLICATE_DISTANCE = 8
+
+# 확인용 축소 이미지 너비, 밝기 차이가 이보다 큰 픽셀을 다른 픽셀로 보고, 그런 픽셀이 이 수보다 많으면 다른 이미지
+# (다시 저장/크기 변경/밝기 변화는 0개, 성분 단어 하나만 바뀌어도 100개 이상)
+THUMBNAIL_WIDTH = 512
+THUMBNAIL_QUALITY = 90
+THUMBNAIL_DIFF_LEVEL = 60
+MAX_DIFF_PIXELS = 30
+
+
+def init_image_hashes(cursor):
+    """
+    이미지 해시 테이블 생성
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS image_hashes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            image_hash TEXT NOT NULL,
+            settings TEXT NOT NULL,
+            cache_key TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            thumbnail BLOB
+        )
+    ''')
+    
+    # 기존 DB에 확인용 축소 이미지 컬럼 추가 (없는 행은 근사 중복으로 재사용하지 않음)
+    cursor.execute('PRAGMA table_info(image_hashes)')
+    if 'thumbnail' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE image_hashes ADD COLUMN thumbnail BLOB')
+
+
+def _to_gray(pixels):
+    pixels = np.asarray(pixels)
+    if pixels.ndim == 2:
+        return pixels
+    if pixels.shape[2] == 4:
+        return cv2.cvtColor(pixels, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY)
+
+
+def dhash(pixels, hash_size=HASH_SIZE):
+    """
+    차이 해시: (hash_size+1) x hash_size로 줄인 뒤 가로로 이웃한 픽셀의 밝기 비교 결과를 비트로 모은 정수
+    """
+    small = cv2.resize(_to_gray(pixels), (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(''.join('1' if bit else '0' for bit in bits), 2)
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def thumbnail(pixels, width=THUMBNAIL_WIDTH):
+    """
+    픽셀 비교용 그레이스케일 축소 이미지 (JPEG 바이트, DB 저장용)
+    """
+    gray = _to_gray(pixels)
+    height = max(1, round(gray.shape[0] * width / gray.shape[1]))
+    small = cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+    return cv2.imencode('.jpg', small, [cv2.IMWRITE_JPEG_QUALITY, THUMBNAIL_QUALITY])[1].tobytes()
+
+
+def same_content(thumbnail_a, thumbnail_b):
+    """
+    두 축소 이미지에서 밝기가 크게 다른 픽셀이 MAX_DIFF_PIXELS개 이하인지 확인
+    """
+    a = cv2.imdecode(np.frombuffer(thumbnail_a, np.uint8), cv2.IMREAD_GRAYSCALE)
+    b = cv2.imdecode(np.frombuffer(thumbnail_b, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if a is None or b is None or a.shape != b.shape:
+        return False
+    diff = cv2.absdiff(cv2.GaussianBlur(a, (3, 3), 0), cv2.GaussianBlur(b, (3, 3), 0))
+    return int(np.count_nonzero(diff > THUMBNAIL_DIFF_LEVEL)) <= MAX_DIFF_PIXELS
+
+
+class BKTree:
+    """
+    해밍 거리 BK-트리 (임계값 이내 해시를 전체 비교 없이 조회)
+    """
+
+    def __init__(self):
+        self._root = None
+        self.size = 0
+
+    def add(self, image_hash, value):
+        node = (image_hash, value, {})
+        self.size += 1
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            distance = hamming_distance(image_hash, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, image_hash, max_distance):
+        """
+        max_distance 이내의 [(거리, 해시, 값), ...]를 거리 순으로 반환
+        """
+        results = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node_hash, value, children = stack.pop()
+            distance = hamming_distance(image_hash, node_hash)
+            if distance <= max_distance:
+                results.append((distance, node_hash, value))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        results.sort(key=lambda result: result[0])
+        return results
+
+
+_trees = {}
+_trees_lock = threading.Lock()
+
+
+def _tree_for(settings, db_path):
+    # OCR 설정별 BK-트리 (프로세스에서 처음 쓸 때 DB에 저장된 해시로 한 번 생성)
+    key = (db_path, settings)
+    tree = _trees.get(key)
+    if tree is None:
+        tree = BKTree()
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        init_image_hashes(cursor)
+        cursor.execute('SELECT id, image_hash, cache_key FROM image_hashes WHERE settings = ? ORDER BY id', (settings,))
+        for row_id, image_hash, cache_key in cursor.fetchall():
+            tree.add(int(image_hash, 16), (row_id, cache_key))
+        conn.close()
+        _trees[key] = tree
+    return tree
+
+
+def _stored_thumbnail(row_id, db_path):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('SELECT thumbnail FROM image_hashes WHERE id = ?', (row_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def find_near_duplicate(image_hash, settings, image_thumbnail, max_distance=NEAR_DUPLICATE_DISTANCE, db_path=DB_PATH):
+    """
+    같은 OCR 설정으로 분석한 이미지 중 해시가 가깝고 축소 이미지 비교로도 같은 것의 (캐시 키, 해밍 거리), 없으면 None
+    image_thumbnail: thumbnail()로 만든 현재 이미지의 축소 이미지
+    """
+    with _trees_lock:
+        matches = _tree_for(settings, db_path).search(image_hash, max_distance)
+    for distance, _, (row_id, cache_key) in matches:
+        stored = _stored_thumbnail(row_id, db_path)
+        if stored is not None and same_content(image_thumbnail, stored):
+            return cache_key, distance
+    return None
+
+
+def remember_image_hash(image_hash, settings, cache_key, image_thumbnail, db_path=DB_PATH):
+    """
+    분석한 이미지의 해시와 확인용 축소 이미지를 저장하고 조회용 트리에 추가
+    """
+    with _trees_lock:
+        # 트리를 먼저 불러와야 방금 저장한 해시가 두 번 들어가지 않음
+        tree = _tree_for(settings, db_path)
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute('INSERT INTO image_hashes (image_hash, settings, cache_key, thumbnail) VALUES (?, ?, ?, ?)',
+                       (format(image_hash, 'x'), settings, cache_key, image_thumbnail))
+        row_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        tree.add(image_hash, (row_id, cache_key))
@@ -0,0 +1,125 @@
+#OCR 결과 캐시 모듈
+#같은 성분표 이미지가 반복해서 올라오므로, 디코딩된 픽셀 + 엔진/모드/언어 설정의 해시를 키로
+#OCR 텍스트와 구조화 파싱 결과를 SQLite에 저장하고 크기 한도를 넘으면 오래 안 쓴 것부터 삭제(LRU)
+
+import hashlib
+import json
+import sqlite3
+import time
+
+import numpy as np
+
+from metrics import DB_PATH, get_metrics, increment, init_metrics
+from near_duplicate import init_image_hashes
+
+# 캐시에 저장할 OCR 텍스트 + 파싱 결과의 최대 총 크기 (바이트)
+MAX_CACHE_BYTES = 20 * 1024 * 1024
+
+
+def init_ocr_cache(cursor):
+    """
+    OCR 캐시 테이블 생성
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ocr_cache (
+            cache_key TEXT PRIMARY KEY,
+            ocr_text TEXT,
+            label_parse TEXT,
+            size INTEGER NOT NULL,
+            last_used REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_used ON ocr_cache (last_used)')
+    init_image_hashes(cursor)
+    init_metrics(cursor)
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path)
+    init_ocr_cache(conn.cursor())
+    return conn
+
+
+def cache_key(pixels, engine, mode, lang):
+    """
+    디코딩된 픽셀 배열과 OCR 설정으로 만든 캐시 키 (같은 그림이면 파일 형식/메타데이터와 무관하게 같은 키)
+    """
+    pixels = np.ascontiguousarray(pixels)
+    digest = hashlib.sha256()
+    digest.update(f"{engine}|{mode}|{lang}|{pixels.shape}|{pixels.dtype.str}|".encode())
+    digest.update(memoryview(pixels).cast('B'))
+    return digest.hexdigest()
+
+
+def get_cached_ocr(key, db_path=DB_PATH):
+    """
+    캐시된 (OCR 텍스트, 파싱 결과 JSON 문자열)을 반환하고 최근 사용 시각 갱신, 없으면 None
+    """
+    conn = _connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('SELECT ocr_text, label_parse FROM ocr_cache WHERE cache_key = ?', (key,))
+    row = cursor.fetchone()
+    if row is None:
+        increment(cursor, 'ocr_cache.misses')
+    else:
+        cursor.execute('UPDATE ocr_cache SET last_used = ? WHERE cache_key = ?', (time.time(), key))
+        increment(cursor, 'ocr_cache.hits')
+    conn.commit()
+    conn.close()
+    return row
+
+
+def put_cached_ocr(key, ocr_text, label_parse, db_path=DB_PATH, max_bytes=MAX_CACHE_BYTES):
+    """
+    OCR 결과를 캐시에 저장하고, 총 크기가 max_bytes를 넘으면 오래 안 쓴 항목부터 삭제
+    label_parse: 구조화 파싱 결과 (dict 또는 JSON 문자열)
+    """
+    if not isinstance(label_parse, str):
+        label_parse = json.dumps(label_parse, ensure_ascii=False, separators=(',', ':'))
+    size = len((ocr_text or "").encode()) + len(label_parse.encode())
+
+    conn = _connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT OR REPLACE INTO ocr_cache (cache_key, ocr_text, label_parse, size, last_used)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (key, ocr_text, label_parse, size, time.time()))
+
+    cursor.execute('SELECT COALESCE(SUM(size), 0) FROM ocr_cache')
+    total = cursor.fetchone()[0]
+    if total > max_bytes:
+        cursor.execute('SELECT cache_key, size FROM ocr_cache ORDER BY last_used')
+        evicted = []
+        for old_key, old_size in cursor.fetchall():
+            if total <= max_bytes or old_key == key:
+                break
+            evicted.append((old_key,))
+            total -= old_size
+        cursor.executemany('DELETE FROM ocr_cache WHERE cache_key = ?', evicted)
+        cursor.executemany('DELETE FROM image_hashes WHERE cache_key = ?', evicted)
+        if evicted:
+            increment(cursor, 'ocr_cache.evictions', len(evicted))
+            print(f"🧹 OCR 캐시 {len(evicted)}개 항목 삭제 (LRU)")
+
+    conn.commit()
+    conn.close()
+
+
+def cache_stats(db_path=DB_PATH):
+    """
+    캐시 적중/미스/삭제 횟수와 현재 항목 수, 총 크기
+    """
+    counters = get_metrics('ocr_cache.', db_path)
+    conn = _connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_cache')
+    entries, total = cursor.fetchone()
+    conn.close()
+    return {
+        'hits': counters.get('ocr_cache.hits', 0),
+        'misses': counters.get('ocr_cache.misses', 0),
+        'evictions': counters.get('ocr_cache.evictions', 0),
+        'entries': entries,
+        'bytes': total
+    }
@@ -0,0 +1,77 @@
+#백그라운드 OCR 작업 모듈
+#Streamlit 스크립트 스레드에서 OCR을 직접 돌리면 느린 분석 동안 화면이 멈추고
+#위젯을 건드릴 때마다 분석이 처음부터 다시 시작되므로,
+#프로세스 공용 실행기에 작업으로 넘기고 세션은 작업 객체만 들고 있다가 끝났는지 확인해 결과를 표시
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# 동시에 실행할 최대 OCR 작업 수 (작업 하나도 안에서 타일/변형을 병렬 처리하므로 작게 유지)
+MAX_JOB_WORKERS = 2
+
+
+class OcrJob:
+    """
+    실행기에 넘긴 OCR 작업 하나 (상태: 'queued' / 'running' / 'done' / 'error')
+    info: 결과를 표시할 때 필요한 부가 정보 (이미지 이름 등)
+    analysis: 스크립트 스레드에서 결과를 한 번 후처리해 저장해 두는 자리 (다시 실행될 때 재계산하지 않도록)
+    """
+
+    def __init__(self, name, future, info):
+        self.id = uuid.uuid4().hex[:8]
+        self.name = name
+        self.future = future
+        self.info = info
+        self.analysis = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        future.add_done_callback(self._finished)
+
+    def _finished(self, future):
+        self.finished_at = time.time()
+
+    @property
+    def status(self):
+        if not self.future.done():
+            return 'running' if self.future.running() else 'queued'
+        return 'error' if self.future.exception() is not None else 'done'
+
+    @property
+    def pending(self):
+        return not self.future.done()
+
+    @property
+    def result(self):
+        return self.future.result()
+
+    @property
+    def error(self):
+        return self.future.exception()
+
+    @property
+    def elapsed(self):
+        return round((self.finished_at or time.time()) - self.submitted_at, 1)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_job_executor():
+    """
+    프로세스 공용 OCR 작업 실행기 (최초 호출 시 한 번만 생성)
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_JOB_WORKERS, thread_name_prefix='ocr-job')
+        return _executor
+
+
+def submit_job(name, function, *args, **info):
+    """
+    function(*args)를 백그라운드에서 실행하는 작업을 만들어 반환
+    """
+    return OcrJob(name, get_job_executor().submit(function, *args), info)
@@ -4,14 +4,26 @@
 #source venv/bin/activate
 # ocr_test_optimized.py
 import cv2
-import pytesseract
-import numpy as np
-from PIL import Image
 import sys
 import re
-import easyocr
 import time
 import torch
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from allergen_matcher import AhoCorasick
+from easyocr_pool import get_reader_pool, warm_up_reader_pool
+import tesseract_pool
+from allergen_lexicon import canonical_ingredient, contains_known_ingredient, find_known_ingredients
+from fuzzy_index import find_fuzzy_ingredients
+from hangul_jamo import JamoIndex
+from label_segmenter import ingredient_section_span
+from preprocess_graph import PreprocessGraph, preprocess_stats
+from image_ingest import load_image
+from engine_router import route_image
+from orientation import correct_orientation
+from ingredient_region import crop_ingredient_region
+from tiled_ocr import needs_tiling, ocr_tiled
+from deadline import Deadline
 
 def check_gpu_availability():
     """
@@ -35,158 +47,80 @@ def apply_advanced_preprocessing(image):
     """
     고급 이미지 전처리 함수 (Subeen lab 블로그 참고)
     https://subeen-lab.tistory.com/121
+    그레이스케일/Gaussian·Median·Bilateral 블러/히스토그램 균등화/CLAHE/채도 조절 변형을
+    처음 접근할 때만 계산하는 지연 그래프로 반환 (dict처럼 ['clahe'] 형태로 사용)
     """
-    # 1️⃣ 그레이스케일 변환
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    
-    # 2️⃣ 다양한 Blur 방법들 적용
-    # Gaussian Blur
-    gaussian_blur = cv2.GaussianBlur(gray, (5, 5), 0)
-    
-    # Median Blur (노이즈 제거에 효과적)
-    median_blur = cv2.medianBlur(gray, 5)
-    
-    # Bilateral Filter (엣지 보존하면서 노이즈 제거)
-    bilateral_blur = cv2.bilateralFilter(gray, 9, 75, 75)
-    
-    # 3️⃣ 히스토그램 균등화
-    equalized = cv2.equalizeHist(gray)
-    
-    # 4️⃣ CLAHE (적응형 히스토그램 균등화)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-    clahe_applied = clahe.apply(gray)
-    
-    # 5️⃣ 채도 조절 (Saturation Adjustment)
-    # HSV 색상 공간으로 변환
-    hsv_image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-    # 채도 증가 (1.5배)
-    hsv_image[:, :, 1] = np.clip(hsv_image[:, :, 1] * 1.5, 0, 255)
-    # 다시 BGR로 변환
-    saturated_image = cv2.cvtColor(hsv_image, cv2.COLOR_HSV2BGR)
-    saturated_gray = cv2.cvtColor(saturated_image, cv2.COLOR_BGR2GRAY)
-    
-    return {
-        'original': gray,
-        'gaussian_blur': gaussian_blur,
-        'median_blur': median_blur,
-        'bilateral_blur': bilateral_blur,
-        'equalized': equalized,
-        'clahe': clahe_applied,
-        'saturated': saturated_gray
-    }
+    return PreprocessGraph(image)
 
 def apply_morphology_operations(image):
     """
-    모폴로지 연산 적용 (침식, 팽창, 닫힘, 열림)
+    모폴로지 연산 적용 (침식, 팽창, 닫힘, 열림 - 접근할 때만 계산)
     """
-    # 커널 생성
-    kernel = np.ones((3, 3), np.uint8)
-    
-    # 침식 연산 (텍스트를 얇게)
-    erosion = cv2.erode(image, kernel, iterations=1)
-    
-    # 팽창 연산 (텍스트를 두껍게)
-    dilation = cv2.dilate(image, kernel, iterations=1)
-    
-    # 닫힘 연산 (텍스트 내부 구멍 메우기)
-    closing = cv2.morphologyEx(image, cv2.MORPH_CLOSE, kernel)
-    
-    # 열림 연산 (작은 노이즈 제거)
-    opening = cv2.morphologyEx(image, cv2.MORPH_OPEN, kernel)
-    
-    return {
-        'erosion': erosion,
-        'dilation': dilation,
-        'closing': closing,
-        'opening': opening
-    }
+    return PreprocessGraph(image, keys=('erosion', 'dilation', 'closing', 'opening'))
 
 def apply_multiple_thresholding(image):
     """
-    다양한 이진화 방법 적용
+    다양한 이진화 방법 적용 (OTSU, 적응형 Gaussian/Mean, 임계값 - 접근할 때만 계산)
     """
-    # OTSU 이진화
-    _, thresh_otsu = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    
-    # 적응형 이진화 - Gaussian
-    thresh_adapt_gaussian = cv2.adaptiveThreshold(
-        image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-    )
-    
-    # 적응형 이진화 - Mean
-    thresh_adapt_mean = cv2.adaptiveThreshold(
-        image, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 11, 2
-    )
-    
-    # 임계값 이진화
-    _, thresh_binary = cv2.threshold(image, 128, 255, cv2.THRESH_BINARY)
-    
-    return {
-        'otsu': thresh_otsu,
-        'adapt_gaussian': thresh_adapt_gaussian,
-        'adapt_mean': thresh_adapt_mean,
-        'binary': thresh_binary
-    }
+    return PreprocessGraph(image, keys=('otsu', 'adapt_gaussian', 'adapt_mean', 'binary'))
 
-def ocr_image_with_opencv(image, lang="kor+eng", fast_mode=True):
+def prepare_for_tesseract(image, fast_mode=True, max_side=1200):
     """
-    OpenCV + Tesseract OCR 최적화 함수 (다양한 전처리 방법 적용)
-    image: PIL.Image 또는 파일 경로
-    lang: OCR 언어 설정
-    fast_mode: 빠른 모드 (기본값: True)
+    BGR 또는 그레이스케일 이미지를 Tesseract 입력용 이진 이미지로 전처리
+    max_side: 긴 변이 이보다 크면 축소 (None이면 원본 해상도 유지)
+    반환값: (이진 이미지, Tesseract 설정 문자열)
     """
-    # 이미지가 PIL 객체라면 OpenCV 형식으로 변환
-    if isinstance(image, Image.Image):
-        image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-    elif isinstance(image, str):  # 파일 경로일 경우
-        image = cv2.imread(image)
-        if image is None:
-            raise FileNotFoundError(f"이미지를 찾을 수 없습니다: {image}")
-
     # 이미지 크기 조정 (적당한 크기로)
     height, width = image.shape[:2]
-    if width > 1200 or height > 1200:
-        scale = min(1200/width, 1200/height)
+    if max_side and (width > max_side or height > max_side):
+        scale = min(max_side/width, max_side/height)
         new_width = int(width * scale)
         new_height = int(height * scale)
         image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
 
     if fast_mode:
         # 🚀 빠른 모드: 기본 전처리만
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         gray = cv2.equalizeHist(gray)
         blurred = cv2.GaussianBlur(gray, (3, 3), 0)
         _, thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
         config = "--psm 3 --oem 3 -c preserve_interword_spaces=1"
         
     else:
-        # 🎯 정밀 모드: 다양한 전처리 방법 시도
-        # 고급 전처리 적용
-        processed_images = apply_advanced_preprocessing(image)
-        
-        # 가장 효과적인 이미지 선택 (CLAHE 적용된 이미지)
-        best_image = processed_images['clahe']
-        
-        # 모폴로지 연산 적용
-        morph_images = apply_morphology_operations(best_image)
-        
-        # 가장 효과적인 모폴로지 결과 선택 (닫힘 연산)
-        best_morph = morph_images['closing']
-        
-        # 다양한 이진화 방법 적용
-        thresh_images = apply_multiple_thresholding(best_morph)
-        
-        # 가장 효과적인 이진화 결과 선택 (적응형 Gaussian)
-        thresh = thresh_images['adapt_gaussian']
-        
-        # 추가 모폴로지 연산으로 텍스트 영역 강화
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-        thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+        # 🎯 정밀 모드: 가장 효과적인 조합만 계산
+        # CLAHE → 닫힘 연산 → 적응형 Gaussian 이진화 → 추가 모폴로지 연산으로 텍스트 영역 강화
+        with PreprocessGraph(image) as graph:
+            thresh = graph.detach('clahe.closing.adapt_gaussian.rect_closing')
         
         config = "--psm 6 --oem 3 -c preserve_interword_spaces=1 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz가-힣():.,()[]{}"
 
+    return thresh, config
+
+def ocr_image_with_opencv(image, lang="kor+eng", fast_mode=True, tiled=False, deadline=None):
+    """
+    OpenCV + Tesseract OCR 최적화 함수 (다양한 전처리 방법 적용)
+    image: 그레이스케일/BGR 배열, PIL.Image, 파일 경로, 이미지 바이트 또는 업로드 파일
+    lang: OCR 언어 설정
+    fast_mode: 빠른 모드 (기본값: True)
+    tiled: 큰 이미지를 줄이지 않고 원본 해상도로 띠를 나눠 동시에 OCR (기본값: False)
+    deadline: 처리 시간 예산 (마감이 지나면 OCR을 끊고 그때까지의 텍스트 반환)
+    """
+    deadline = deadline or Deadline()
+    image = load_image(image)
+    if tiled and needs_tiling(image):
+        thresh, config = prepare_for_tesseract(image, fast_mode, max_side=None)
+        return ocr_tiled(thresh, lang=lang, config=config, deadline=deadline).strip()
+    
+    thresh, config = prepare_for_tesseract(image, fast_mode)
+
     # OCR 수행 (한국어 우선)
-    text = pytesseract.image_to_string(thresh, lang=lang, config=config)
+    if deadline.skip('tesseract'):
+        return ""
+    try:
+        text = tesseract_pool.image_to_string(thresh, lang=lang, config=config, timeout=deadline.remaining())
+    except TimeoutError as e:
+        deadline.timeout('tesseract', e)
+        return ""
     return text.strip()
 
 def ocr_with_easyocr(image_path_or_object, lang=['ko', 'en']):
@@ -194,26 +128,11 @@ def ocr_with_easyocr(image_path_or_object, lang=['ko', 'en']):
     EasyOCR을 사용한 고성능 OCR 함수 (한국어 특화 - 맥북 GPU 지원)
     """
     try:
-        # 맥북 M1/M2/M3 칩에서 MPS(Metal Performance Shaders) 사용
-        import torch
-        if torch.backends.mps.is_available():
-            print("🚀 맥북 GPU(MPS) 가속 사용 중...")
-            reader = easyocr.Reader(lang, gpu=True)  # MPS 사용
-        else:
-            print("💻 CPU 모드로 실행 중...")
-            reader = easyocr.Reader(lang, gpu=False)
-        
-        # 이미지 읽기
-        if isinstance(image_path_or_object, str):
-            image = cv2.imread(image_path_or_object)
-        else:
-            # PIL Image를 numpy array로 변환
-            image = np.array(image_path_or_object)
-            if len(image.shape) == 3 and image.shape[2] == 3:
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        # 이미지 읽기 (그레이스케일 배열도 변환 없이 그대로 사용)
+        image = load_image(image_path_or_object)
         
-        # EasyOCR로 텍스트 추출
-        results = reader.readtext(image)
+        # EasyOCR로 텍스트 추출 (프로세스 공용 Reader 풀에서 빌려 사용)
+        results = get_reader_pool(lang).readtext(image)
         
         # 결과를 텍스트로 변환
         extracted_text = ""
@@ -227,83 +146,212 @@ def ocr_with_easyocr(image_path_or_object, lang=['ko', 'en']):
         print(f"EasyOCR 오류: {e}")
         return ""
 
-def ocr_with_enhanced_preprocessing(image_path_or_object, use_easyocr=True):
+# 정밀 모드에서 요청 하나가 동시에 처리할 최대 전처리 결과 수
+MAX_PARALLEL_VARIANTS = 4
+
+def _easyocr_variant_text(results):
+    text = ""
+    for (bbox, detected_text, confidence) in results:
+        if confidence > 0.3:  # 낮은 임계값으로 더 많은 텍스트 캡처
+            text += detected_text + " "
+    return text.strip()
+
+def _tesseract_variant_text(graph, variant, deadline):
+    """
+    전처리 결과 하나에 모폴로지(닫힘) + 이진화(적응형 Gaussian) + Tesseract OCR 수행 (실패 시 빈 문자열)
+    마감이 지났으면 시작하지 않고, 진행 중이면 남은 시간이 지나면 끊음 (빈 문자열)
+    """
+    if deadline.skip(variant):
+        return ""
+    try:
+        thresh = graph[f'{variant}.closing.adapt_gaussian']
+        # 닫힘 연산 결과는 더 쓰지 않으므로 다른 변형이 바로 재사용하도록 반납
+        graph.discard(f'{variant}.closing')
+        
+        # OCR 수행
+        return tesseract_pool.image_to_string(thresh, lang='kor+eng', config='--psm 6 --oem 3', timeout=deadline.remaining()).strip()
+    except TimeoutError as e:
+        deadline.timeout(variant, e)
+        return ""
+    except:
+        return ""
+
+def ocr_with_enhanced_preprocessing(image_path_or_object, use_easyocr=True, max_parallel=MAX_PARALLEL_VARIANTS, deadline=None):
     """
     향상된 전처리 + 고성능 OCR 함수
+    max_parallel: 동시에 처리할 최대 전처리 결과 수 (1이면 순차 처리)
+    deadline: 처리 시간 예산 (마감이 지나면 남은 전처리 결과는 건너뛰고 끝난 결과만 합침)
     """
     try:
-        # 이미지 읽기
-        if isinstance(image_path_or_object, str):
-            image = cv2.imread(image_path_or_object)
-        else:
-            image = np.array(image_path_or_object)
-            if len(image.shape) == 3 and image.shape[2] == 3:
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-        
-        if image is None:
-            return ""
+        # 이미지 읽기 (그레이스케일 배열도 변환 없이 그대로 사용)
+        image = load_image(image_path_or_object)
         
-        # 고급 전처리 적용
-        processed_images = apply_advanced_preprocessing(image)
-        
-        # 여러 전처리 결과 중 가장 좋은 것들 시도
-        best_images = [
-            processed_images['clahe'],  # CLAHE 적용
-            processed_images['equalized'],  # 히스토그램 균등화
-            processed_images['bilateral_blur'],  # Bilateral Filter
-            processed_images['original']  # 원본
-        ]
-        
-        all_texts = []
-        
-        if use_easyocr:
-            # EasyOCR 사용 (맥북 GPU 지원)
-            import torch
-            if torch.backends.mps.is_available():
-                print("🚀 맥북 GPU(MPS) 가속 사용 중...")
-                reader = easyocr.Reader(['ko', 'en'], gpu=True)
-            else:
-                print("💻 CPU 모드로 실행 중...")
-                reader = easyocr.Reader(['ko', 'en'], gpu=False)
-            
-            for img in best_images:
-                try:
-                    results = reader.readtext(img)
-                    text = ""
-                    for (bbox, detected_text, confidence) in results:
-                        if confidence > 0.3:  # 낮은 임계값으로 더 많은 텍스트 캡처
-                            text += detected_text + " "
-                    if text.strip():
-                        all_texts.append(text.strip())
-                except:
-                    continue
-        else:
-            # Tesseract 사용
-            for img in best_images:
+        with PreprocessGraph(image) as graph:
+            return _ocr_variants(graph, use_easyocr, max_parallel, deadline)
+    
+    except Exception as e:
+        print(f"향상된 OCR 오류: {e}")
+        return ""
+
+# 정밀 모드에서 시도하는 전처리 결과 (CLAHE, 히스토그램 균등화, Bilateral Filter, 원본)
+ENHANCED_VARIANTS = ('clahe', 'equalized', 'bilateral_blur', 'original')
+
+def _ocr_variants(graph, use_easyocr, max_parallel, deadline=None):
+    deadline = deadline or Deadline()
+    # 여러 전처리 결과 중 가장 좋은 것들 시도 (스레드에서 공유하는 앞 단계는 여기서 미리 계산)
+    best_images = [graph[variant] for variant in ENHANCED_VARIANTS]
+    
+    max_parallel = max(1, min(max_parallel or 1, len(best_images)))
+    
+    if use_easyocr:
+        # EasyOCR 사용 (맥북 GPU 지원, 예열된 Reader를 빌려 모든 전처리 결과에 재사용)
+        # EasyOCR 호출은 중간에 끊을 수 없으므로 마감이 있으면 묶음 대신 하나씩 처리하며 호출 사이에 확인
+        with get_reader_pool(['ko', 'en']).reader() as reader:
+            if max_parallel > 1 and deadline.remaining() is None and hasattr(reader, 'readtext_batched'):
+                # 전처리 결과들은 크기가 같으므로 인식기에 한 번에 묶어 전달
                 try:
-                    # 모폴로지 연산 적용
-                    morph_images = apply_morphology_operations(img)
-                    best_morph = morph_images['closing']
-                    
-                    # 이진화
-                    thresh_images = apply_multiple_thresholding(best_morph)
-                    thresh = thresh_images['adapt_gaussian']
-                    
-                    # OCR 수행
-                    text = pytesseract.image_to_string(thresh, lang='kor+eng', config='--psm 6 --oem 3')
-                    if text.strip():
-                        all_texts.append(text.strip())
+                    batched = reader.readtext_batched(best_images, batch_size=max_parallel)
                 except:
-                    continue
-        
-        # 모든 결과를 합치고  제거
-        combined_text = " ".join(all_texts)
-        return combined_text.strip()
+                    batched = None
+            else:
+                batched = None
+            
+            if batched is not None:
+                variant_texts = [_easyocr_variant_text(results) for results in batched]
+            else:
+                variant_texts = []
+                for variant, img in zip(ENHANCED_VARIANTS, best_images):
+                    if deadline.skip(variant):
+                        break
+                    try:
+                        variant_texts.append(_easyocr_variant_text(reader.readtext(img)))
+                    except:
+                        continue
+    elif max_parallel > 1:
+        # Tesseract 사용: 전처리 결과별 모폴로지/이진화/OCR을 동시에 실행
+        # (OpenCV와 Tesseract 워커 프로세스는 GIL을 잡지 않으므로 스레드로 분배)
+        with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+            variant_texts = list(executor.map(lambda variant: _tesseract_variant_text(graph, variant, deadline), ENHANCED_VARIANTS))
+    else:
+        # Tesseract 사용
+        variant_texts = [_tesseract_variant_text(graph, variant, deadline) for variant in ENHANCED_VARIANTS]
     
+    # 전처리 결과 순서대로 모아서 합침
+    all_texts = [text for text in variant_texts if text]
+    
+    # 모든 결과를 합치고  제거
+    combined_text = " ".join(all_texts)
+    return combined_text.strip()
+
+# 신뢰도 캐스케이드: 원재료명 구역 평균 신뢰도(0~100)가 이 값 이상이면 더 비싼 단계로 넘어가지 않음
+CASCADE_CONFIDENCE_THRESHOLD = 70
+
+def section_confidence(text, words):
+    """
+    원재료명 구역 안 단어들의 평균 신뢰도 (구역이 없으면 전체 단어 평균, 단어가 없으면 0)
+    words: [(단어, 신뢰도 0~100), ...] (텍스트에 나오는 순서)
+    """
+    span = ingredient_section_span(text)
+    section_confidences = []
+    all_confidences = []
+    position = 0
+    for word, confidence in words:
+        start = text.find(word, position)
+        if start == -1:
+            continue
+        position = start + len(word)
+        all_confidences.append(confidence)
+        if span and span[0] <= start < span[1]:
+            section_confidences.append(confidence)
+    confidences = section_confidences or all_confidences
+    return sum(confidences) / len(confidences) if confidences else 0.0
+
+def _easyocr_data(image):
+    results = get_reader_pool(['ko', 'en']).readtext(image)
+    words = [(text, confidence * 100) for (bbox, text, confidence) in results if confidence > 0.3]
+    return " ".join(word for word, _ in words), words
+
+def _tesseract_fast_stage(image, deadline):
+    thresh, config = prepare_for_tesseract(image, fast_mode=True)
+    return tesseract_pool.image_to_data(thresh, lang="kor+eng", config=config, timeout=deadline.remaining())
+
+def _tesseract_precise_stage(image, deadline):
+    thresh, config = prepare_for_tesseract(image, fast_mode=False)
+    return tesseract_pool.image_to_data(thresh, lang="kor+eng", config=config, timeout=deadline.remaining())
+
+def _easyocr_original_stage(image, deadline):
+    return _easyocr_data(image)
+
+def _easyocr_clahe_stage(image, deadline):
+    with PreprocessGraph(image) as graph:
+        return _easyocr_data(graph['clahe'])
+
+# 엔진별 캐스케이드 단계 (저렴한 순서, None은 모든 전처리 결과를 합치는 마지막 단계)
+_TESSERACT_CASCADE = [('fast', _tesseract_fast_stage), ('precise', _tesseract_precise_stage), ('all_variants', None)]
+_EASYOCR_CASCADE = [('original', _easyocr_original_stage), ('clahe', _easyocr_clahe_stage), ('all_variants', None)]
+
+def _enhanced_stage_text(image, use_easyocr, deadline):
+    try:
+        with PreprocessGraph(image) as graph:
+            return _ocr_variants(graph, use_easyocr, MAX_PARALLEL_VARIANTS, deadline)
     except Exception as e:
         print(f"향상된 OCR 오류: {e}")
         return ""
 
+def ocr_with_cascade(image_path_or_object, use_easyocr=True, threshold=CASCADE_CONFIDENCE_THRESHOLD, localize=True, deadline=None):
+    """
+    가장 저렴한 단계부터 OCR을 수행하고, 원재료명 구역 신뢰도가 threshold 미만일 때만 다음 단계로 진행
+    localize: 먼저 원재료명 블록을 찾아 그 영역만 OCR (찾지 못하면 전체 이미지)
+    deadline: 처리 시간 예산 (마감이 지나면 다음 단계로 가지 않고, 진행 중인 Tesseract 단계는 끊은 뒤
+              끝난 단계 중 신뢰도가 가장 높은 텍스트 반환)
+    반환값: {'text', 'stage'(최종 텍스트를 만든 단계), 'confidence', 'stages': [(단계, 신뢰도, 소요 시간), ...],
+            'region'(원재료명 영역 또는 None), 'pixels'(OCR한 픽셀 수), 'timed_out'(마감으로 멈춘 단계 또는 None)}
+    """
+    deadline = deadline or Deadline()
+    image = load_image(image_path_or_object)
+    
+    region = None
+    if localize and not deadline.skip('localize'):
+        image, region = crop_ingredient_region(image, use_easyocr, timeout=deadline.remaining())
+
+    stages = []
+    text = ""
+    stage = None
+    confidence = None
+    best = None
+    for next_stage, run in (_EASYOCR_CASCADE if use_easyocr else _TESSERACT_CASCADE):
+        if deadline.skip(next_stage):
+            break
+        start_time = time.time()
+        try:
+            if run is None:
+                stage_text = _enhanced_stage_text(image, use_easyocr, deadline)
+                stage_confidence = None
+            else:
+                stage_text, words = run(image, deadline)
+                stage_text = stage_text.strip()
+                stage_confidence = round(section_confidence(stage_text, words), 1)
+        except TimeoutError as e:
+            deadline.timeout(next_stage, e)
+            break
+        stages.append((next_stage, stage_confidence, round(time.time() - start_time, 2)))
+        print(f"🪜 캐스케이드 단계 '{next_stage}': 신뢰도 {stage_confidence}")
+        if deadline.timed_out_at and not stage_text:
+            # 마감으로 변형을 하나도 끝내지 못한 단계는 앞 단계 텍스트를 유지
+            break
+        text, stage, confidence = stage_text, next_stage, stage_confidence
+        if confidence is not None and (best is None or confidence > best[0]):
+            best = (confidence, text, stage)
+        if confidence is not None and confidence >= threshold:
+            break
+
+    if deadline.timed_out_at and confidence is not None and best[0] > confidence:
+        # 부분 결과: 끝난 단계 중 원재료명 구역 신뢰도가 가장 높은 텍스트
+        confidence, text, stage = best
+    
+    return {'text': text, 'stage': stage, 'confidence': confidence, 'stages': stages,
+            'region': region, 'pixels': image.shape[0] * image.shape[1], 'timed_out': deadline.timed_out_at}
+
 def extract_ingredients_from_text(text):
     """
     OCR로 추출된 텍스트에서 원재료명만 추출하는 함수 (한국 식품 성분표 특화 - 개선된 버전)
@@ -334,6 +382,19 @@ def extract_ingredients_from_text(text):
     
     return allergen_ingredients
 
+# 원재료명 섹션 추출용 정규식
+# 쉼표로 구분된 재료명 (가장 일반적인 패턴)
+_SECTION_COMMA_RE = re.compile(r'([가-힣]+(?:\([^)]*\))?(?:\{[^}]*\})?)')
+# 특수 패턴들
+_SECTION_SPECIAL_RES = [
+    # 백분율이 포함된 재료명 (예: 가공유크림31.86%)
+    re.compile(r'([가-힣]+(?:\d+\.?\d*%)?)'),
+    # 괄호 안에 상세 정보가 있는 재료명
+    re.compile(r'([가-힣]+\([^)]*\))'),
+    # 중괄호 안에 복합 정보가 있는 재료명
+    re.compile(r'([가-힣]+\{[^}]*\})'),
+]
+
 def extract_from_ingredient_section(section_text):
     """
     원재료명 섹션에서 성분을 추출하는 함수
@@ -341,8 +402,7 @@ def extract_from_ingredient_section(section_text):
     ingredients = []
     
     # 1. 쉼표로 구분된 재료명들 추출 (가장 일반적인 패턴)
-    comma_pattern = r'([가-힣]+(?:\([^)]*\))?(?:\{[^}]*\})?)'
-    matches = re.findall(comma_pattern, section_text)
+    matches = _SECTION_COMMA_RE.findall(section_text)
     
     for match in matches:
         # 각 재료명을 개별적으로 처리
@@ -353,17 +413,8 @@ def extract_from_ingredient_section(section_text):
                 ingredients.append(cleaned)
     
     # 2. 특수 패턴들 추출
-    special_patterns = [
-        # 백분율이 포함된 재료명 (예: 가공유크림31.86%)
-        r'([가-힣]+(?:\d+\.?\d*%)?)',
-        # 괄호 안에 상세 정보가 있는 재료명
-        r'([가-힣]+\([^)]*\))',
-        # 중괄호 안에 복합 정보가 있는 재료명
-        r'([가-힣]+\{[^}]*\})',
-    ]
-    
-    for pattern in special_patterns:
-        matches = re.findall(pattern, section_text)
+    for pattern in _SECTION_SPECIAL_RES:
+        matches = pattern.findall(section_text)
         for match in matches:
             cleaned = clean_ingredient_text(match)
             if cleaned and is_valid_ingredient(cleaned):
@@ -378,143 +429,13 @@ def remove_duplicate_allergens(ingredients):
     if not ingredients:
         return []
     
-    # 알레르기 성분 매핑 (중복 제거 및 표준화)
-    allergen_mapping = {
-        # 밀 관련 - 밀가루로 통일
-        '밀': '밀가루',
-        '밀가루': '밀가루',
-        '밀글루텐': '밀가루',
-        '밀전분': '밀가루',
-        '밀효소': '밀가루',
-        '밀단백질': '밀가루',
-        
-        # 난류 관련 - 달걀로 통일
-        '계란': '달걀',
-        '달걀': '달걀',
-        '전란액': '달걀',
-        '난황액': '달걀',
-        '난백분': '달걀',
-        '난황분말': '달걀',
-        '난백분말': '달걀',
-        
-        # 우유 관련 - 우유로 통일
-        '우유': '우유',
-        '전지분유': '우유',
-        '탈지분유': '우유',
-        '유크림': '우유',
-        '가공유크림': '우유',
-        '유당': '우유',
-        '유청단백분말': '우유',
-        '혼합분유': '우유',
-        '연유': '우유',
-        '버터': '우유',
-        '마가린': '우유',
-        '치즈': '우유',
-        '요거트': '우유',
-        
-        # 대두 관련 - 대두로 통일
-        '대두': '대두',
-        '콩': '대두',
-        '두부': '대두',
-        '된장': '대두',
-        '간장': '대두',
-        '고추장': '대두',
-        '콩기름': '대두',
-        '대두단백질': '대두',
-        '대두분말': '대두',
-        '대두유': '대두',
-        '식물성단백가수분해물': '대두',
-        
-        # 땅콩 관련 - 땅콩으로 통일
-        '땅콩': '땅콩',
-        '피넛': '땅콩',
-        '땅콩버터': '땅콩',
-        '땅콩오일': '땅콩',
-        '땅콩분말': '땅콩',
-        
-        # 견과류 - 각각 유지
-        '호두': '호두',
-        '잣': '잣',
-        '아몬드': '아몬드',
-        '캐슈넛': '캐슈넛',
-        '피스타치오': '피스타치오',
-        '마카다미아': '마카다미아',
-        
-        # 메밀 관련 - 메밀로 통일
-        '메밀': '메밀',
-        '메밀가루': '메밀',
-        '메밀면': '메밀',
-        
-        # 갑각류 - 각각 유지
-        '새우': '새우',
-        '새우분말': '새우',
-        '게': '게',
-        '게분말': '게',
-        '랍스터': '랍스터',
-        '가재': '가재',
-        
-        # 조개류 - 조개로 통일
-        '조개': '조개',
-        '조개류': '조개',
-        '굴': '조개',
-        '전복': '조개',
-        '홍합': '조개',
-        '바지락': '조개',
-        '관자': '조개',
-        
-        # 어류 - 어류로 통일
-        '고등어': '어류',
-        '연어': '어류',
-        '참치': '어류',
-        '멸치': '어류',
-        '오징어': '어류',
-        '문어': '어류',
-        '어류': '어류',
-        
-        # 육류 - 각각 유지
-        '쇠고기': '쇠고기',
-        '소고기': '쇠고기',
-        '돼지고기': '돼지고기',
-        '돼지': '돼지고기',
-        '닭고기': '닭고기',
-        '양고기': '양고기',
-        
-        # 복숭아 관련 - 복숭아로 통일
-        '복숭아': '복숭아',
-        '복숭아즙': '복숭아',
-        '복숭아향료': '복숭아',
-        
-        # 토마토 관련 - 토마토로 통일
-        '토마토': '토마토',
-        '토마토페이스트': '토마토',
-        '토마토소스': '토마토',
-        '토마토추출물': '토마토',
-        
-        # 아황산류 관련 - 아황산류로 통일
-        '아황산나트륨': '아황산류',
-        '아황산칼륨': '아황산류',
-        '아황산수소나트륨': '아황산류',
-        '아황산류': '아황산류',
-        
-        # 기타 - 각각 유지
-        '카라멜색소': '카라멜색소',
-        '아질산나트륨': '아질산나트륨',
-        '복합조미료': '복합조미료',
-        'MSG': 'MSG',
-        '조미료': '조미료'
-    }
-    
     # 중복 제거된 성분들을 저장할 세트
     unique_allergens = set()
     processed_ingredients = []
     
     for ingredient in ingredients:
-        # 각 성분에서 알레르기 성분 매핑 찾기
-        found_allergen = None
-        for key, mapped_allergen in allergen_mapping.items():
-            if key in ingredient:
-                found_allergen = mapped_allergen
-                break
+        # 각 성분에서 가장 긴 용어 기준으로 대표 알레르기 성분 찾기 (공용 사전 트라이)
+        found_allergen = canonical_ingredient(ingredient)
         
         # 매핑된 알레르기 성분이 있고 아직 추가되지 않았다면 추가
         if found_allergen and found_allergen not in unique_allergens:
@@ -527,79 +448,31 @@ def filter_allergen_ingredients(ingredients):
     """
     추출된 재료명 중에서 알레르기 유발 성분만 필터링하고 중복 제거하는 함수
     """
-    # 알레르기 유발 성분 목록 (식약처 지정 23종 + 관련 재료)
-    allergen_list = [
-        # 곡물류 (밀)
-        '밀가루', '밀', '밀글루텐', '밀전분', '밀효소', '밀단백질',
-        
-        # 난류 (달걀)
-        '달걀', '계란', '전란액', '난황액', '난백분', '난황분말', '난백분말',
-        
-        # 우유
-        '우유', '전지분유', '탈지분유', '유크림', '가공유크림', '유당', '유청단백분말',
-        '혼합분유', '연유', '버터', '마가린', '치즈', '요거트',
-        
-        # 대두
-        '대두', '콩', '두부', '된장', '간장', '고추장', '콩기름', '대두단백질',
-        '대두분말', '대두유', '식물성단백가수분해물',
-        
-        # 땅콩
-        '땅콩', '피넛', '땅콩버터', '땅콩오일', '땅콩분말',
-        
-        # 견과류
-        '호두', '잣', '아몬드', '캐슈넛', '피스타치오', '마카다미아',
-        
-        # 메밀
-        '메밀', '메밀가루', '메밀면',
-        
-        # 갑각류
-        '새우', '게', '랍스터', '가재', '새우분말', '게분말',
-        
-        # 조개류
-        '조개', '굴', '전복', '홍합', '바지락', '관자', '조개류',
-        
-        # 어류
-        '고등어', '연어', '참치', '멸치', '오징어', '문어', '어류',
-        
-        # 육류
-        '쇠고기', '돼지고기', '닭고기', '양고기', '소고기', '돼지',
-        
-        # 복숭아
-        '복숭아', '복숭아즙', '복숭아향료',
-        
-        # 토마토
-        '토마토', '토마토페이스트', '토마토소스', '토마토추출물',
-        
-        # 아황산류
-        '아황산나트륨', '아황산칼륨', '아황산수소나트륨', '아황산류',
-        
-        # 기타 알레르기 관련
-        '카라멜색소', '아질산나트륨', '복합조미료', 'MSG', '조미료'
-    ]
-    
     # 알레르기 유발 성분만 필터링
     filtered_ingredients = []
     
     for ingredient in ingredients:
         # 기본 재료명에서 알레르기 성분 확인
-        for allergen in allergen_list:
-            if allergen in ingredient:
-                filtered_ingredients.append(ingredient)
-                break
+        if contains_known_ingredient(ingredient):
+            filtered_ingredients.append(ingredient)
         
         # 괄호 안의 원산지 정보에서도 알레르기 성분 확인
         if '(' in ingredient and ')' in ingredient:
             origin_text = ingredient[ingredient.find('(')+1:ingredient.find(')')]
-            for allergen in allergen_list:
-                if allergen in origin_text:
-                    filtered_ingredients.append(ingredient)
-                    break
+            if contains_known_ingredient(origin_text):
+                filtered_ingredients.append(ingredient)
     
     # 중복 제거 적용
     unique_ingredients = remove_duplicate_allergens(filtered_ingredients)
     
     return unique_ingredients
 
+# 원재료명 관련 키워드 이후 텍스트 전체 (첫 한글부터 끝까지 - 중첩 반복 없는 동등 패턴)
+_FULL_TEXT_KEYWORD_RES = [
+    re.compile(r'원재료명?\s*[:：]\s*([^가-힣]*[가-힣][\s\S]*)', re.IGNORECASE | re.MULTILINE),
+    re.compile(r'성분\s*[:：]\s*([^가-힣]*[가-힣][\s\S]*)', re.IGNORECASE | re.MULTILINE),
+]
+
 def extract_from_full_text(text):
     """
     전체 텍스트에서 원재료명 패턴을 찾는 함수
@@ -607,13 +480,8 @@ def extract_from_full_text(text):
     ingredients = []
     
     # 원재료명 관련 키워드 주변에서 추출
-    ingredient_keywords = [
-        r'원재료명?\s*[:：]\s*([^가-힣]*[가-힣]+[^가-힣]*(?:[가-힣]+[^가-힣]*)*)',
-        r'성분\s*[:：]\s*([^가-힣]*[가-힣]+[^가-힣]*(?:[가-힣]+[^가-힣]*)*)',
-    ]
-    
-    for pattern in ingredient_keywords:
-        matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
+    for pattern in _FULL_TEXT_KEYWORD_RES:
+        matches = pattern.findall(text)
         for match in matches:
             individual_ingredients = split_compound_ingredient(match)
             for ingredient in individual_ingredients:
@@ -623,6 +491,11 @@ def extract_from_full_text(text):
     
     return ingredients
 
+_COMMA_SPLIT_RE = re.compile(r'[,，]')
+_PAREN_RE = re.compile(r'\([^)]*\)')
+_PAREN_CONTENT_RE = re.compile(r'\(([^)]*)\)')
+_HANGUL_WORD_RE = re.compile(r'([가-힣]+)')
+
 def split_compound_ingredient(ingredient_text):
     """
     복합 재료명을 개별 재료로 분리하는 함수
@@ -630,96 +503,51 @@ def split_compound_ingredient(ingredient_text):
     ingredients = []
     
     # 쉼표로 분리
-    parts = re.split(r'[,，]', ingredient_text)
+    parts = _COMMA_SPLIT_RE.split(ingredient_text)
     
     for part in parts:
         part = part.strip()
         if part:
             # 괄호 안의 원산지 정보는 제거하고 기본 재료명만 추출
-            base_ingredient = re.sub(r'\([^)]*\)', '', part).strip()
+            base_ingredient = _PAREN_RE.sub('', part).strip()
             if base_ingredient:
                 ingredients.append(base_ingredient)
             
             # 괄호 안의 원산지 정보도 별도로 저장 (예: 밀가루(밀:미국산)에서 "밀")
-            origin_match = re.search(r'\(([^)]*)\)', part)
+            origin_match = _PAREN_CONTENT_RE.search(part)
             if origin_match:
                 origin_text = origin_match.group(1)
                 # 원산지에서 실제 재료명 추출 (예: "밀:미국산"에서 "밀")
-                origin_ingredient = re.search(r'([가-힣]+)', origin_text)
+                origin_ingredient = _HANGUL_WORD_RE.search(origin_text)
                 if origin_ingredient:
                     ingredients.append(origin_ingredient.group(1))
     
     return ingredients
 
+# 복합 패턴 (괄호나 특수문자 포함)
+_COMPLEX_PATTERN_RES = [
+    re.compile(r'([가-힣]+\([^)]*\))'),  # 괄호 포함 재료명
+    re.compile(r'([가-힣]+\[[^\]]*\])'),  # 대괄호 포함 재료명
+    re.compile(r'([가-힣]+(?:가루|분말|유지|오일|유|제|료|분유|매스|탕|닝|류|품|액|크림|시럽|추출물|분해물|믹스))'),  # 접미사 패턴
+]
+
 def extract_direct_patterns(text):
     """
     직접 패턴 매칭으로 재료명을 추출하는 함수
     """
     ingredients = []
     
-    # 알레르기 유발 성분들 (식약처 지정 23종 + 관련 재료)
-    known_ingredients = [
-        # 곡물류 (밀)
-        '밀가루', '밀', '밀글루텐', '밀전분', '밀효소', '밀단백질',
-        
-        # 난류 (달걀)
-        '달걀', '계란', '전란액', '난황액', '난백분', '난황분말', '난백분말',
-        
-        # 우유
-        '우유', '전지분유', '탈지분유', '유크림', '가공유크림', '유당', '유청단백분말',
-        '혼합분유', '연유', '버터', '마가린', '치즈', '요거트',
-        
-        # 대두
-        '대두', '콩', '두부', '된장', '간장', '고추장', '콩기름', '대두단백질',
-        '대두분말', '대두유', '식물성단백가수분해물',
-        
-        # 땅콩
-        '땅콩', '피넛', '땅콩버터', '땅콩오일', '땅콩분말',
-        
-        # 견과류
-        '호두', '잣', '아몬드', '캐슈넛', '피스타치오', '마카다미아',
-        
-        # 메밀
-        '메밀', '메밀가루', '메밀면',
-        
-        # 갑각류
-        '새우', '게', '랍스터', '가재', '새우분말', '게분말',
-        
-        # 조개류
-        '조개', '굴', '전복', '홍합', '바지락', '관자', '조개류',
-        
-        # 어류
-        '고등어', '연어', '참치', '멸치', '오징어', '문어', '어류',
-        
-        # 육류
-        '쇠고기', '돼지고기', '닭고기', '양고기', '소고기', '돼지',
-        
-        # 복숭아
-        '복숭아', '복숭아즙', '복숭아향료',
-        
-        # 토마토
-        '토마토', '토마토페이스트', '토마토소스', '토마토추출물',
-        
-        # 아황산류
-        '아황산나트륨', '아황산칼륨', '아황산수소나트륨', '아황산류',
-        
-        # 기타 알레르기 관련
-        '카라멜색소', '아질산나트륨', '복합조미료', 'MSG', '조미료'
-    ]
+    # 공용 사전의 오토마톤으로 알레르기 유발 성분들을 한 번에 탐지
+    ingredients.extend(find_known_ingredients(text))
     
-    for ingredient in known_ingredients:
-        if ingredient in text:
+    # OCR 오류로 깨진 용어 (예: "밀 가루", "우 유")는 퍼지 색인으로 보완
+    for ingredient in find_fuzzy_ingredients(text):
+        if ingredient not in ingredients:
             ingredients.append(ingredient)
     
     # 복합 패턴 검색 (괄호나 특수문자 포함)
-    complex_patterns = [
-        r'([가-힣]+\([^)]*\))',  # 괄호 포함 재료명
-        r'([가-힣]+\[[^\]]*\])',  # 대괄호 포함 재료명
-        r'([가-힣]+(?:가루|분말|유지|오일|유|제|료|분유|매스|탕|닝|류|품|액|크림|시럽|추출물|분해물|믹스))',  # 접미사 패턴
-    ]
-    
-    for pattern in complex_patterns:
-        matches = re.findall(pattern, text)
+    for pattern in _COMPLEX_PATTERN_RES:
+        matches = pattern.findall(text)
         for match in matches:
             cleaned = clean_ingredient_text(match)
             if cleaned and is_valid_ingredient(cleaned):
@@ -727,24 +555,31 @@ def extract_direct_patterns(text):
     
     return ingredients
 
+# 원재료명 섹션 패턴들 (우선순위 순)
+_SECTION_PATTERNS = [
+    # 기본 패턴
+    re.compile(r'원재료명?\s*[:：]\s*([\s\S]*?)(?=\n\n|\n[가-힣]+:|$)', re.IGNORECASE | re.MULTILINE),
+    # "원재료:" 패턴
+    re.compile(r'원재료\s*[:：]\s*([\s\S]*?)(?=\n\n|\n[가-힣]+:|$)', re.IGNORECASE | re.MULTILINE),
+    # 더 유연한 패턴 (첫 한글부터 끝까지 - 중첩 반복 없는 동등 패턴)
+    re.compile(r'원재료명?\s*[:：]\s*([^가-힣]*[가-힣][\s\S]*)', re.IGNORECASE | re.MULTILINE),
+    # 성분 관련 패턴
+    re.compile(r'성분\s*[:：]\s*([\s\S]*?)(?=\n\n|\n[가-힣]+:|$)', re.IGNORECASE | re.MULTILINE),
+]
+
+# 원재료명 키워드가 없을 때 쓰는 쉼표로 구분된 긴 텍스트 블록 패턴
+_LONG_TEXT_RE = re.compile(
+    r'([가-힣]+(?:\([^)]*\))?(?:,|\s*,\s*)[가-힣]+(?:\([^)]*\))?(?:,|\s*,\s*)[가-힣]+(?:\([^)]*\))?(?:,|\s*,\s*)[가-힣]+(?:\([^)]*\))?)',
+    re.MULTILINE
+)
+
 def find_ingredient_section(text):
     """
     원재료명 섹션을 찾는 함수 (개선된 버전)
     """
     # 다양한 패턴으로 원재료명 섹션 찾기
-    patterns = [
-        # 기본 패턴
-        r'원재료명?\s*[:：]\s*([\s\S]*?)(?=\n\n|\n[가-힣]+:|$)',
-        # "원재료:" 패턴
-        r'원재료\s*[:：]\s*([\s\S]*?)(?=\n\n|\n[가-힣]+:|$)',
-        # 더 유연한 패턴
-        r'원재료명?\s*[:：]\s*([^가-힣]*[가-힣]+[^가-힣]*(?:[가-힣]+[^가-힣]*)*)',
-        # 성분 관련 패턴
-        r'성분\s*[:：]\s*([\s\S]*?)(?=\n\n|\n[가-힣]+:|$)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+    for pattern in _SECTION_PATTERNS:
+        match = pattern.search(text)
         if match:
             section = match.group(1).strip()
             # 너무 짧거나 비어있지 않은지 확인
@@ -753,14 +588,103 @@ def find_ingredient_section(text):
     
     # 원재료명 키워드가 없는 경우, 텍스트에서 성분 관련 내용 찾기
     # 쉼표로 구분된 긴 텍스트 블록 찾기
-    long_text_pattern = r'([가-힣]+(?:\([^)]*\))?(?:,|\s*,\s*)[가-힣]+(?:\([^)]*\))?(?:,|\s*,\s*)[가-힣]+(?:\([^)]*\))?(?:,|\s*,\s*)[가-힣]+(?:\([^)]*\))?)'
-    match = re.search(long_text_pattern, text, re.MULTILINE)
+    match = _LONG_TEXT_RE.search(text)
     
     if match:
         return match.group(1).strip()
     
     return None
 
+# is_valid_ingredient에서 쓰는 사전/정규식 (모듈 로드 시 한 번만 생성)
+_KOREAN_CHAR_RE = re.compile(r'[가-힣]')
+
+# 제외할 단어들 (더 구체적으로)
+_EXCLUDE_WORDS = frozenset([
+    # 제품 정보
+    '제품명', '식품유형', '소비기한', '품목보고번호', '포장재질', '업소명', '소재지',
+    '측면표기일까지', '즉면표기일까지', '제조원', '대륙식품', '덕계공장',
+    
+    # 주소/위치 정보
+    '서울시', '영등포구', '경남', '양산시', '그린공단', '말레이시아산', '미국산', '싱가포르산',
+    
+    # 안전/보관 정보
+    '직사광선', '습기', '피해', '보관', '개봉', '후', '가급적', '빨리', '드세요',
+    '부정불량식품', '신고', '국번없이', '1399', '고객센터', '전화', '문자', '반품처',
+    '본사', '구입한', '공기주입', '방식을', '사용하였습니다', '소비자', '기본법', '의한', '피해보상',
+    
+    # 영양정보
+    '기준치에', '대한', '내용량당', '콜레스테롤', '포화지방', '총', '개', '함량', '기타',
+    
+    # 일반적인 설명
+    '생길', '있으나', '인체에', '무해하니', '드셔도', '괜찮습니다', '나누어', '조금씩',
+    '하안', '주', '주 내용량당',
+    
+    # OCR 오류로 인한 잘못된 추출
+    '불량식품', '폴리프로필렌 소비기한', '변질품'
+])
+
+# 알레르기 관련 문구 ('함유', '혼입 가능', '포함', '혼입가능')
+_ALLERGEN_NOTICE_RE = re.compile(r'함유|혼입 ?가능|포함')
+
+# 실제 식품 원재료명 목록 (확장된 목록)
+# OCR 오류 표기(고코아매스, 팡에스테르화유 등)는 따로 등록하지 않고 자모 색인으로 교정
+_VALID_INGREDIENTS = (
+    # 곡물류
+    '밀가루', '밀', '옥수수', '쌀', '보리', '귀리',
+    
+    # 당류
+    '설탕', '백설탕', '당류', '당류가공품', '포도당', '과당', '유당',
+    
+    # 유지류
+    '쇼트닝', '가공유지', '식물성유지', '팜유', '팜에스테르화유',
+    '해바라기유', '올레오레진로즈메리', '버터', '마가린',
+    
+    # 유제품
+    '전지분유', '탈지분유', '유청단백분말', '우유', '유크림', '가공유크림',
+    '혼합분유', '연유', '카라기난',
+    
+    # 코코아/초콜릿
+    '코코아매스', '코코아프리퍼레이션', '전지분골드',
+    
+    # 첨가물
+    '산도조절제', '유화제', '혼합제제', '불활성건조효모', '효모', '생이스트',
+    '합성팽창제', '탄산수소나트륨', '산성피로인산나트륨', '제일인산칼슘', '젖산칼슘',
+    '스테아릴젖산나트륨', '비타민C', 'α-아밀라아제', '자일라나아제',
+    '초산나트륨', '초산', '비타민B₁라우릴황산염',
+    
+    # 향료/향신료
+    '향료', '바닐라', '바닐라추출물', '바닐라크림', '바닐린', '효소제', '구면신',
+    '설탕시럽', '플러스로스트콘맛씨즈닝', '간장분말', '진간장', '복합조미식품',
+    
+    # 기타
+    '정제소금', '전란액', '난황액', '난백분', '슈가파우더', '기타가공품',
+    '변성전분', '옥수수전분', '식물성단백가수분해물', '대두',
+    '노티드도넛믹스', '영양강화밀가루', '밀글루텐', '헤미셀룰라아제', '황산칼슘'
+)
+_VALID_INGREDIENT_SET = frozenset(_VALID_INGREDIENTS)
+
+# 포함 여부를 오토마톤 한 번 스캔으로 확인
+_VALID_INGREDIENT_MATCHER = AhoCorasick((ingredient, ingredient) for ingredient in _VALID_INGREDIENTS)
+
+# 자모 하나 정도 잘못 읽힌 원재료명(고코아매스 → 코코아매스)을 찾는 자모 색인 (3음절 이상 용어만)
+_VALID_INGREDIENT_JAMO = JamoIndex((ingredient, ingredient) for ingredient in _VALID_INGREDIENTS)
+
+@lru_cache(maxsize=4096)
+def correct_ingredient_term(text):
+    """
+    원재료명 목록에 있는 용어면 그대로, 자모 혼동 비용 이내로 가까운 용어가 있으면 그 용어, 없으면 None
+    """
+    if text in _VALID_INGREDIENT_SET:
+        return text
+    matches = _VALID_INGREDIENT_JAMO.lookup(text)
+    return matches[0][0] if matches else None
+
+# 일반적인 식품 관련 패턴 (접미사 패턴들을 하나의 정규식으로 병합)
+_FOOD_PATTERN_RE = re.compile(
+    r'.*(?:가루|분말|유지|오일|유|제|료|분유|매스|탕|닝|류|품|액|크림|시럽|추출물|분해물|믹스)$'
+    r'|.*강화.*$'
+)
+
 def is_valid_ingredient(text):
     """
     유효한 재료명인지 확인하는 함수 (한국 식품 성분표 특화)
@@ -773,96 +697,66 @@ def is_valid_ingredient(text):
         return False
     
     # 한국어 비율 확인 (50% 이상)
-    korean_chars = len(re.findall(r'[가-힣]', text))
+    korean_chars = len(_KOREAN_CHAR_RE.findall(text))
     if korean_chars < len(text) * 0.5:
         return False
     
-    # 제외할 단어들 (더 구체적으로)
-    exclude_words = [
-        # 제품 정보
-        '제품명', '식품유형', '소비기한', '품목보고번호', '포장재질', '업소명', '소재지',
-        '측면표기일까지', '즉면표기일까지', '제조원', '대륙식품', '덕계공장',
-        
-        # 주소/위치 정보
-        '서울시', '영등포구', '경남', '양산시', '그린공단', '말레이시아산', '미국산', '싱가포르산',
-        
-        # 안전/보관 정보
-        '직사광선', '습기', '피해', '보관', '개봉', '후', '가급적', '빨리', '드세요',
-        '부정불량식품', '신고', '국번없이', '1399', '고객센터', '전화', '문자', '반품처',
-        '본사', '구입한', '공기주입', '방식을', '사용하였습니다', '소비자', '기본법', '의한', '피해보상',
-        
-        # 영양정보
-        '기준치에', '대한', '내용량당', '콜레스테롤', '포화지방', '총', '개', '함량', '기타',
-        
-        # 일반적인 설명
-        '생길', '있으나', '인체에', '무해하니', '드셔도', '괜찮습니다', '나누어', '조금씩',
-        '하안', '주', '주 내용량당',
-        
-        # OCR 오류로 인한 잘못된 추출
-        '불량식품', '폴리프로필렌 소비기한', '변질품'
-    ]
-    
-    # 정확히 일치하는 경우만 제외
-    for word in exclude_words:
-        if text == word or text.startswith(word + '(') or text.endswith(')' + word):
-            return False
+    # 정확히 일치하는 경우만 제외 (단어, 단어(...), (...)단어)
+    if text in _EXCLUDE_WORDS:
+        return False
+    open_index = text.find('(')
+    if open_index != -1 and text[:open_index] in _EXCLUDE_WORDS:
+        return False
+    close_index = text.rfind(')')
+    if close_index != -1 and text[close_index + 1:] in _EXCLUDE_WORDS:
+        return False
     
     # 알레르기 관련 문구가 포함된 경우 제외
-    if any(phrase in text for phrase in ['함유', '혼입 가능', '포함', '혼입가능']):
+    if _ALLERGEN_NOTICE_RE.search(text):
         return False
     
-    # 실제 식품 원재료명 패턴 확인 (확장된 목록)
-    valid_ingredients = [
-        # 곡물류
-        '밀가루', '밀', '옥수수', '쌀', '보리', '귀리',
-        
-        # 당류
-        '설탕', '백설탕', '당류', '당류가공품', '포도당', '과당', '유당',
-        
-        # 유지류
-        '쇼트닝', '가공유지', '식물성유지', '팜유', '팡유', '팡에스테르화유',
-        '해바라기유', '올레오레진로즈메리', '버터', '마가린',
-        
-        # 유제품
-        '전지분유', '탈지분유', '유청단백분말', '우유', '유크림', '가공유크림',
-        '혼합분유', '연유', '카라기난',
-        
-        # 코코아/초콜릿
-        '코코아매스', '코코아프리퍼레이션', '고코아매스', '전지분골드',
-        
-        # 첨가물
-        '산도조절제', '유화제', '혼합제제', '불활성건조효모', '효모', '생이스트',
-        '합성팽창제', '탄산수소나트륨', '산성피로인산나트륨', '제일인산칼슘', '젖산칼슘',
-        '스테아릴젖산나트륨', '비타민C', 'α-아밀라아제', '자일라나아제',
-        '초산나트륨', '초산', '비타민B₁라우릴황산염',
-        
-        # 향료/향신료
-        '향료', '바닐라', '바닐라추출물', '바닐라크림', '바닐린', '효소제', '구면신',
-        '설탕시럽', '플러스로스트콘맛씨즈닝', '간장분말', '진간장', '복합조미식품',
-        
-        # 기타
-        '정제소금', '전란액', '난황액', '난백분', '슈가파우더', '기타가공품',
-        '변성전분', '옥수수전분', '식물성단백가수분해물', '대두',
-        '노티드도넛믹스', '영양강화밀가루', '밀글루텐', '헤미셀룰라아제', '황산칼슘'
-    ]
-    
-    # 실제 재료명과 유사한 패턴이 있는지 확인
-    for ingredient in valid_ingredients:
-        if ingredient in text:
-            return True
+    # 실제 재료명과 유사한 패턴이 있는지 확인 (자모 하나 정도 잘못 읽힌 재료명 포함)
+    if _VALID_INGREDIENT_MATCHER.contains_any(text) or correct_ingredient_term(text):
+        return True
     
     # 일반적인 식품 관련 패턴 (확장된 패턴)
-    food_patterns = [
-        r'.*가루$', r'.*분말$', r'.*유지$', r'.*오일$', r'.*유$', r'.*제$', r'.*료$',
-        r'.*분유$', r'.*매스$', r'.*탕$', r'.*닝$', r'.*류$', r'.*품$', r'.*액$',
-        r'.*크림$', r'.*시럽$', r'.*추출물$', r'.*분해물$', r'.*믹스$', r'.*강화.*$'
-    ]
-    
-    for pattern in food_patterns:
-        if re.match(pattern, text):
-            return True
-    
-    return False
+    return _FOOD_PATTERN_RE.match(text) is not None
+
+# clean_ingredient_text에서 쓰는 변환표/정규식 (모듈 로드 시 한 번만 생성)
+# 일반적인 OCR 오류 (숫자 → 문자)
+_OCR_DIGIT_TABLE = str.maketrans({'0': 'O', '1': 'l', '2': 'Z', '5': 'S', '8': 'B'})
+
+# 공백으로 나뉜 한글 조각들 (OCR이 재료명 중간에 넣은 공백 확인용)
+_SPLIT_HANGUL_RE = re.compile(r'[가-힣]+(?: [가-힣]+)+')
+
+def _spans_ingredient(left, right):
+    # 두 조각을 붙이면 원재료명이 되거나, 왼쪽 조각에서 시작한 원재료명이 오른쪽 조각까지 이어지는지
+    combined = left + right
+    if correct_ingredient_term(combined):
+        return True
+    return any(start == 0 and end > len(left) for start, end, _, _ in _VALID_INGREDIENT_MATCHER.iter_matches(combined))
+
+def _join_split_pieces(match):
+    # OCR이 재료명 중간에 넣은 공백만 제거 ("밀 가루" → "밀가루", "바닐 라향" → "바닐라향", "우유 크림"은 유지)
+    pieces = match.group().split(' ')
+    joined = [pieces[0]]
+    for piece in pieces[1:]:
+        if _spans_ingredient(joined[-1], piece):
+            combined = joined[-1] + piece
+            joined[-1] = correct_ingredient_term(combined) or combined
+        else:
+            joined.append(piece)
+    return ' '.join(joined)
+
+# 특수 문자 정리 + 불필요한 문자 제거 (괄호는 제거하지 않음 - 원산지 정보 포함)
+_OCR_SYMBOL_TABLE = str.maketrans({
+    '·': ' ', '：': ':', '，': ',',
+    '[': ' ', ']': ' ', ';': ' ', '；': ' ', '|': ' ', '\\': ' ', '/': ' ',
+})
+
+_PERCENT_RE = re.compile(r'\d+\.?\d*%')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_SPACES_RE = re.compile(r'\s+')
 
 def clean_ingredient_text(text):
     """
@@ -874,48 +768,21 @@ def clean_ingredient_text(text):
     # 앞뒤 공백 제거
     text = text.strip()
     
-        # OCR 오류로 인한 잘못된 문자들 수정 (더 포괄적으로)
-    ocr_corrections = {
-        # 일반적인 OCR 오류
-        '0': 'O', '1': 'l', '2': 'Z', '5': 'S', '8': 'B',
-        
-        # 한국어 재료명 OCR 오류 수정
-        '설 탕': '설탕', '정제소 금': '정제소금', '산도조절 제': '산도조절제',
-        '유화 제': '유화제', '혼합 제제': '혼합제제', '바닐 라': '바닐라',
-        '전지분 유': '전지분유', '유청단백분 말': '유청단백분말',
-        '불활성건조효 모': '불활성건조효모', '고코아매 스': '고코아매스',
-        '코코아프리퍼레이 션': '코코아프리퍼레이션', '팡에스테르화 유': '팡에스테르화유',
-        
-        # 공백 제거가 필요한 경우들
-        '밀 가루': '밀가루', '마가 린': '마가린', '효 모': '효모',
-        '전란 액': '전란액', '난황 액': '난황액', '혼합분 유': '혼합분유',
-        '생이 스트': '생이스트', '슈가파우 더': '슈가파우더',
-        
-        # 특수 문자 정리
-        '·': ' ', '：': ':', '，': ',',
-        
-        # 추가 OCR 오류 수정
-        '설탕': '설탕',  # 이미 올바른 형태
-    }
-    
-    # OCR 오류 수정 적용
-    for wrong, correct in ocr_corrections.items():
-        text = text.replace(wrong, correct)
-    
-    # 불필요한 문자들 제거 (괄호는 제거하지 않음 - 원산지 정보 포함)
-    unwanted_chars = ['[', ']', ';', '；', '|', '\\', '/', '·', '·']
-    for char in unwanted_chars:
-        text = text.replace(char, ' ')
+    # OCR 오류 수정 적용 (숫자 → 문자, 띄어쓰기 오류, 특수 문자 순)
+    text = text.translate(_OCR_DIGIT_TABLE)
+    if ' ' in text:
+        text = _SPLIT_HANGUL_RE.sub(_join_split_pieces, text)
+    text = text.translate(_OCR_SYMBOL_TABLE)
     
     # 백분율 정보 정리 (예: "가공유크림31.86%" → "가공유크림")
-    text = re.sub(r'\d+\.?\d*%', '', text)
+    text = _PERCENT_RE.sub('', text)
     
     # 숫자와 특수문자 정리 (재료명에 포함된 숫자 제거하되, 재료명 자체는 보존)
     # 단, 숫자만으로 이루어진 부분은 제거
-    text = re.sub(r'\b\d+\b', '', text)
+    text = _NUMBER_RE.sub('', text)
     
     # 연속된 공백을 하나로
-    text = re.sub(r'\s+', ' ', text)
+    text = _SPACES_RE.sub(' ', text)
     
     # 앞뒤 공백 다시 제거
     text = text.strip()
@@ -928,26 +795,64 @@ def clean_ingredient_text(text):
     if len(text) > 50:
         return ""
     
-    return text
+    # 자모 하나 정도 잘못 읽힌 재료명은 목록의 표기로 교정 (고코아매스 → 코코아매스)
+    return correct_ingredient_term(text) or text
 
-def extract_ingredients_from_image(image_path_or_object, use_easyocr=True, fast_mode=False):
+def extract_ingredients_from_image(image_path_or_object, use_easyocr=True, fast_mode=False, cascade=True, tiled=False, auto_route=False, deskew=True, budget=None):
     """
     이미지에서 성분표를 인식하고 원재료명만 추출하는 메인 함수 (업그레이드 버전)
     use_easyocr: EasyOCR 사용 여부 (기본값: True)
     fast_mode: 빠른 모드 사용 여부 (기본값: False)
-    """
+    cascade: 정밀 모드에서 신뢰도 캐스케이드 사용 여부 (기본값: True)
+    tiled: Tesseract로 큰 이미지를 원본 해상도 타일 OCR (캐스케이드 대신 사용, 기본값: False)
+    auto_route: 이미지 품질을 보고 엔진/모드를 자동 선택 (use_easyocr, fast_mode, cascade 무시)
+    deskew: OCR 전에 방향(90/180/270도)과 기울기를 한 번 보정 (기본값: True)
+    budget: 처리 시간 예산(초, None이면 제한 없음) - 넘으면 남은 단계/변형을 건너뛰고 부분 결과 반환
+            (멈춘 단계는 결과의 'timed_out'에 기록)
+    """
+    deadline = Deadline(budget)
+    route = None
+    if auto_route:
+        try:
+            # 빠른 모드가 이 파일에서 가장 저렴한 경로이므로 ocr_utils 기본 경로(basic)는 제외
+            image_path_or_object, _, route, _ = route_image(image_path_or_object, allowed=('fast', 'cascade', 'easyocr'))
+            use_easyocr = route == 'easyocr'
+            fast_mode = route == 'fast'
+            cascade = True
+        except Exception as e:
+            print(f"OCR 경로 선택 오류: {e}")
+    if tiled and not use_easyocr:
+        cascade = False
+    mode = 'fast' if fast_mode else ('cascade' if cascade else 'precise')
     try:
         start_time = time.time()
-        
-        if use_easyocr:
+        cascade_stage = None
+        confidence = None
+        region = None
+        orientation = None
+        
+        if deskew and not deadline.skip('orientation'):
+            # 🧭 잘못된 방향에 여러 번 OCR하지 않도록 보정한 이미지 하나만 넘김
+            image_path_or_object, orientation = correct_orientation(load_image(image_path_or_object))
+        
+        if cascade and not fast_mode:
+            # 🪜 저렴한 단계부터 시도하고 신뢰도가 낮을 때만 다음 단계로
+            print("🪜 신뢰도 캐스케이드 사용 중...")
+            cascade_result = ocr_with_cascade(image_path_or_object, use_easyocr=use_easyocr, deadline=deadline)
+            extracted_text = cascade_result['text']
+            cascade_stage = cascade_result['stage']
+            confidence = cascade_result['confidence']
+            region = cascade_result['region']
+            engine_name = "EasyOCR" if use_easyocr else "Tesseract"
+        elif use_easyocr:
             # 🚀 EasyOCR 사용 (고성능)
             print("🔥 EasyOCR 엔진 사용 중...")
-            extracted_text = ocr_with_enhanced_preprocessing(image_path_or_object, use_easyocr=True)
+            extracted_text = ocr_with_enhanced_preprocessing(image_path_or_object, use_easyocr=True, deadline=deadline)
             engine_name = "EasyOCR"
         else:
             # 📜 Tesseract 사용 (기존)
             print("📜 Tesseract OCR 엔진 사용 중...")
-            extracted_text = ocr_image_with_opencv(image_path_or_object, "kor+eng", fast_mode)
+            extracted_text = ocr_image_with_opencv(image_path_or_object, "kor+eng", fast_mode, tiled=tiled, deadline=deadline)
             engine_name = "Tesseract"
         
         # 원재료명 추출
@@ -962,7 +867,13 @@ def extract_ingredients_from_image(image_path_or_object, use_easyocr=True, fast_
             'ingredient_count': len(ingredients),
             'processing_time': processing_time,
             'engine': engine_name,
-            'mode': 'fast' if fast_mode else 'precise'
+            'mode': mode,
+            'cascade_stage': cascade_stage,
+            'confidence': confidence,
+            'region': region,
+            'route': route,
+            'orientation': orientation,
+            'timed_out': deadline.timed_out_at
         }
     except Exception as e:
         return {
@@ -972,19 +883,31 @@ def extract_ingredients_from_image(image_path_or_object, use_easyocr=True, fast_
             'ingredient_count': 0,
             'processing_time': 0,
             'engine': 'Error',
-            'mode': 'fast' if fast_mode else 'precise'
+            'mode': mode,
+            'cascade_stage': None,
+            'confidence': None,
+            'region': None,
+            'route': route,
+            'orientation': None,
+            'timed_out': deadline.timed_out_at
         }
 
 # -------------------------------
 # 터미널에서 실행 시
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("사용법: python ocr_test.py [이미지파일경로] [--tesseract]")
+        print("사용법: python ocr_test.py [이미지파일경로] [--tesseract] [--tiled]")
         print("  --tesseract: Tesseract OCR 사용 (기본값: EasyOCR)")
+        print("  --tiled: 큰 이미지를 원본 해상도 타일로 나눠 OCR (Tesseract)")
+        print("  --auto: 이미지 품질을 보고 엔진/모드 자동 선택")
+        print("  --budget 초: 처리 시간 예산 (넘으면 부분 결과 반환)")
         sys.exit(1)
 
     # 명령행 인수 처리
     use_easyocr = True
+    tiled = '--tiled' in sys.argv
+    auto_route = '--auto' in sys.argv
+    budget = float(sys.argv[sys.argv.index('--budget') + 1]) if '--budget' in sys.argv else None
     image_path = '/Users/oseli/Desktop/Cursor AI/data/과자:빵류/오프라인 데이터/빠다코코넛.jpeg'
     
     if len(sys.argv) > 1:
@@ -1004,8 +927,14 @@ if __name__ == "__main__":
         gpu_available = check_gpu_availability()
         print("-" * 60)
         
+        # EasyOCR Reader 풀 예열 (모델 로딩 시간을 분석 시간과 분리해 표시)
+        if use_easyocr:
+            ready_seconds = warm_up_reader_pool(['ko', 'en'])
+            print(f"⏱️ EasyOCR 준비 시간: {ready_seconds}초")
+            print("-" * 60)
+        
         # 원재료명 추출 실행 (EasyOCR 우선)
-        result = extract_ingredients_from_image(image_path, use_easyocr=use_easyocr, fast_mode=False)
+        result = extract_ingredients_from_image(image_path, use_easyocr=use_easyocr, fast_mode=False, tiled=tiled, auto_route=auto_route, budget=budget)
         
         if 'error' in result:
             print("❌ 오류 발생:", result['error'])
@@ -1014,6 +943,18 @@ if __name__ == "__main__":
             print(f"⚡ 처리 시간: {result['processing_time']}초")
             print(f"🔧 사용 엔진: {result['engine']}")
             print(f"📊 모드: {result['mode']}")
+            if result['route']:
+                print(f"🧭 자동 선택 경로: {result['route']}")
+            if result['orientation']:
+                orientation = result['orientation']
+                print(f"🔄 방향 보정: {orientation['rotation']}도 회전, 기울기 {orientation['skew']}도 "
+                      f"({orientation['source']}, {orientation['seconds']}초)")
+            stats = preprocess_stats()
+            print(f"🧮 전처리 버퍼: 할당 {stats['allocations']}회, 재사용 {stats['reuses']}회, 최대 사용 {stats['peak_bytes_in_use'] / 1024 / 1024:.1f}MB")
+            if result['cascade_stage']:
+                print(f"🪜 최종 단계: {result['cascade_stage']} (신뢰도 {result['confidence']})")
+            if result['timed_out']:
+                print(f"⏰ 처리 시간 예산({budget}초) 초과로 '{result['timed_out']}' 단계에서 중단 (부분 결과)")
             print(f"⚠️ 총 {result['ingredient_count']}개의 알레르기 유발 성분 발견!")
             
             print("\n📝 전체 OCR 텍스트:")
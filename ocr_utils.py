@@ -2,29 +2,52 @@
 #OCR 기능 전담 모듈
 
 import cv2
-import pytesseract
-import numpy as np
-from PIL import Image
 import re
+import tesseract_pool
+from image_ingest import load_gray
+from tiled_ocr import iter_tiled_lines, needs_tiling
+from deadline import Deadline
 
-def ocr_image_with_opencv(image, lang="kor+eng"):
+def iter_ocr_lines(image, lang="kor+eng", tiled=True, threshold=150, equalize=False, deadline=None):
     """
-    OpenCV + Tesseract OCR 전처리 및 텍스트 추출 함수
-    image: PIL.Image 또는 파일 경로
-    lang: OCR 언어 설정
+    OpenCV + Tesseract OCR 결과를 줄 단위(끝에 줄바꿈 포함)로 생성
+    타일 OCR은 띠 하나가 끝날 때마다 그 띠의 줄을 바로 내보내므로, 전체 OCR이 끝나기 전에 앞쪽 줄을 처리할 수 있음
+    인자는 ocr_image_with_opencv와 같음
     """
-    # 이미지가 PIL 객체라면 OpenCV 형식으로 변환
-    if isinstance(image, Image.Image):
-        image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-    elif isinstance(image, str):  # 파일 경로일 경우
-        image = cv2.imread(image)
-
-    # 전처리 (그레이스케일 + 이진화)
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
+    deadline = deadline or Deadline()
+    # 전처리 (그레이스케일 + 이진화, 그레이스케일 배열은 변환 없이 그대로 사용)
+    gray = load_gray(image)
+    if equalize:
+        gray = cv2.equalizeHist(gray)
+    if threshold is None:
+        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    else:
+        _, thresh = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY)
 
     # OCR 수행
     config = "--psm 6"
-    text = pytesseract.image_to_string(thresh, lang=lang, config=config)
+    if tiled and needs_tiling(thresh):
+        for line in iter_tiled_lines(thresh, lang=lang, config=config, deadline=deadline):
+            yield line + "\n"
+        return
+    if deadline.skip('tesseract'):
+        return
+    try:
+        text = tesseract_pool.image_to_string(thresh, lang=lang, config=config, timeout=deadline.remaining())
+    except TimeoutError as e:
+        deadline.timeout('tesseract', e)
+        return
+    yield from text.splitlines(True)
+
 
-    return text.strip()
+def ocr_image_with_opencv(image, lang="kor+eng", tiled=True, threshold=150, equalize=False, deadline=None):
+    """
+    OpenCV + Tesseract OCR 전처리 및 텍스트 추출 함수
+    image: 그레이스케일/BGR 배열, PIL.Image, 파일 경로, 이미지 바이트 또는 업로드 파일
+    lang: OCR 언어 설정
+    tiled: 큰 이미지는 겹치는 띠로 나눠 동시에 OCR (기본값: True)
+    threshold: 이진화 임계값 (None이면 이미지마다 Otsu로 결정)
+    equalize: 이진화 전에 히스토그램 균등화 (대비가 낮은 이미지용)
+    deadline: 처리 시간 예산 (마감이 지나면 OCR을 중단하고 그때까지의 텍스트 반환, 중단 단계는 deadline에 기록)
+    """
+    return "".join(iter_ocr_lines(image, lang, tiled, threshold, equalize, deadline)).strip()
@@ -0,0 +1,169 @@
+#방향/기울기 보정 모듈
+#휴대폰 사진은 90도 돌아가 있거나 비스듬한 경우가 많아 --psm 6/3 OCR이 잡음만 내고,
+#정밀 모드는 같은 잘못된 방향에 변형만 더 돌리게 되므로
+#축소 이미지로 방향(Tesseract OSD 또는 글자 덩어리 모양)과 기울기(투영 프로파일)를 추정해 한 번만 바로잡음
+
+import time
+
+import cv2
+import numpy as np
+
+import tesseract_pool
+
+# 방향/기울기 추정용 축소 이미지의 긴 변 길이
+ORIENT_MAX_SIDE = 800
+
+# 탐색할 최대 기울기와 이보다 작은 기울기는 보정하지 않는 값 (도)
+MAX_SKEW = 10.0
+MIN_SKEW = 0.3
+
+# OSD를 쓸 수 없을 때 세로로 닫힘 연산한 덩어리 수가 가로로 한 것보다 이 배수 이상 적으면 90도 돌아간 것으로 봄
+AXIS_RATIO = 1.3
+
+# 축 판단에 필요한 최소 글자 덩어리 수
+MIN_AXIS_COMPONENTS = 20
+
+# OSD 결과를 믿을 최소 신뢰도
+MIN_OSD_CONFIDENCE = 2.0
+
+# 세로 글자를 90/270도 중 어느 쪽으로 세울지 OCR로 정할 때 셀 단어의 최소 신뢰도,
+# 더 잘 읽힌 쪽의 글자 수가 이보다 적으면 돌리지 않음, OCR 한 번의 시간 상한 (초)
+MIN_WORD_CONFIDENCE = 60
+MIN_READ_CHARS = 6
+READ_TIMEOUT = 10
+
+_ROTATE_CODES = {
+    90: cv2.ROTATE_90_CLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+
+def _small_gray(image):
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    height, width = gray.shape[:2]
+    scale = min(1.0, ORIENT_MAX_SIDE / max(height, width))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def _ink(gray):
+    # 글자 픽셀을 1로 만든 이진 이미지
+    _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return binary
+
+
+def _profile_score(binary, axis=1):
+    # 글자 줄과 줄 사이가 또렷이 갈릴수록 투영 합의 분산이 큼
+    return float(np.var(binary.mean(axis=axis)))
+
+
+def _component_count(binary, kernel_size):
+    closed = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, np.ones(kernel_size, np.uint8))
+    return cv2.connectedComponents(closed, connectivity=8)[0] - 1
+
+
+def is_vertical_text(binary):
+    """
+    글자 줄이 세로로 놓였는지(90/270도 회전) 판단
+    같은 줄의 글자 간격이 줄 간격보다 좁으므로, 글자 높이 절반 크기로 닫힘 연산하면
+    줄 방향으로 할 때 글자들이 한 덩어리로 붙어 덩어리 수가 더 적음
+    """
+    count, _, components, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count - 1 < MIN_AXIS_COMPONENTS:
+        return False
+    sizes = np.maximum(components[1:, cv2.CC_STAT_WIDTH], components[1:, cv2.CC_STAT_HEIGHT])
+    gap = max(2, int(np.median(sizes[sizes >= 3])) // 2) if np.any(sizes >= 3) else 2
+    horizontal = _component_count(binary, (1, gap))
+    vertical = _component_count(binary, (gap, 1))
+    return vertical * AXIS_RATIO < horizontal
+
+
+def _rotate_binary(binary, angle):
+    height, width = binary.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(binary, matrix, (width, height), flags=cv2.INTER_NEAREST)
+
+
+def estimate_skew(binary, max_skew=MAX_SKEW):
+    """
+    가로 투영 분산이 가장 커지는 회전 각도(도)를 1도 간격 → 0.1도 간격으로 탐색
+    """
+    def best(angles):
+        # 점수가 같으면(글자가 거의 없는 경우 등) 작은 각도를 고르도록 0도에 가까운 순서로 비교
+        angles = sorted(np.clip(angles, -max_skew, max_skew), key=abs)
+        return max(angles, key=lambda angle: _profile_score(_rotate_binary(binary, angle)))
+
+    coarse = best(np.arange(-max_skew, max_skew + 0.5, 1.0))
+    return round(float(best(np.arange(coarse - 1.0, coarse + 1.05, 0.1))), 1)
+
+
+def _read_score(small, rotation):
+    # 돌린 축소 이미지를 한 번 OCR해 신뢰도가 충분한 단어들의 글자 수 합
+    rotated = cv2.rotate(small, _ROTATE_CODES[rotation])
+    _, words = tesseract_pool.image_to_data(rotated, lang="kor+eng", config="--psm 6 --oem 3", timeout=READ_TIMEOUT)
+    return sum(len(word) for word, confidence in words if confidence >= MIN_WORD_CONFIDENCE)
+
+
+def vertical_rotation(small):
+    """
+    세로로 놓인 글자를 시계 방향 90도/270도로 각각 돌려 OCR하고 더 잘 읽히는 쪽의 각도 반환
+    (투영 모양은 두 방향이 똑같아 구분할 수 없음)
+    둘 다 읽히지 않거나 점수가 같거나 OCR을 쓸 수 없으면 0 - 거꾸로 세우는 것보다 돌리지 않는 편이 나음
+    """
+    try:
+        scores = {rotation: _read_score(small, rotation) for rotation in (90, 270)}
+    except Exception as e:
+        print(f"세로 글자 방향 판단 OCR 실패, 회전하지 않음: {e}")
+        return 0
+    if scores[90] == scores[270] or max(scores.values()) < MIN_READ_CHARS:
+        return 0
+    return max(scores, key=scores.get)
+
+
+def estimate_rotation(small, use_osd=True):
+    """
+    바로 세우려면 시계 방향으로 돌릴 각도(0/90/180/270)와 판단 근거('osd' / 'layout')
+    OSD를 쓸 수 없으면 글자 덩어리 모양으로 가로/세로를 구분하고, 세로면 90/270도 중 OCR이 더 잘 되는 쪽을 고름
+    """
+    if use_osd:
+        try:
+            osd = tesseract_pool.image_to_osd(small)
+            if osd['confidence'] >= MIN_OSD_CONFIDENCE:
+                return osd['rotate'], 'osd'
+        except Exception as e:
+            print(f"OSD 방향 검출 실패, 글자 덩어리 모양으로 판단: {e}")
+
+    if is_vertical_text(_ink(small)):
+        return vertical_rotation(small), 'layout'
+    return 0, 'layout'
+
+
+def correct_orientation(image, use_osd=True):
+    """
+    방향과 기울기를 보정한 이미지와 보정 정보 반환
+    image: 그레이스케일 또는 BGR 배열
+    use_osd: Tesseract OSD로 방향 검출 (False면 글자 덩어리 모양만 사용)
+    반환값: (보정된 이미지, {'rotation', 'skew', 'source', 'seconds'})
+    """
+    start_time = time.time()
+    small = _small_gray(image)
+    rotation, source = estimate_rotation(small, use_osd)
+
+    if rotation:
+        image = cv2.rotate(image, _ROTATE_CODES[rotation])
+        small = cv2.rotate(small, _ROTATE_CODES[rotation])
+
+    skew = estimate_skew(_ink(small))
+    if abs(skew) >= MIN_SKEW:
+        height, width = image.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), skew, 1.0)
+        image = cv2.warpAffine(image, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    else:
+        skew = 0.0
+
+    info = {'rotation': rotation, 'skew': skew, 'source': source, 'seconds': round(time.time() - start_time, 3)}
+    if rotation or skew:
+        print(f"🧭 방향 보정: {rotation}도 회전, 기울기 {skew}도 ({source}, {info['seconds']}초)")
+    return image, info
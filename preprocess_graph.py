@@ -0,0 +1,265 @@
+#지연 계산 전처리 그래프 모듈
+#apply_advanced_preprocessing 등이 매번 모든 변형(블러/균등화/CLAHE/HSV 등)을 전부 계산하던 것을
+#처음 접근할 때만 계산하도록 바꾸고, 중간 결과 버퍼는 OpenCV dst= 출력으로 버퍼 풀에서 재사용
+#
+#변형 이름은 '.'으로 이어 붙인 경로: 'clahe.closing.adapt_gaussian'
+#= 그레이스케일 → CLAHE → 닫힘 연산 → 적응형 Gaussian 이진화
+
+import threading
+
+import cv2
+import numpy as np
+
+# 버퍼 풀에 (크기, 자료형)별로 보관할 최대 버퍼 수
+MAX_BUFFERS_PER_SHAPE = 8
+
+_KERNEL_3X3 = np.ones((3, 3), np.uint8)
+_KERNEL_RECT_2X2 = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+_CLAHE = threading.local()
+
+
+def _clahe():
+    # CLAHE 객체는 스레드 안전하지 않으므로 스레드마다 하나씩 만들어 재사용
+    if not hasattr(_CLAHE, 'instance'):
+        _CLAHE.instance = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    return _CLAHE.instance
+
+
+class BufferPool:
+    """
+    (크기, 자료형)별 이미지 버퍼 재사용 풀 (스레드 안전)
+    allocations: 새로 할당한 버퍼 수, reuses: 풀에서 꺼내 재사용한 횟수
+    """
+
+    def __init__(self, max_per_shape=MAX_BUFFERS_PER_SHAPE):
+        self.max_per_shape = max_per_shape
+        self._free = {}
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.reuses = 0
+        self.bytes_allocated = 0
+        self.bytes_in_use = 0
+        self.peak_bytes_in_use = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                buffer = free.pop()
+                self.reuses += 1
+            else:
+                buffer = np.empty(shape, dtype=dtype)
+                self.allocations += 1
+                self.bytes_allocated += buffer.nbytes
+            self.bytes_in_use += buffer.nbytes
+            self.peak_bytes_in_use = max(self.peak_bytes_in_use, self.bytes_in_use)
+        return buffer
+
+    def release(self, buffer):
+        key = (buffer.shape, buffer.dtype.str)
+        with self._lock:
+            self.bytes_in_use -= buffer.nbytes
+            free = self._free.setdefault(key, [])
+            if len(free) < self.max_per_shape:
+                free.append(buffer)
+
+    def forget(self, buffer):
+        """
+        풀에서 빌린 버퍼를 돌려받지 않고 사용 중 통계에서만 제외 (호출자에게 넘긴 버퍼)
+        """
+        with self._lock:
+            self.bytes_in_use -= buffer.nbytes
+
+    def stats(self):
+        """
+        벤치마크용 할당 통계
+        """
+        with self._lock:
+            return {
+                'allocations': self.allocations,
+                'reuses': self.reuses,
+                'bytes_allocated': self.bytes_allocated,
+                'bytes_in_use': self.bytes_in_use,
+                'peak_bytes_in_use': self.peak_bytes_in_use
+            }
+
+
+# 프로세스 공용 버퍼 풀
+BUFFER_POOL = BufferPool()
+
+
+def preprocess_stats():
+    """
+    공용 버퍼 풀의 할당 통계
+    """
+    return BUFFER_POOL.stats()
+
+
+def _saturated(graph, dst):
+    # 채도 1.5배 후 그레이스케일 (HSV 왕복은 이 변형을 요청할 때만 수행)
+    hsv = graph.pool.acquire(graph.bgr.shape)
+    bgr = graph.pool.acquire(graph.bgr.shape)
+    try:
+        cv2.cvtColor(graph.bgr, cv2.COLOR_BGR2HSV, dst=hsv)
+        hsv[:, :, 1] = np.clip(hsv[:, :, 1] * 1.5, 0, 255)
+        cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR, dst=bgr)
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY, dst=dst)
+    finally:
+        graph.pool.release(hsv)
+        graph.pool.release(bgr)
+
+
+def _threshold(src, dst, method):
+    _, result = cv2.threshold(src, 0 if method & cv2.THRESH_OTSU else 128, 255, method, dst=dst)
+    return result
+
+
+# 그레이스케일 단일 채널 연산: 이름 → (원본, 출력 버퍼) → 결과
+GRAY_OPERATIONS = {
+    # 블러
+    'gaussian_blur': lambda src, dst: cv2.GaussianBlur(src, (5, 5), 0, dst=dst),
+    'median_blur': lambda src, dst: cv2.medianBlur(src, 5, dst=dst),
+    'bilateral_blur': lambda src, dst: cv2.bilateralFilter(src, 9, 75, 75, dst=dst),
+    # 히스토그램 균등화
+    'equalized': lambda src, dst: cv2.equalizeHist(src, dst=dst),
+    'clahe': lambda src, dst: _clahe().apply(src, dst=dst),
+    # 모폴로지
+    'erosion': lambda src, dst: cv2.erode(src, _KERNEL_3X3, dst=dst, iterations=1),
+    'dilation': lambda src, dst: cv2.dilate(src, _KERNEL_3X3, dst=dst, iterations=1),
+    'closing': lambda src, dst: cv2.morphologyEx(src, cv2.MORPH_CLOSE, _KERNEL_3X3, dst=dst),
+    'opening': lambda src, dst: cv2.morphologyEx(src, cv2.MORPH_OPEN, _KERNEL_3X3, dst=dst),
+    'rect_closing': lambda src, dst: cv2.morphologyEx(src, cv2.MORPH_CLOSE, _KERNEL_RECT_2X2, dst=dst),
+    # 이진화
+    'otsu': lambda src, dst: _threshold(src, dst, cv2.THRESH_BINARY + cv2.THRESH_OTSU),
+    'adapt_gaussian': lambda src, dst: cv2.adaptiveThreshold(
+        src, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2, dst=dst),
+    'adapt_mean': lambda src, dst: cv2.adaptiveThreshold(
+        src, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 11, 2, dst=dst),
+    'binary': lambda src, dst: _threshold(src, dst, cv2.THRESH_BINARY),
+}
+
+# 컬러 원본에서 바로 계산하는 변형
+ROOT_OPERATIONS = {
+    'saturated': _saturated,
+}
+
+# apply_advanced_preprocessing이 돌려주던 변형 이름
+ADVANCED_VARIANTS = ('original', 'gaussian_blur', 'median_blur', 'bilateral_blur', 'equalized', 'clahe', 'saturated')
+
+
+class PreprocessGraph:
+    """
+    변형을 처음 접근할 때만 계산하는 전처리 그래프 (dict처럼 graph['clahe'] 형태로 사용)
+    image: BGR 컬러 이미지 또는 그레이스케일 이미지
+    keys: keys()/순회 시 보여줄 변형 이름 (기존 dict 반환 함수와 호환용)
+    pool: 중간 결과 버퍼를 빌려 올 버퍼 풀
+
+    with 블록이나 release()로 다 쓴 버퍼를 풀에 돌려줌
+    (돌려준 뒤에는 그래프에서 꺼낸 배열을 더 이상 사용하면 안 됨, 계속 쓸 배열은 detach()로 꺼냄)
+    같은 변형을 여러 스레드가 동시에 처음 요청하지 않도록, 공유되는 앞 단계는 미리 계산해 둘 것
+    """
+
+    def __init__(self, image, keys=ADVANCED_VARIANTS, pool=None):
+        self.pool = pool or BUFFER_POOL
+        self._keys = tuple(keys)
+        self._nodes = {}
+        self._owned = set()
+        self.computed = 0
+        if image.ndim == 2:
+            self.bgr = None
+            self._nodes['original'] = image
+        else:
+            self.bgr = image
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def _compute(self, name, parent, operation):
+        dst = self.pool.acquire(self.bgr.shape[:2] if parent is None else parent.shape)
+        if parent is None:
+            result = operation(self, dst)
+        else:
+            result = operation(parent, dst)
+        self._owned.add(name)
+        self.computed += 1
+        return result
+
+    def __getitem__(self, name):
+        node = self._nodes.get(name)
+        if node is not None:
+            return node
+
+        if name == 'original':
+            dst = self.pool.acquire(self.bgr.shape[:2])
+            node = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY, dst=dst)
+            self._owned.add(name)
+            self.computed += 1
+        elif name in ROOT_OPERATIONS:
+            if self.bgr is None:
+                raise KeyError(f"컬러 원본이 없어 계산할 수 없는 변형입니다: {name}")
+            node = self._compute(name, None, ROOT_OPERATIONS[name])
+        else:
+            parent_name, _, operation_name = name.rpartition('.')
+            operation = GRAY_OPERATIONS.get(operation_name)
+            if operation is None:
+                raise KeyError(name)
+            parent = self[parent_name or 'original']
+            node = self._compute(name, parent, operation)
+
+        self._nodes[name] = node
+        return node
+
+    def __contains__(self, name):
+        return name in self._keys
+
+    def keys(self):
+        return self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def items(self):
+        return [(name, self[name]) for name in self._keys]
+
+    def values(self):
+        return [self[name] for name in self._keys]
+
+    def discard(self, name):
+        """
+        더 이상 쓰지 않을 중간 결과의 버퍼를 바로 풀에 돌려줌
+        """
+        node = self._nodes.pop(name, None)
+        if node is not None and name in self._owned:
+            self._owned.discard(name)
+            self.pool.release(node)
+
+    def detach(self, name):
+        """
+        변형을 계산해 꺼내고 그래프 관리 대상에서 제외 (release 후에도 계속 사용 가능)
+        """
+        node = self[name]
+        self._nodes.pop(name, None)
+        if name in self._owned:
+            self._owned.discard(name)
+            self.pool.forget(node)
+        return node
+
+    def __del__(self):
+        # release() 없이 버려진 그래프: 배열은 호출자가 아직 쓰고 있을 수 있으므로 풀에 돌려주지 않고 통계만 정리
+        for name in getattr(self, '_owned', ()):
+            self.pool.forget(self._nodes[name])
+
+    def release(self):
+        """
+        그래프가 계산한 모든 버퍼를 풀에 돌려줌
+        """
+        for name in list(self._owned):
+            self.pool.release(self._nodes.pop(name))
+        self._owned.clear()
@@ -0,0 +1,88 @@
+#OCR 전 촬영 품질 검사 모듈
+#흐리거나 빛이 반사된 사진도 OCR을 끝까지 돌리면 몇 초를 쓰고 알레르겐 없는 엉터리 결과가 나와
+#'안전'으로 잘못 안내되므로, 축소 이미지 통계(engine_router.image_stats)로 몇 ms 안에 걸러내고 재촬영 안내
+
+import sqlite3
+
+from engine_router import image_stats
+from metrics import DB_PATH, increment_metric
+
+# 글자 높이를 맞춘 뒤 잰 라플라시안 분산(text_blur)이 이 값 미만이면 초점이 맞지 않은 사진
+# (합성 성분표에 가우시안 흐림을 준 측정에서 흐림 σ가 글자 높이의 약 11%를 넘을 때 이 값 아래로 내려감 -
+#  글자 높이를 모르면 축소 이미지 흐림(blur)으로 판단)
+GATE_BLUR_MIN = 120.0
+
+# 평균 밝기가 이 값 이상이면서 대비가 GATE_OVEREXPOSED_CONTRAST 미만이면 노출 과다
+GATE_OVEREXPOSED_BRIGHTNESS = 225.0
+GATE_OVEREXPOSED_CONTRAST = 20.0
+
+# 글자 영역 안에서 글자를 지운 포화 덩어리(engine_router의 glare)가 이 비율 이상이면 빛 반사
+# (글자가 인쇄된 흰 판이나 여백은 glare에 포함되지 않으므로 크기 상한은 두지 않음)
+GATE_GLARE_MIN = 0.02
+
+# 원본 기준 글자 높이가 이보다 작으면 너무 멀리서 찍은 사진
+GATE_MIN_TEXT_HEIGHT = 10
+
+# 거부 사유별 재촬영 안내
+RETAKE_HINTS = {
+    'blur': "사진이 흐립니다. 초점을 맞춘 뒤 흔들리지 않게 다시 촬영해 주세요.",
+    'overexposed': "사진이 너무 밝아 글자가 보이지 않습니다. 조명을 줄이거나 그늘에서 다시 촬영해 주세요.",
+    'glare': "빛 반사로 성분표 일부가 가려졌습니다. 각도를 조금 바꿔 반사를 피해 다시 촬영해 주세요.",
+    'small_text': "글자가 너무 작게 찍혔습니다. 성분표에 더 가까이 대고 다시 촬영해 주세요.",
+}
+
+
+def rejection_reason(stats):
+    """
+    통계로 판단한 거부 사유 (RETAKE_HINTS의 키), 통과면 None
+    """
+    blur = stats['blur'] if stats['text_blur'] is None else stats['text_blur']
+    if blur < GATE_BLUR_MIN:
+        return 'blur'
+    if stats['brightness'] >= GATE_OVEREXPOSED_BRIGHTNESS and stats['contrast'] < GATE_OVEREXPOSED_CONTRAST:
+        return 'overexposed'
+    if stats['glare'] >= GATE_GLARE_MIN:
+        return 'glare'
+    if stats['text_height'] is not None and stats['text_height'] < GATE_MIN_TEXT_HEIGHT:
+        return 'small_text'
+    return None
+
+
+def _average_ocr_ms(db_path):
+    # 최근 OCR 평균 소요 시간 (거부로 아낀 시간 추정용, 기록이 없으면 0)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT AVG(ocr_seconds) FROM (SELECT ocr_seconds FROM route_log ORDER BY id DESC LIMIT 100)')
+        average = cursor.fetchone()[0]
+    except sqlite3.OperationalError:
+        average = None
+    conn.close()
+    return int((average or 0) * 1000)
+
+
+def check_quality(image, override=False, db_path=DB_PATH):
+    """
+    OCR 전에 촬영 품질 검사
+    override: 사용자가 안내를 보고도 분석을 원하면 거부 사유가 있어도 통과 (quality_gate.overridden(.<사유>)에 누적해
+              임계값이 실제 사진에서 너무 엄격한지 확인하는 데 사용)
+    반환값: {'ok', 'reason'(거부 사유 또는 None), 'hint'(재촬영 안내 또는 None), 'stats'(image_stats 결과)}
+    거부하면 quality_gate.rejected(.<사유>)와 아낀 OCR 시간 추정치(quality_gate.saved_ms)를 지표에 누적
+    """
+    stats = image_stats(image)
+    reason = rejection_reason(stats)
+    if reason is None:
+        increment_metric('quality_gate.passed', db_path=db_path)
+        return {'ok': True, 'reason': None, 'hint': None, 'stats': stats}
+    if override:
+        print(f"⚠️ 촬영 품질 검사 거부({reason})를 사용자가 무시하고 분석")
+        increment_metric('quality_gate.overridden', db_path=db_path)
+        increment_metric(f'quality_gate.overridden.{reason}', db_path=db_path)
+        return {'ok': True, 'reason': reason, 'hint': None, 'stats': stats}
+
+    print(f"🚫 촬영 품질 검사 거부: {reason} ({stats['ms']}ms, 흐림 {stats['blur']}/{stats['text_blur']}, 밝기 {stats['brightness']}, "
+          f"대비 {stats['contrast']}, 반사 {stats['glare']}, 글자 높이 {stats['text_height']})")
+    increment_metric('quality_gate.rejected', db_path=db_path)
+    increment_metric(f'quality_gate.rejected.{reason}', db_path=db_path)
+    increment_metric('quality_gate.saved_ms', _average_ocr_ms(db_path), db_path=db_path)
+    return {'ok': False, 'reason': reason, 'hint': RETAKE_HINTS[reason], 'stats': stats}
@@ -0,0 +1,459 @@
+#Tesseract 상주 워커 풀 모듈
+#pytesseract는 이미지마다 tesseract 실행 파일을 새로 띄우고 임시 파일을 쓰며 traineddata를 다시 읽음
+#tesserocr가 설치되어 있으면 언어 모델을 올려 둔 워커 프로세스들에 파이프로 이미지를 넘겨 처리하고,
+#없으면 기존 pytesseract 호출로 그대로 동작
+
+import atexit
+import importlib.util
+import multiprocessing
+import os
+import queue
+import threading
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from deadline import Deadline
+
+# 최대 워커 수 및 요청당 기본 대기 시간 (초)
+# ACQUIRE_TIMEOUT: 쉬는 워커를 기다리는 상한, REQUEST_TIMEOUT: 워커를 받은 뒤 OCR 한 번의 상한
+MAX_WORKERS = 4
+ACQUIRE_TIMEOUT = 10
+REQUEST_TIMEOUT = 60
+PING_TIMEOUT = 5
+
+# 쉬는 워커 상태 점검 주기 (초)
+HEALTH_CHECK_INTERVAL = 60
+
+
+class PoolBusyError(RuntimeError):
+    """
+    처리 시간 예산이 남았는데도 ACQUIRE_TIMEOUT 안에 쉬는 워커를 받지 못함 (예산 초과가 아니므로 pytesseract로 대체)
+    """
+
+
+def tesserocr_available():
+    """
+    tesserocr(libtesseract 바인딩) 설치 여부
+    """
+    return importlib.util.find_spec('tesserocr') is not None
+
+
+def default_worker_count():
+    """
+    코어 수에 맞춘 기본 워커 수
+    """
+    return max(1, min(MAX_WORKERS, os.cpu_count() or 1))
+
+
+def parse_config(config):
+    """
+    pytesseract config 문자열("--psm 6 --oem 3 -c key=value")을 (psm, oem, 변수 튜플)로 변환
+    """
+    psm = None
+    oem = None
+    variables = []
+    parts = (config or "").split()
+    index = 0
+    while index < len(parts):
+        part = parts[index]
+        if part == '--psm' and index + 1 < len(parts):
+            psm = int(parts[index + 1])
+            index += 1
+        elif part == '--oem' and index + 1 < len(parts):
+            oem = int(parts[index + 1])
+            index += 1
+        elif part == '-c' and index + 1 < len(parts):
+            key, _, value = parts[index + 1].partition('=')
+            variables.append((key, value))
+            index += 1
+        index += 1
+    return psm, oem, tuple(variables)
+
+
+def _recognize(apis, image, lang, config, output='text'):
+    # 워커 프로세스 안에서 실행: (언어, OEM, 변수) 조합별 API를 한 번만 초기화해 재사용
+    import tesserocr
+
+    psm, oem, variables = parse_config(config)
+    key = (lang, oem, variables)
+    api = apis.get(key)
+    if api is None:
+        if oem is None:
+            api = tesserocr.PyTessBaseAPI(lang=lang)
+        else:
+            api = tesserocr.PyTessBaseAPI(lang=lang, oem=oem)
+        for name, value in variables:
+            api.SetVariable(name, value)
+        apis[key] = api
+
+    api.SetPageSegMode(tesserocr.PSM.AUTO if psm is None else psm)
+    api.SetImage(Image.fromarray(image))
+    if output == 'osd':
+        result = api.DetectOS()
+        if not result:
+            raise RuntimeError("방향을 판단할 글자가 부족합니다")
+        # orientation은 반시계 방향 90도 단위 → pytesseract의 Rotate(바로 세우려면 돌릴 각도)로 변환
+        return {'rotate': (360 - result['orientation'] * 90) % 360, 'confidence': float(result['oconfidence'])}
+    if output == 'boxes':
+        api.Recognize()
+        level = tesserocr.RIL.WORD
+        boxes = []
+        for result in tesserocr.iterate_level(api.GetIterator(), level):
+            word = result.GetUTF8Text(level)
+            if word and word.strip():
+                left, top, right, bottom = result.BoundingBox(level)
+                boxes.append((word, float(result.Confidence(level)), (left, top, right - left, bottom - top)))
+        return boxes
+
+    text = api.GetUTF8Text()
+    if output == 'data':
+        return text, [(word, float(conf)) for word, conf in api.MapWordConfidences() if word.strip()]
+    return text
+
+
+def _worker_main(conn):
+    """
+    워커 프로세스 본체: ('ocr', 이미지, 언어, 설정, 출력 종류) 또는 ('ping',) 메시지를 받아 처리
+    출력 종류: 'text'(텍스트), 'data'(텍스트 + 단어 신뢰도), 'boxes'(단어 + 신뢰도 + 위치), 'osd'(방향)
+    """
+    apis = {}
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        if message[0] == 'ping':
+            conn.send(('ok', None))
+            continue
+
+        _, image, lang, config, output = message
+        try:
+            conn.send(('ok', _recognize(apis, image, lang, config, output)))
+        except Exception as e:
+            conn.send(('error', str(e)))
+
+    for api in apis.values():
+        api.End()
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def request(self, message, timeout):
+        self.conn.send(message)
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Tesseract 워커가 {timeout}초 안에 응답하지 않았습니다.")
+        return self.conn.recv()
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def kill(self):
+        # 마감을 넘긴 OCR은 끝나기를 기다리지 않고 프로세스를 바로 종료해 CPU를 돌려받음
+        self.process.terminate()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+class TesseractPool:
+    """
+    언어 모델을 올려 둔 Tesseract 워커 프로세스 풀
+    size: 워커 수 (None이면 코어 수에 맞춤)
+    """
+
+    def __init__(self, size=None):
+        self.size = size or default_worker_count()
+        self.restarts = 0
+        self._context = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._stop_checks = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            for _ in range(self.size):
+                self._idle.put(_Worker(self._context))
+            self._started = True
+            self._stop_checks.clear()
+            threading.Thread(target=self._health_check_loop, daemon=True).start()
+            print(f"✅ Tesseract 워커 {self.size}개 시작")
+
+    def _health_check_loop(self):
+        # 요청이 없는 동안 죽거나 멈춘 워커를 미리 바꿔 두어 다음 요청이 재시작을 기다리지 않게 함
+        while not self._stop_checks.wait(HEALTH_CHECK_INTERVAL):
+            self.health_check()
+
+    def _restart(self, worker, kill=False):
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+        self.restarts += 1
+        print(f"⚠️ Tesseract 워커 재시작 (누적 {self.restarts}회)")
+        return _Worker(self._context)
+
+    def image_to_string(self, image, lang="kor+eng", config="", timeout=REQUEST_TIMEOUT,
+                        acquire_timeout=ACQUIRE_TIMEOUT, deadline=None):
+        """
+        pytesseract.image_to_string과 같은 인자로 워커에서 OCR 수행
+        timeout: 워커를 받은 뒤 OCR 시간 상한, acquire_timeout: 쉬는 워커를 기다리는 시간 상한
+        deadline: 둘 다 이 마감 안으로 줄임 (기다린 만큼 OCR 시간이 줄어듦)
+        """
+        return self._request(image, lang, config, 'text', timeout, acquire_timeout, deadline)
+
+    def image_to_data(self, image, lang="kor+eng", config="", timeout=REQUEST_TIMEOUT,
+                      acquire_timeout=ACQUIRE_TIMEOUT, deadline=None):
+        """
+        워커에서 OCR 수행 후 (텍스트, [(단어, 신뢰도 0~100), ...]) 반환
+        """
+        return self._request(image, lang, config, 'data', timeout, acquire_timeout, deadline)
+
+    def image_to_words(self, image, lang="kor+eng", config="", timeout=REQUEST_TIMEOUT,
+                       acquire_timeout=ACQUIRE_TIMEOUT, deadline=None):
+        """
+        워커에서 OCR 수행 후 [(단어, 신뢰도 0~100, (x, y, 너비, 높이)), ...] 반환
+        """
+        return self._request(image, lang, config, 'boxes', timeout, acquire_timeout, deadline)
+
+    def image_to_osd(self, image, timeout=REQUEST_TIMEOUT, acquire_timeout=ACQUIRE_TIMEOUT, deadline=None):
+        """
+        워커에서 방향 검출(OSD) 수행 후 {'rotate': 바로 세우려면 돌릴 각도, 'confidence'} 반환
+        """
+        return self._request(image, 'osd', '--psm 0', 'osd', timeout, acquire_timeout, deadline)
+
+    def _request(self, image, lang, config, output, timeout, acquire_timeout, deadline=None):
+        # 워커가 죽었으면 재시작 후 한 번 더 시도
+        # 쉬는 워커를 못 받으면 워커는 그대로 두고, 마감 때문에 기다림이 줄었으면 TimeoutError, 아니면 PoolBusyError
+        # OCR이 timeout 안에 응답하지 않으면 하던 OCR을 버리도록 워커를 종료·교체하고 다시 시도하지 않음
+        if not self._started:
+            self.start()
+        if isinstance(image, Image.Image):
+            image = np.array(image)
+
+        limited_by_deadline = False
+        if deadline is not None and deadline.remaining() is not None and deadline.remaining() < acquire_timeout:
+            acquire_timeout = deadline.remaining()
+            limited_by_deadline = True
+        try:
+            worker = self._idle.get(timeout=acquire_timeout)
+        except queue.Empty:
+            message = f"{acquire_timeout:.2f}초 안에 쉬는 Tesseract 워커가 없습니다."
+            raise TimeoutError(message) if limited_by_deadline else PoolBusyError(message)
+        if deadline is not None and deadline.remaining() is not None:
+            timeout = min(timeout, deadline.remaining())
+        try:
+            for attempt in range(2):
+                if not worker.alive():
+                    worker = self._restart(worker)
+                try:
+                    status, payload = worker.request(('ocr', image, lang, config, output), timeout)
+                    break
+                except TimeoutError:
+                    worker = self._restart(worker, kill=True)
+                    raise
+                except (EOFError, BrokenPipeError, ConnectionResetError):
+                    worker = self._restart(worker)
+                    if attempt == 1:
+                        raise
+        finally:
+            self._idle.put(worker)
+
+        if status == 'error':
+            raise RuntimeError(f"Tesseract 워커 오류: {payload}")
+        return payload
+
+    def health_check(self, timeout=PING_TIMEOUT):
+        """
+        쉬고 있는 워커들에 ping을 보내 응답하지 않는 워커를 재시작
+        반환값: 재시작한 워커 수
+        """
+        if not self._started:
+            return 0
+        restarted = 0
+        checked = []
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if not worker.alive():
+                    raise EOFError
+                worker.request(('ping',), timeout)
+            except (EOFError, BrokenPipeError, ConnectionResetError, TimeoutError):
+                worker = self._restart(worker)
+                restarted += 1
+            checked.append(worker)
+        for worker in checked:
+            self._idle.put(worker)
+        return restarted
+
+    def close(self):
+        with self._lock:
+            if not self._started:
+                return
+            self._stop_checks.set()
+            while True:
+                try:
+                    self._idle.get_nowait().stop()
+                except queue.Empty:
+                    break
+            self._started = False
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_warned = False
+
+
+def get_tesseract_pool():
+    """
+    프로세스 공용 Tesseract 워커 풀 (최초 호출 시 한 번만 생성)
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TesseractPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def start_tesseract_pool():
+    """
+    앱 시작 시 호출: tesserocr가 있으면 워커 풀(과 상태 점검)을 미리 띄우고,
+    없으면 이미지마다 tesseract를 새로 띄우는 pytesseract로 동작한다고 경고
+    반환값: 워커 풀 사용 여부
+    """
+    if not tesserocr_available():
+        global _warned
+        if not _warned:
+            _warned = True
+            print("⚠️ tesserocr가 설치되어 있지 않아 Tesseract 워커 풀을 쓰지 않습니다 "
+                  "(OCR마다 tesseract 프로세스를 새로 띄움). README의 'tesserocr 설치'를 참고하세요.")
+        return False
+    get_tesseract_pool().start()
+    return True
+
+
+def _run_pytesseract(function, image, timeout, **kwargs):
+    # pytesseract는 timeout이 지나면 tesseract 프로세스를 종료하고 RuntimeError를 내므로 TimeoutError로 통일
+    try:
+        return function(image, timeout=0 if timeout is None else max(timeout, 0.01), **kwargs)
+    except RuntimeError as e:
+        if 'timeout' in str(e).lower():
+            raise TimeoutError(str(e)) from e
+        raise
+
+
+def image_to_string(image, lang="kor+eng", config="", timeout=None):
+    """
+    pytesseract.image_to_string 대체 함수
+    tesserocr가 있으면 상주 워커 풀을 사용하고, 없거나 풀이 실패하면 pytesseract로 처리
+    timeout: 이 시간(초) 안에 끝나지 않으면 OCR을 중단하고 TimeoutError (None이면 기본값)
+             (워커를 기다리다 pytesseract로 대체하면 기다린 만큼 줄어든 시간을 넘김)
+    """
+    budget = Deadline(timeout)
+    if tesserocr_available():
+        try:
+            return get_tesseract_pool().image_to_string(image, lang=lang, config=config, deadline=budget)
+        except TimeoutError:
+            raise
+        except Exception as e:
+            print(f"Tesseract 워커 풀 오류, pytesseract로 대체: {e!r}")
+    return _run_pytesseract(pytesseract.image_to_string, image, budget.remaining(), lang=lang, config=config)
+
+
+def _data_from_pytesseract(image, lang, config, timeout=None):
+    # image_to_data 결과를 줄 단위로 다시 이어 붙여 텍스트와 단어 신뢰도를 함께 만듦
+    data = _run_pytesseract(pytesseract.image_to_data, image, timeout, lang=lang, config=config,
+                            output_type=pytesseract.Output.DICT)
+    lines = []
+    words = []
+    current_line = None
+    for index, word in enumerate(data['text']):
+        if not word.strip():
+            continue
+        line = (data['block_num'][index], data['par_num'][index], data['line_num'][index])
+        if line != current_line:
+            lines.append([])
+            current_line = line
+        lines[-1].append(word)
+        words.append((word, float(data['conf'][index])))
+    return "\n".join(" ".join(line) for line in lines), words
+
+
+def image_to_data(image, lang="kor+eng", config="", timeout=None):
+    """
+    OCR 텍스트와 단어별 신뢰도를 함께 반환하는 함수
+    반환값: (텍스트, [(단어, 신뢰도 0~100), ...])
+    """
+    budget = Deadline(timeout)
+    if tesserocr_available():
+        try:
+            return get_tesseract_pool().image_to_data(image, lang=lang, config=config, deadline=budget)
+        except TimeoutError:
+            raise
+        except Exception as e:
+            print(f"Tesseract 워커 풀 오류, pytesseract로 대체: {e!r}")
+    return _data_from_pytesseract(image, lang, config, budget.remaining())
+
+
+def image_to_words(image, lang="kor+eng", config="", timeout=None):
+    """
+    단어별 신뢰도와 위치를 반환하는 함수 (성분표 영역 찾기 등 위치가 필요한 곳에서 사용)
+    반환값: [(단어, 신뢰도 0~100, (x, y, 너비, 높이)), ...]
+    """
+    budget = Deadline(timeout)
+    if tesserocr_available():
+        try:
+            return get_tesseract_pool().image_to_words(image, lang=lang, config=config, deadline=budget)
+        except TimeoutError:
+            raise
+        except Exception as e:
+            print(f"Tesseract 워커 풀 오류, pytesseract로 대체: {e!r}")
+    data = _run_pytesseract(pytesseract.image_to_data, image, budget.remaining(), lang=lang, config=config,
+                            output_type=pytesseract.Output.DICT)
+    return [
+        (word, float(data['conf'][index]),
+         (data['left'][index], data['top'][index], data['width'][index], data['height'][index]))
+        for index, word in enumerate(data['text']) if word.strip()
+    ]
+
+
+def image_to_osd(image, timeout=None):
+    """
+    Tesseract 방향 검출 (osd.traineddata 필요)
+    반환값: {'rotate': 바로 세우려면 시계 방향으로 돌릴 각도(0/90/180/270), 'confidence'}
+    """
+    budget = Deadline(timeout)
+    if tesserocr_available():
+        try:
+            return get_tesseract_pool().image_to_osd(image, deadline=budget)
+        except TimeoutError:
+            raise
+        except Exception as e:
+            print(f"Tesseract 워커 풀 오류, pytesseract로 대체: {e!r}")
+    data = _run_pytesseract(pytesseract.image_to_osd, image, budget.remaining(), output_type=pytesseract.Output.DICT)
+    return {'rotate': int(data['rotate']), 'confidence': float(data['orientation_conf'])}
@@ -0,0 +1,112 @@
+#고해상도 이미지 타일 OCR 모듈
+#큰 사진을 1200px로 줄이면 작은 글씨의 긴 원재료명이 뭉개지므로
+#원본 해상도 그대로 겹치는 가로 띠(strip)로 나눠 동시에 OCR하고,
+#겹친 부분은 단어 위치로 어느 띠의 결과를 쓸지 정해 중복 줄 없이 이어 붙임
+
+from concurrent.futures import ThreadPoolExecutor
+
+import tesseract_pool
+from deadline import Deadline
+
+# 띠 높이와 띠끼리 겹치는 높이 (띠 경계에 잘린 줄이 중복되지 않도록 겹침은 글자 줄 높이의 두 배보다 커야 함)
+TILE_HEIGHT = 1000
+TILE_OVERLAP = 150
+
+# 긴 변이 이 값보다 큰 이미지만 타일로 나눔
+TILED_MIN_SIDE = 1600
+
+# 동시에 OCR할 최대 띠 수
+MAX_PARALLEL_TILES = 4
+
+
+def strip_bounds(height, tile_height=TILE_HEIGHT, overlap=TILE_OVERLAP):
+    """
+    이미지 높이를 겹치는 띠 구간 [(시작, 끝), ...]으로 나눔
+    """
+    step = max(1, tile_height - overlap)
+    bounds = []
+    start = 0
+    while True:
+        end = min(height, start + tile_height)
+        bounds.append((start, end))
+        if end >= height:
+            return bounds
+        start += step
+
+
+def _owned_range(bounds, index):
+    # 겹친 구간은 가운데를 기준으로 나눠 각 띠가 맡을 세로 범위를 정함 (띠끼리 빈틈/중복 없음)
+    start, end = bounds[index]
+    owned_start = start if index == 0 else (start + bounds[index - 1][1]) // 2
+    owned_end = end if index == len(bounds) - 1 else (bounds[index + 1][0] + end) // 2
+    return owned_start, owned_end
+
+
+def words_to_lines(words):
+    """
+    [(단어, 신뢰도, (x, y, 너비, 높이)), ...]를 세로 중심이 가까운 단어끼리 묶어 줄 텍스트 목록으로 변환
+    """
+    lines = []
+    current = []
+    current_center = None
+    current_height = 0
+    for word in sorted(words, key=lambda word: word[2][1] + word[2][3] / 2):
+        _, _, (x, y, w, h) = word
+        center = y + h / 2
+        if current and abs(center - current_center) > max(h, current_height) / 2:
+            lines.append(current)
+            current = []
+        if not current:
+            current_center = center
+            current_height = h
+        current.append(word)
+    if current:
+        lines.append(current)
+    return [" ".join(word[0] for word in sorted(line, key=lambda word: word[2][0])) for line in lines]
+
+
+def _strip_words(image, bounds, index, lang, config, deadline):
+    # 마감이 지났으면 시작하지 않고, 진행 중이면 남은 시간 안에 끝나지 않을 때 중단 (그 띠의 줄은 빠짐)
+    if deadline.skip(f'tile {index + 1}/{len(bounds)}'):
+        return []
+    start, end = bounds[index]
+    owned_start, owned_end = _owned_range(bounds, index)
+    try:
+        strip_words = tesseract_pool.image_to_words(image[start:end], lang=lang, config=config, timeout=deadline.remaining())
+    except TimeoutError as e:
+        deadline.timeout(f'tile {index + 1}/{len(bounds)}', e)
+        return []
+    words = []
+    for text, confidence, (x, y, w, h) in strip_words:
+        y += start
+        if owned_start <= y + h / 2 < owned_end:
+            words.append((text, confidence, (x, y, w, h)))
+    return words
+
+
+def iter_tiled_lines(image, lang="kor+eng", config="--psm 6", max_parallel=MAX_PARALLEL_TILES, deadline=None):
+    """
+    전처리된 이미지를 띠로 나눠 동시에 OCR하고, 위에서부터 순서대로 줄 텍스트를 생성
+    (IngredientStream 등에 바로 흘려 넣을 수 있도록 띠 하나가 끝날 때마다 그 띠의 줄을 내보냄)
+    deadline: 마감이 지나면 남은 띠는 건너뜀 (멈춘 띠는 deadline.timed_out_at에 기록)
+    """
+    deadline = deadline or Deadline()
+    bounds = strip_bounds(image.shape[0])
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(bounds)))) as executor:
+        for words in executor.map(lambda index: _strip_words(image, bounds, index, lang, config, deadline), range(len(bounds))):
+            for line in words_to_lines(words):
+                yield line
+
+
+def ocr_tiled(image, lang="kor+eng", config="--psm 6", max_parallel=MAX_PARALLEL_TILES, deadline=None):
+    """
+    타일 OCR 결과를 한 덩어리 텍스트로 반환
+    """
+    return "\n".join(iter_tiled_lines(image, lang, config, max_parallel, deadline))
+
+
+def needs_tiling(image, min_side=TILED_MIN_SIDE):
+    """
+    타일로 나눠 처리할 만큼 큰 이미지인지 여부
+    """
+    return max(image.shape[:2]) > min_side